@@ -0,0 +1,89 @@
+import pandas as pd
+
+# ------------------------------------------------------------------
+# 설비 보전 분석 (서버 사이드 사전 집계)
+#  - 차트에는 원본 이력이 아닌 설비/기간 단위 집계 결과만 전달
+# ------------------------------------------------------------------
+MAINT_FIELDS = ["날짜", "설비ID", "설비명", "작업구분", "비용", "비가동시간"]
+PERIOD_FREQ = {"일별": "D", "주별": "W", "월별": "M", "분기별": "Q", "연별": "Y"}
+
+
+def prepare_maintenance(df):
+    # 시트 문자열 -> 분석용 타입 변환 (날짜 없는 행 제외)
+    if df is None or df.empty:
+        return pd.DataFrame({
+            "날짜": pd.Series(dtype="datetime64[ns]"), "설비ID": pd.Series(dtype=str), "설비명": pd.Series(dtype=str),
+            "작업구분": pd.Series(dtype=str), "비용": pd.Series(dtype=float), "비가동시간": pd.Series(dtype=float),
+        })
+    out = df.reindex(columns=MAINT_FIELDS).copy()
+    out["날짜"] = pd.to_datetime(out["날짜"], errors="coerce")
+    out["비용"] = pd.to_numeric(out["비용"], errors="coerce").fillna(0)
+    out["비가동시간"] = pd.to_numeric(out["비가동시간"], errors="coerce").fillna(0)
+    out["설비ID"] = out["설비ID"].fillna("").astype(str)
+    out["설비명"] = out["설비명"].fillna("").astype(str)
+    # "BM (고장)" 형태로 저장된 과거 데이터도 코드만 사용
+    out["작업구분"] = out["작업구분"].fillna("").astype(str).str.split().str[0].fillna("")
+    return out.dropna(subset=["날짜"]).reset_index(drop=True)
+
+
+def filter_period(df, start=None, end=None):
+    # 종료일은 당일 포함
+    mask = pd.Series(True, index=df.index)
+    if start is not None: mask &= df["날짜"] >= pd.Timestamp(start)
+    if end is not None: mask &= df["날짜"] < pd.Timestamp(end) + pd.Timedelta(days=1)
+    return df[mask]
+
+
+def maintenance_summary(df):
+    return {
+        "total_cost": float(df["비용"].sum()),
+        "total_downtime": float(df["비가동시간"].sum()),
+        "count": int(len(df)),
+        "bm_count": int((df["작업구분"] == "BM").sum()),
+        "top_type": df["작업구분"].mode().iloc[0] if not df.empty else "-",
+    }
+
+
+def type_counts(df):
+    # 정비 유형별 건수 (파이 차트용)
+    return df.groupby("작업구분", as_index=False).agg(건수=("설비ID", "size"), 비용=("비용", "sum"))
+
+
+def maintenance_rollup(df, freq="M"):
+    # 설비ID x 기간 단위 비용/비가동/BM 건수 집계
+    cols = ["기간", "설비ID", "설비명", "건수", "BM건수", "비용", "비가동시간"]
+    if df.empty: return pd.DataFrame(columns=cols)
+    period = df["날짜"].dt.to_period(freq).dt.start_time
+    g = df.assign(기간=period, _bm=(df["작업구분"] == "BM").astype(int)).groupby(["기간", "설비ID", "설비명"], as_index=False).agg(
+        건수=("작업구분", "size"), BM건수=("_bm", "sum"), 비용=("비용", "sum"), 비가동시간=("비가동시간", "sum"))
+    return g[cols]
+
+
+def reliability(df, start, end):
+    # 설비별 MTBF(시간) / MTTR(분) - BM(고장) 이력 기준
+    #  MTBF = (기간 총 시간 - 고장 비가동시간) / 고장 건수
+    #  MTTR = 고장 비가동시간 / 고장 건수
+    cols = ["설비ID", "설비명", "건수", "BM건수", "비용", "비가동시간", "고장시간", "MTBF", "MTTR"]
+    if df.empty: return pd.DataFrame(columns=cols)
+    period_hours = ((pd.Timestamp(end) - pd.Timestamp(start)).days + 1) * 24
+    is_bm = df["작업구분"] == "BM"
+    g = df.assign(_bm=is_bm.astype(int), _bm_down=df["비가동시간"].where(is_bm, 0)).groupby(["설비ID", "설비명"], as_index=False).agg(
+        건수=("작업구분", "size"), BM건수=("_bm", "sum"), 비용=("비용", "sum"), 비가동시간=("비가동시간", "sum"), 고장시간=("_bm_down", "sum"))
+    failures = g["BM건수"].where(g["BM건수"] > 0)
+    g["MTTR"] = (g["고장시간"] / failures).round(1)
+    g["MTBF"] = ((period_hours - g["고장시간"] / 60).clip(lower=0) / failures).round(1)
+    return g[cols].sort_values("비용", ascending=False).reset_index(drop=True)
+
+
+# ------------------------------------------------------------------
+# 생산 실적 (차트/집계용 타입 변환)
+# ------------------------------------------------------------------
+def prepare_production(df):
+    if df is None or df.empty:
+        return pd.DataFrame({"날짜": pd.Series(dtype="datetime64[ns]"), "구분": pd.Series(dtype=str), "품목코드": pd.Series(dtype=str), "수량": pd.Series(dtype=float)})
+    out = df.reindex(columns=["날짜", "구분", "품목코드", "수량"]).copy()
+    out["날짜"] = pd.to_datetime(out["날짜"], errors="coerce").dt.normalize()
+    out["수량"] = pd.to_numeric(out["수량"], errors="coerce").fillna(0)
+    out["구분"] = out["구분"].fillna("").astype(str)
+    out["품목코드"] = out["품목코드"].fillna("").astype(str)
+    return out.dropna(subset=["날짜"]).reset_index(drop=True)
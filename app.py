@@ -1,33 +1,73 @@
+import time
+_RUN_STARTED = time.perf_counter()  # 스크립트 실행 시작 시각 (로그인 화면 표시 시간 측정)
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-import time
-import hashlib
+import base64
 import json
 import os
 import tempfile
 import urllib.request
-from fpdf import FPDF
 import streamlit.components.v1 as components
+import analytics
+import charts
+import paging
+import search_index
+import item_index
+import master_edit
+import importer
+import quality
+import compaction
+import snapshots
+import audit
+import oee
+import check_calendar
+import attainment
+import reports
+import sites
+import signature
+import metrics
+import auth
+import threading
+
+
+# 구글 시트 연동 (저장소 계층)
+import sheets
+import data_hub
+import shared_store
+from sheets import (
+    SHEET_RECORDS, SHEET_ITEMS, SHEET_INVENTORY, SHEET_INV_HISTORY, SHEET_MAINTENANCE,
+    SHEET_EQUIPMENT, SHEET_CHECK_MASTER, SHEET_CHECK_RESULT, SHEET_CHECK_SIGNATURE, SHEET_SIGNATURE_BLOBS, SHEET_AUDIT_LOG, SHEET_LINE_EQUIPMENT, SHEET_PLAN,
+    COLS_RECORDS, COLS_ITEMS, COLS_INVENTORY, COLS_INV_HISTORY, COLS_MAINTENANCE,
+    COLS_EQUIPMENT, COLS_CHECK_MASTER, COLS_CHECK_RESULT, COLS_CHECK_SIGNATURE, COLS_SIGNATURE_BLOBS, COLS_AUDIT_LOG, COLS_LINE_EQUIPMENT, COLS_PLAN,
+)
+
+# [안전 장치] 무거운 선택 라이브러리(차트/서명/PDF)는 처음 사용할 때 로드 - 로그인 화면 기동 시간 단축
+def load_altair():
+    try:
+        import altair as alt
+        return alt
+    except Exception: return None
 
-# [선택] 그리기 서명 라이브러리
-try:
-    from streamlit_drawable_canvas import st_canvas
-    HAS_CANVAS = True
-except ImportError:
-    HAS_CANVAS = False
-
-# 구글 시트 연동 라이브러리
-import gspread
-from google.oauth2.service_account import Credentials
-from gspread_dataframe import set_with_dataframe, get_as_dataframe
-
-# [안전 장치] 시각화 라이브러리 로드
-try:
-    import altair as alt
-    HAS_ALTAIR = True
-except Exception as e:
-    HAS_ALTAIR = False
+def load_canvas():
+    try:
+        from streamlit_drawable_canvas import st_canvas
+        return st_canvas
+    except ImportError: return None
+
+def _prewarm():
+    # 로그인 화면 표시 후 백그라운드에서 구글 연동/차트 라이브러리를 미리 로드
+    t0 = time.perf_counter()
+    try: sheets.preload()
+    except Exception: pass
+    load_altair()
+    metrics.observe("prewarm_ms", (time.perf_counter() - t0) * 1000)
+
+@st.cache_resource
+def start_prewarm():
+    t = threading.Thread(target=_prewarm, name="prewarm", daemon=True)
+    t.start()
+    return t
 
 # ------------------------------------------------------------------
 # 1. 기본 설정 및 데이터 스키마
@@ -35,168 +75,241 @@ except Exception as e:
 # [수정] 타이틀 SMT로 변경
 st.set_page_config(page_title="SMT", page_icon="🏭", layout="wide", initial_sidebar_state="expanded")
 
-st.markdown("""
-    <style>
-    @import url('https://cdn.jsdelivr.net/gh/orioncactus/pretendard/dist/web/static/pretendard.css');
-    html, body, [class*="css"] { font-family: 'Pretendard', sans-serif !important; color: #1e293b; }
-    .stApp { background-color: #f8fafc; }
-    .dashboard-header { background: linear-gradient(135deg, #3b82f6 0%, #1e3a8a 100%); padding: 20px 30px; border-radius: 12px; color: white; margin-bottom: 20px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); }
-    .metric-card { background: white; border: 1px solid #e2e8f0; border-radius: 12px; padding: 20px; box-shadow: 0 1px 3px rgba(0,0,0,0.05); }
-    
-    /* 탭 스타일 개선 */
-    .stTabs [data-baseweb="tab-list"] { gap: 4px; flex-wrap: wrap; }
-    .stTabs [data-baseweb="tab"] { 
-        height: 40px; white-space: pre-wrap; background-color: white; border-radius: 8px 8px 0px 0px; 
-        box-shadow: 0 -1px 2px rgba(0,0,0,0.05); padding: 0 16px; font-size: 0.9rem;
-    }
-    .stTabs [aria-selected="true"] { background-color: #eff6ff; color: #1e40af; font-weight: bold; border-top: 2px solid #1e40af; }
-    
-    /* 라디오 버튼 가로 배치 */
-    div.row-widget.stRadio > div { flex-direction: row !important; gap: 10px; }
-    div.row-widget.stRadio > div > label { 
-        background-color: #fff; padding: 4px 12px; border-radius: 5px; border: 1px solid #e2e8f0; 
-        cursor: pointer; transition: all 0.2s; font-size: 0.85rem;
-    }
-    div.row-widget.stRadio > div > label:hover { background-color: #f1f5f9; }
-
-    /* 일일점검 리스트 스타일 개선 */
-    .check-item-container { padding: 5px 0; }
-    .check-item-title { font-size: 1.15rem; font-weight: 700; color: #1e293b; margin-bottom: 4px; letter-spacing: -0.5px; }
-    .check-item-content { font-size: 0.95rem; color: #64748b; margin-bottom: 2px; line-height: 1.4; }
-    .check-item-badge { 
-        display: inline-block; font-size: 0.8rem; font-weight: 600; color: #0f766e; 
-        background-color: #f0fdfa; padding: 4px 8px; border-radius: 6px; border: 1px solid #ccfbf1;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-GOOGLE_SHEET_NAME = "SMT_Database" 
-
-# 시트 이름 정의
-SHEET_RECORDS = "production_data"
-SHEET_ITEMS = "item_codes"
-SHEET_INVENTORY = "inventory_data"
-SHEET_INV_HISTORY = "inventory_history"
-SHEET_MAINTENANCE = "maintenance_data"
-SHEET_EQUIPMENT = "equipment_list"
-SHEET_CHECK_MASTER = "daily_check_master"
-SHEET_CHECK_RESULT = "daily_check_result"
-SHEET_CHECK_SIGNATURE = "daily_check_signature"
-
-# 컬럼 정의
-COLS_RECORDS = ["날짜", "구분", "품목코드", "제품명", "수량", "입력시간", "작성자", "수정자", "수정시간"]
-COLS_ITEMS = ["품목코드", "제품명"]
-COLS_INVENTORY = ["품목코드", "제품명", "현재고"]
-COLS_INV_HISTORY = ["날짜", "품목코드", "구분", "수량", "비고", "작성자", "입력시간"]
-COLS_MAINTENANCE = ["날짜", "설비ID", "설비명", "작업구분", "작업내용", "교체부품", "비용", "작업자", "비가동시간", "입력시간", "작성자", "수정자", "수정시간"]
-COLS_EQUIPMENT = ["id", "name", "func"]
-COLS_CHECK_MASTER = ["line", "equip_id", "equip_name", "item_name", "check_content", "standard", "check_type", "min_val", "max_val", "unit"]
-COLS_CHECK_RESULT = ["date", "line", "equip_id", "item_name", "value", "ox", "checker", "timestamp", "비고"]
-COLS_CHECK_SIGNATURE = ["date", "line", "signer", "signature_data", "timestamp"]
+@st.cache_resource
+def load_css():
+    # 로컬 스타일시트 (외부 CDN 글꼴 요청 없음)
+    try:
+        with open(os.path.join("static", "style.css"), encoding="utf-8") as f: return f.read()
+    except OSError: return ""
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # ------------------------------------------------------------------
-# 2. 구글 시트 연결 및 데이터 핸들링
+# 2. 구글 시트 연결 및 데이터 핸들링 (공용 데이터 허브 경유)
 # ------------------------------------------------------------------
+# 허브 동기화 주기 (초) - 기준정보 시트는 변경이 드물어 길게 설정
+HUB_INTERVAL = 5
+HUB_INTERVALS = {SHEET_ITEMS: 30, SHEET_EQUIPMENT: 30, SHEET_CHECK_MASTER: 30}
+
 @st.cache_resource
-def get_gs_connection():
-    try:
-        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        if "gcp_service_account" not in st.secrets: return None
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-        return gspread.authorize(credentials)
-    except: return None
+def get_shared_store():
+    # 다중 프로세스 배포 시 SMT_SHARED_STORE(SQLite 경로) 지정 - 없으면 None
+    return shared_store.open_store()
+
+def current_site():
+    # 세션에서 선택한 사이트 샤드 (미선택 또는 세션 밖 스레드는 기본 사이트)
+    try: return st.session_state.get("site") or sheets.shard_of()
+    except Exception: return sheets.shard_of()
+
+def site_books(site):
+    # 잠금/공유 스냅샷 이름 공간 - 기본 사이트 스프레드시트에 있는 시트는 기존 이름 그대로
+    if site == sheets.shard_of(): return None
+    def book_of(sheet_name):
+        book = sheets.spreadsheet_name(sheet_name, site)
+        return None if book == sheets.spreadsheet_name(sheet_name) else book
+    return book_of
 
-def get_worksheet(sheet_name, create_cols=None):
-    client = get_gs_connection()
-    if not client: return None
-    try:
-        sh = client.open(GOOGLE_SHEET_NAME)
-    except:
-        return None
-    try:
-        return sh.worksheet(sheet_name)
-    except gspread.WorksheetNotFound:
-        if create_cols:
-            ws = sh.add_worksheet(title=sheet_name, rows=100, cols=20)
-            ws.append_row(create_cols)
-            return ws
-        return None
+@st.cache_resource
+def _base_locks():
+    return get_shared_store() or shared_store.LocalLocks()
 
-@st.cache_data(ttl=5)
-def load_data(sheet_name, cols=None):
-    try:
-        ws = get_worksheet(sheet_name, create_cols=cols)
-        if not ws: return pd.DataFrame(columns=cols) if cols else pd.DataFrame()
-        
-        df = get_as_dataframe(ws, evaluate_formulas=True)
-        if df.empty: return pd.DataFrame(columns=cols) if cols else pd.DataFrame()
+def get_write_locks(site=None):
+    # 시트 단위 쓰기 잠금 (공유 저장소가 있으면 프로세스 간 잠금) - 사이트별 이름 공간
+    return shared_store.scoped(_base_locks(), site_books(site or current_site()))
 
-        df = df.dropna(how='all').dropna(axis=1, how='all')
-        df = df.fillna("") 
-        
-        if cols:
-            for c in cols: 
-                if c not in df.columns: df[c] = ""
-        return df
-    except Exception as e:
-        return pd.DataFrame(columns=cols) if cols else pd.DataFrame()
+def fetch_locked(sheet_name, cols=None, site=None):
+    # 쓰기(clear 후 재작성) 도중의 빈 시트를 읽지 않도록 쓰기 잠금 안에서 조회
+    with get_write_locks(site).lock(sheet_name):
+        return sheets.fetch_sheet(sheet_name, cols, site=site)
+
+@st.cache_resource
+def _data_hub(site):
+    # 사이트(샤드)별 허브 1개 - 프로세스 안의 모든 세션이 공유
+    fetch = lambda sheet_name, cols=None: fetch_locked(sheet_name, cols, site)
+    store = shared_store.scoped(get_shared_store(), site_books(site))
+    return data_hub.DataHub(fetch, interval=HUB_INTERVAL, intervals=HUB_INTERVALS, store=store).start()
+
+def get_data_hub(site=None):
+    # 프로세스당 하나의 허브가 모든 시트를 동기화하고 세션은 스냅샷만 조회
+    return _data_hub(site or current_site())
+
+def load_data(sheet_name, cols=None, columns=None, date_col=None, start=None, end=None, site=None, span=False):
+    # 세션별 사본 (호출 측에서 자유롭게 수정 가능)
+    #  columns / 기간(date_col, start~end 포함) 지정 시 공유 스냅샷에서 필요한 부분만 복사
+    #  span: 기간이 지난 연도부터면 올해 샤드에서도 해당 연도 스프레드시트 행을 앞에 붙임 (집계용 - 행 위치로 수정/저장하는 화면에는 사용 금지)
+    df = get_data_hub(site).get(sheet_name, cols, copy=False)
+    if date_col and (start is not None or end is not None) and not df.empty:
+        df = df.iloc[paging.query_positions(df, date_col, start, end)]
+    prev = sheets.previous_shards(sheet_name, site or current_site(), start) if span and date_col and start is not None else []
+    if prev:
+        olds = [get_data_hub(p).get(sheet_name, cols, copy=False) for p in prev]
+        olds = [o.iloc[paging.query_positions(o, date_col, start, end)] for o in olds if not o.empty]
+        if olds: df = pd.concat(olds + [df], ignore_index=True)
+    if columns: df = df.reindex(columns=columns, fill_value="")
+    return df.copy()
+
+_spanned = {}  # (샤드, 시트, 컬럼) -> ((작년 버전, 올해 버전), 작년 + 올해 행)
+# 읽기 전용 집계 전용 - 행 위치 계산/스냅샷 저장에는 get_data_hub().get()의 올해 표 사용
+_spanned_lock = threading.Lock()
+
+def load_snapshot(sheet_name, cols=None, site=None):
+    # 공유 스냅샷 원본 - 읽기 전용 (서버 사이드 집계/색인용)
+    #  연초(sheets.ROLLOVER_DAYS)에는 연도 분리 시트에 작년 스프레드시트 행을 앞에 붙인 표 (두 버전이 같으면 재사용)
+    site = site or current_site()
+    prev = sheets.previous_shards(sheet_name, site)
+    if not prev: return get_data_hub(site).get(sheet_name, cols, copy=False)
+    snaps = [get_data_hub(p).snapshot(sheet_name, cols) for p in prev] + [get_data_hub(site).snapshot(sheet_name, cols)]
+    key, version = (site, sheet_name, tuple(cols or ())), tuple(s.digest for s in snaps)
+    with _spanned_lock:
+        hit = _spanned.get(key)
+    if hit and hit[0] == version: return hit[1]
+    df = pd.concat([s.df for s in snaps], ignore_index=True)
+    with _spanned_lock:
+        _spanned[key] = (version, df)
+    return df
+
+def get_data_version(sheet_name, cols=None, site=None, start=None):
+    # 시트 내용 기준 버전 (차트/조회 결과 캐시 키로 사용) - 함께 읽는 지난 연도 스프레드시트 버전 포함
+    #  start: load_data(span=True) 기간 조회의 시작일 (미지정 시 load_snapshot 기준 - 연초에만 작년 포함)
+    site = site or current_site()
+    prev = sheets.previous_shards(sheet_name, site, start)
+    return "".join(get_data_hub(s).snapshot(sheet_name, cols).digest for s in prev + [site])
+
+def clear_cache(sheet_name=None):
+    # 쓰기 직후 해당 시트 스냅샷을 즉시 갱신 (다른 세션에도 바로 반영)
+    hub = get_data_hub()
+    if sheet_name: hub.refresh(sheet_name)
+    else:
+        for name in hub.versions(): hub.refresh(name)
 
-def clear_cache():
-    load_data.clear()
+@st.cache_resource
+def _snapshot_store(site):
+    # 시트 스냅샷 저장소 (SMT_SNAPSHOT_DIR, 기본 snapshots/) - 기본 사이트 외에는 하위 폴더
+    root = os.environ.get(snapshots.SNAPSHOT_DIR_ENV) or snapshots.SNAPSHOT_DIR_DEFAULT
+    return snapshots.open_snapshots(root if site == sheets.shard_of() else os.path.join(root, site.replace("@", "_")))
+
+def get_snapshots(site=None):
+    return _snapshot_store(site or current_site())
+
+@st.cache_resource
+def start_snapshots(site):
+    # 정기 스냅샷 - 프로세스당 사이트별 1개
+    return snapshots.Scheduler(_snapshot_store(site), lambda name, cols: get_data_hub(site).get(name, cols, copy=False))
 
-def save_data(df, sheet_name):
+def snapshot_before_write(sheet_name, reason="pre-write", fresh=False, df=None):
+    # 쓰기 전 현재 시트 내용을 보관 (스냅샷 실패로 저장을 막지는 않음 - 로그 + 관리자 화면에 마지막 오류 표시)
+    #  df: 같은 잠금 안에서 방금 조회한 현재 시트 / fresh: 허브 주기를 기다리지 않고 지금 시트 내용을 조회
+    try:
+        if df is None:
+            hub = get_data_hub()
+            df = hub.refresh(sheet_name).df if fresh else hub.get(sheet_name, copy=False)
+        get_snapshots().take({sheet_name: df}, reason)
+    except Exception as e: get_snapshots().failed(f"{reason}:{sheet_name}", e)
+
+def restore_sheet(sheet_name, at):
+    # 선택 시각 이전 마지막 스냅샷으로 복원 - 현재 내용도 복원 직전 스냅샷으로 남김
+    hit = get_snapshots().as_of(sheet_name, at)
+    if hit is None: return False
     try:
-        ws = get_worksheet(sheet_name)
-        if ws:
-            df = df.fillna("")
-            ws.clear()
-            set_with_dataframe(ws, df)
-            clear_cache()
+        with get_write_locks().lock(sheet_name):
+            snapshot_before_write(sheet_name, "pre-restore", fresh=True)
+            if not sheets.replace_sheet(hit[1], sheet_name, site=current_site()): return False
+            clear_cache(sheet_name)
             return True
-        return False
-    except: return False
+    except shared_store.LockTimeout: return False
 
-def append_data(data_dict, sheet_name):
+def current_user():
+    info = st.session_state.get("user_info") or {}
+    return info.get("id", "")
+
+def save_data(df, sheet_name, base=None):
+    # 키가 정의된 시트는 현재 시트와 행 단위로 비교해 변경분만 기록하고 변경 이력을 남김 (그 외 시트는 전체 재작성)
+    #  base: 같은 잠금 안에서 방금 조회한 현재 시트 (없으면 다시 조회) - 이 내용을 스냅샷하고 변경분 비교 기준으로 사용
     try:
-        ws = get_worksheet(sheet_name)
-        if ws:
-            try: headers = ws.row_values(1)
-            except: headers = list(data_dict.keys())
-            ws.append_row([str(data_dict.get(h, "")) if not pd.isna(data_dict.get(h, "")) else "" for h in headers])
-            clear_cache()
-            return True
+        with get_write_locks().lock(sheet_name):
+            keys = AUDIT_KEYS.get(sheet_name)
+            cols = sheets.SHEET_COLUMNS.get(sheet_name)
+            if keys is not None: cols = cols + [c for c in df.columns if c not in cols]
+            if base is None: base = get_data_hub().refresh(sheet_name, cols).df
+            snapshot_before_write(sheet_name, df=base)
+            if keys is None:
+                ok = sheets.write_sheet(df, sheet_name, site=current_site())
+            else:
+                user, now = current_user(), str(datetime.now())
+                plan = audit.diff(base, df, keys, cols, user, now)
+                ok = not plan["events"] or sheets.apply_changes(sheet_name, plan["cells"], plan["appends"], plan["deletes"], cols, site=current_site())
+                if ok: write_audit(sheet_name, plan["events"], user, now)
+            if ok:
+                clear_cache(sheet_name)
+                return True
         return False
-    except: return False
+    except shared_store.LockTimeout: return False
+
+def write_audit(sheet_name, events, user, now=None):
+    if not events: return
+    append_rows(audit.log_rows(sheet_name, events, user, now or datetime.now()), SHEET_AUDIT_LOG, COLS_AUDIT_LOG)
+
+def append_data(data_dict, sheet_name):
+    if sheets.append_record(data_dict, sheet_name, site=current_site()):
+        clear_cache(sheet_name)
+        return True
+    return False
 
 def append_rows(rows, sheet_name, cols):
+    if sheets.append_records(rows, sheet_name, cols, site=current_site()):
+        clear_cache(sheet_name)
+        return True
+    return False
+
+def run_compaction(dry_run=False):
+    # 점검 결과 중복 저장분 정리 (야간에는 python compaction.py 로 실행)
     try:
-        ws = get_worksheet(sheet_name, create_cols=cols)
-        if ws:
-            safe_rows = [[str(cell) if cell is not None else "" for cell in row] for row in rows]
-            ws.append_rows(safe_rows)
-            clear_cache()
-            return True
-        return False
-    except: return False
+        site = current_site()
+        fetch = lambda sheet_name, cols: sheets.fetch_sheet(sheet_name, cols, site=site)
+        delete = lambda sheet_name, positions: sheets.delete_positions(sheet_name, positions, site=site)
+        rep = compaction.compact(fetch, delete, get_write_locks(site), compaction.cutoff(), dry_run=dry_run)
+    except shared_store.LockTimeout:
+        return {"rows": 0, "removed": 0, "days": 0, "cells": 0, "bytes": 0, "archive": None, "archive_bytes": 0, "error": "다른 작업이 진행 중입니다."}
+    if rep["archive"]: clear_cache(SHEET_CHECK_RESULT)
+    return rep
+
+SNAPSHOT_REASONS = {"periodic": "정기", "pre-write": "저장 전", "pre-restore": "복원 전", "manual": "수동"}
+
+# 기준정보 시트별 행 식별 키 (저장 시 키 기준으로 변경분 계산)
+MASTER_KEYS = {SHEET_ITEMS: ["품목코드"], SHEET_EQUIPMENT: ["id"], SHEET_CHECK_MASTER: ["line", "equip_id", "item_name"], SHEET_LINE_EQUIPMENT: ["구분", "설비ID"], SHEET_PLAN: ["날짜", "구분", "품목코드"]}
+# save_data 변경 추적 키 (생산/정비 이력은 입력시간이 행 식별자)
+AUDIT_KEYS = {SHEET_RECORDS: ["입력시간"], SHEET_MAINTENANCE: ["입력시간"], SHEET_INVENTORY: ["품목코드"], **MASTER_KEYS}
+
+def save_master_changes(sheet_name, cols, base_digest, base, edited, force=False):
+    # 편집 시작 버전 기준 낙관적 저장 - 반환: (상태, 상세)
+    #  saved / nochange / stale(비교표) / error
+    keys = MASTER_KEYS[sheet_name]
+    changes = master_edit.compute_changes(base, edited, keys, cols)
+    if master_edit.is_empty(changes): return "nochange", changes
+    try:
+        with get_write_locks().lock(sheet_name):
+            current = get_data_hub().refresh(sheet_name, cols)
+            if current.digest != base_digest and not force:
+                return "stale", master_edit.merge_view(changes, base, current.df, keys, cols)
+            cells, appends, deletes = master_edit.plan_writes(changes, current.df, keys, cols)
+            if not sheets.apply_changes(sheet_name, cells, appends, deletes, cols, site=current_site()): return "error", changes
+            write_audit(sheet_name, audit.change_events(changes, current.df, keys, cols), current_user())
+            clear_cache(sheet_name)
+            return "saved", changes
+    except shared_store.LockTimeout: return "error", changes
 
 def update_inventory(code, name, change, reason, user):
-    df = load_data(SHEET_INVENTORY, COLS_INVENTORY)
-    if not df.empty:
-        df['현재고'] = pd.to_numeric(df['현재고'], errors='coerce').fillna(0).astype(int)
-    
-    if not df.empty and code in df['품목코드'].values:
-        idx = df[df['품목코드'] == code].index[0]
-        df.at[idx, '현재고'] = df.at[idx, '현재고'] + change
-    else:
-        new_row = pd.DataFrame([{"품목코드": code, "제품명": name, "현재고": change}])
-        df = pd.concat([df, new_row], ignore_index=True)
-    
-    df = df[df['현재고'] != 0]
-    
-    save_data(df, SHEET_INVENTORY)
-    hist = {"날짜": datetime.now().strftime("%Y-%m-%d"), "품목코드": code, "구분": "입고" if change > 0 else "출고", "수량": change, "비고": reason, "작성자": user, "입력시간": str(datetime.now())}
-    append_data(hist, SHEET_INV_HISTORY)
+    apply_inventory_deltas([(code, name, change)], reason, user)
+
+def apply_inventory_deltas(deltas, reason, user):
+    # 여러 품목의 재고 증감을 읽기-수정-쓰기 1회로 반영 - deltas: [(품목코드, 제품명, 증감)]
+    # 읽기-수정-쓰기 전체를 잠금 안에서 수행 (동시 저장 시 재고 유실 방지)
+    if not deltas: return
+    with get_write_locks().lock(SHEET_INVENTORY):
+        base = get_data_hub().refresh(SHEET_INVENTORY, COLS_INVENTORY).df
+        df, change = importer.apply_deltas(base, deltas)
+        save_data(df, SHEET_INVENTORY, base=base)
+    append_rows(importer.history_rows(change, reason, user, datetime.now()), SHEET_INV_HISTORY, COLS_INV_HISTORY)
 
 def safe_float(value, default_val=None):
     try:
@@ -211,10 +324,983 @@ def get_daily_check_master_data():
     df = load_data(SHEET_CHECK_MASTER, COLS_CHECK_MASTER)
     return df
 
+@st.cache_data(max_entries=32)
+def get_maintenance_analytics(start, end, freq, version):
+    # 정비 이력은 서버에서 설비/기간 단위로 집계하고, 화면에는 집계 결과만 전달
+    df = analytics.prepare_maintenance(load_snapshot(SHEET_MAINTENANCE, COLS_MAINTENANCE))
+    df = analytics.filter_period(df, start, end)
+    return {
+        "summary": analytics.maintenance_summary(df),
+        "by_type": analytics.type_counts(df),
+        "by_equip": analytics.reliability(df, start, end),
+        "trend": analytics.maintenance_rollup(df, freq),
+    }
+
+@st.cache_data(max_entries=64)
+def get_production_share(start, end, version):
+    # version 인자는 캐시 키 용도 (데이터 변경 시 재계산)
+    df = analytics.filter_period(analytics.prepare_production(load_snapshot(SHEET_RECORDS, COLS_RECORDS)), start, end)
+    if df.empty: return pd.DataFrame(columns=['구분', '수량'])
+    return charts.cap_categories(df, '구분', '수량')
+
+@st.cache_data(max_entries=64)
+def build_production_trend_spec(start, end, version, mark="bar"):
+    # 기간 내 (날짜, 구분) 집계 -> 포인트 예산 초과 시 주/월 단위로 자동 버킷팅
+    alt = load_altair()
+    if alt is None: return None
+    df = analytics.filter_period(analytics.prepare_production(load_snapshot(SHEET_RECORDS, COLS_RECORDS)), start, end)
+    if df.empty: return None
+    df = charts.cap_series_groups(df[['날짜', '구분', '수량']], '구분', '수량')
+    agg, unit, fmt = charts.bucket_time(df, '날짜', '수량', ['구분'])
+    x_title = "날짜" if unit == "일" else f"날짜 ({unit} 단위)"
+    tooltip = [alt.Tooltip('날짜:T', format="%Y-%m-%d"), '구분', alt.Tooltip('수량:Q', format=",.0f")]
+    if mark == "line":
+        # [수정] 생산량 세로쓰기 타이틀 적용
+        chart = alt.Chart(agg).mark_line(point=True).encode(
+            x=alt.X('날짜:T', axis=alt.Axis(format=fmt, labelAngle=0, title=x_title)),
+            y=alt.Y('수량:Q', axis=alt.Axis(labelAngle=0, title="생\n산\n량", titleAngle=0, titlePadding=20, titleFontWeight="bold", titleFontSize=14)),
+            color=alt.Color('구분', legend=alt.Legend(title="공정 구분")),
+            tooltip=tooltip
+        ).properties(height=300)
+    else:
+        chart = alt.Chart(agg).mark_bar().encode(
+            x=alt.X('날짜:T', axis=alt.Axis(format=fmt, labelAngle=0, title=x_title)),
+            y=alt.Y('수량:Q', axis=alt.Axis(title="생산량")),
+            color=alt.Color('구분', legend=alt.Legend(title="공정", orient="top")),
+            tooltip=tooltip
+        ).properties(height=350)
+    return chart.to_dict()
+
+@st.cache_data(max_entries=64)
+def build_production_share_spec(start, end, version, donut=False):
+    alt = load_altair()
+    if alt is None: return None
+    pie_data = get_production_share(start, end, version)
+    if pie_data.empty: return None
+    if donut:
+        # 비율 및 라벨 계산
+        total_q = pie_data['수량'].sum()
+        pie_data = pie_data.assign(비율=(pie_data['수량'] / total_q * 100).round(1))
+        # [수정] 가독성을 위해 글씨가 잘리지 않도록 포맷 변경
+        pie_data['Label'] = pie_data['수량'].map(lambda v: f"{v:,.0f}") + " (" + pie_data['비율'].astype(str) + "%)"
+        # [수정] 글씨 겹침 방지: threshold 설정 (비중이 3% 이상인 경우만 라벨 표시)
+        pie_data['DisplayLabel'] = pie_data['Label'].where(pie_data['비율'] > 3, "")
+        base = alt.Chart(pie_data).encode(
+            theta=alt.Theta("수량", stack=True),
+            color=alt.Color("구분", legend=alt.Legend(title="공정 구분", orient="bottom"))
+        )
+        # 도넛 차트 (크기 확대) + 텍스트 라벨 (도넛 바깥쪽에 표시하여 가독성 확보)
+        pie = base.mark_arc(outerRadius=120, innerRadius=60).encode(tooltip=["구분", "수량", "비율"])
+        text = base.mark_text(radius=140).encode(text="DisplayLabel", order=alt.Order("구분"), color=alt.value("black"))
+        return (pie + text).properties(height=400).to_dict()
+    base = alt.Chart(pie_data).encode(
+        theta=alt.Theta("수량", stack=True),
+        color=alt.Color("구분", legend=None)
+    )
+    pie = base.mark_arc(outerRadius=120, innerRadius=0).encode(tooltip=["구분", "수량"])
+    text = base.mark_text(radius=140).encode(text=alt.Text("수량", format=",.0f"), order=alt.Order("구분"), color=alt.value("black"))
+    return (pie + text).to_dict()
+
+# ------------------------------------------------------------------
+# 대시보드 패널 (라이브 모드: 패널별 소스 데이터 버전만 주기 확인, 바뀐 경우에만 다시 그림)
+# ------------------------------------------------------------------
+LIVE_INTERVAL = 1  # 라이브 모드 버전 확인 주기 (초)
+PACE_REFRESH = "10min"  # 교대 진행률 패널은 데이터 변경이 없어도 이 간격으로 갱신 (경과 시간 반영)
+
+@st.cache_data(max_entries=16)
+def get_production_kpis(today_str, version):
+    today = pd.Timestamp(today_str)
+    df = analytics.prepare_production(load_data(SHEET_RECORDS, COLS_RECORDS, columns=["날짜", "구분", "수량"], date_col="날짜", start=today - pd.Timedelta(days=1), end=today, span=True))
+    by_day = df.groupby('날짜')['수량'].sum()
+    return float(by_day.get(today, 0)), float(by_day.get(today - pd.Timedelta(days=1), 0))
+
+# 일일 생산 보고서에 필요한 컬럼
+REPORT_COLS = ["날짜", "구분", "품목코드", "제품명", "수량", "작성자"]
+
+# 대시보드 점검 패널에 필요한 컬럼만 복사
+CHECK_TODAY_COLS = ["date", "line", "equip_id", "item_name", "value", "ox", "checker", "timestamp", "비고"]
+
+@st.cache_data(max_entries=16)
+def get_check_today(today_str, version):
+    # 금일 점검 결과 (항목별 최신 1건)
+    df = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, columns=CHECK_TODAY_COLS, date_col="date", start=today_str, end=today_str)
+    if df.empty: return pd.DataFrame(columns=CHECK_TODAY_COLS)
+    df_today = df[df['date'].astype(str).str.split().str[0] == today_str].copy()
+    if df_today.empty: return df_today
+    df_today['timestamp'] = pd.to_datetime(df_today['timestamp'], errors='coerce')
+    return df_today.sort_values('timestamp').drop_duplicates(['line', 'equip_id', 'item_name'], keep='last')
+
+@st.cache_data(max_entries=16)
+def get_maintenance_today(today_str, version):
+    df = load_snapshot(SHEET_MAINTENANCE, COLS_MAINTENANCE)
+    if df.empty: return 0, None
+    recent = df.sort_values("날짜", ascending=False).head(5)[['날짜', '설비명', '작업구분', '작업내용']]
+    return int((df['날짜'].astype(str) == today_str).sum()), recent
+
+def render_dashboard_kpis():
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    # 1. 생산량 KPI
+    prod_today_val, prod_yesterday_val = get_production_kpis(today_str, get_data_version(SHEET_RECORDS, COLS_RECORDS))
+    delta_prod = prod_today_val - prod_yesterday_val
+    # 2. 품질 KPI
+    df_today_unique = get_check_today(today_str, get_data_version(SHEET_CHECK_RESULT, COLS_CHECK_RESULT))
+    check_today_cnt = len(df_today_unique)
+    ng_today_cnt = int((df_today_unique['ox'] == 'NG').sum()) if check_today_cnt else 0
+    ng_rate = (ng_today_cnt / check_today_cnt) * 100 if check_today_cnt > 0 else 0.0
+    # 3. 보전 KPI
+    maint_today_cnt, _ = get_maintenance_today(today_str, get_data_version(SHEET_MAINTENANCE, COLS_MAINTENANCE))
+
+    # KPI 카드 재배치 및 통합
+    col1, col2, col3 = st.columns(3)
+    col1.metric("오늘 생산량", f"{prod_today_val:,.0f} EA", f"{delta_prod:,.0f} (전일비)")
+    col2.metric("금일 설비 정비", f"{maint_today_cnt} 건", "특이사항 없음" if maint_today_cnt == 0 else "확인 필요", delta_color="inverse")
+    col3.metric("일일점검 (완료/NG)", f"{check_today_cnt} 건 / {ng_today_cnt} 건", f"불량률: {ng_rate:.1f}%", delta_color="inverse")
+
+def render_dashboard_charts():
+    today = datetime.now()
+    # [수정] 이번 달 1일 날짜 구하기 (월간 집계용)
+    this_month_start = today.replace(day=1)
+    prod_version = get_data_version(SHEET_RECORDS, COLS_RECORDS)
+    has_prod = not load_snapshot(SHEET_RECORDS, COLS_RECORDS).empty
+
+    # 차트 및 상세 분석 섹션
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        st.subheader("📈 주간 생산 추이 & 유형")
+        if has_prod and load_altair():
+            # 집계/스펙 생성은 서버에서 데이터 버전 단위로 캐시
+            spec = build_production_trend_spec((today - timedelta(days=7)).date(), today.date(), prod_version, mark="line")
+            if spec: st.vega_lite_chart(spec, use_container_width=True)
+            else: st.info("최근 7일간 생산 데이터가 없습니다.")
+        else:
+            st.info("생산 데이터가 없습니다.")
+
+    with c2:
+        # [수정] 타이틀 변경
+        st.subheader("🏭 월간 생산 품목 비율")
+        if has_prod:
+            spec = build_production_share_spec(this_month_start.date(), today.date(), prod_version, donut=True)
+            if spec: st.vega_lite_chart(spec, use_container_width=True)
+            else: st.info("이번 달 생산 실적이 없습니다.")
+        else:
+            st.info("데이터 없음")
+
+def render_dashboard_ng():
+    st.subheader("🚨 실시간 NG 현황 (Today)")
+    df_today_unique = get_check_today(datetime.now().strftime("%Y-%m-%d"), get_data_version(SHEET_CHECK_RESULT, COLS_CHECK_RESULT))
+    ng_df = df_today_unique[df_today_unique['ox'] == 'NG']
+    if not ng_df.empty:
+        st.dataframe(ng_df[['line', 'equip_id', 'item_name', 'value', 'checker', '비고']], hide_index=True, use_container_width=True)
+    else:
+        st.success("🎉 현재까지 발견된 NG 항목이 없습니다. (All Green)")
+
+def render_dashboard_oee():
+    st.subheader("⚙️ 금일 라인별 OEE")
+    today = datetime.now().strftime("%Y-%m-%d")
+    res = get_oee_analytics(today, today, None, get_oee_version())
+    lines = res["by_line"]
+    if lines.empty:
+        st.info("오늘 집계된 생산/비가동 실적이 없습니다.")
+        return
+    cols = st.columns(min(len(lines), 4))
+    for i, r in enumerate(lines.head(4).to_dict("records")):
+        cols[i].metric(r["구분"], "-" if pd.isna(r["OEE"]) else f"{r['OEE']:.1f}%",
+                       f"가동 {r['가동률']:.1f}% · 비가동 {r['비가동']:,.0f}분", delta_color="off")
+    if len(lines) > 4:
+        st.dataframe(lines[["구분", "가동률", "성능", "OEE", "비가동", "생산수량"]], hide_index=True, use_container_width=True)
+
+def render_dashboard_plan():
+    st.subheader("🎯 금일 계획 달성")
+    tracker = get_attainment()
+    now = pd.Timestamp.now()
+    lines = tracker.by_line(now)
+    if lines.empty:
+        st.info("오늘 등록된 생산 계획/실적이 없습니다.")
+        return
+    cols = st.columns(min(len(lines), 4))
+    for i, r in enumerate(lines.head(4).to_dict("records")):
+        cols[i].metric(r["구분"], "-" if pd.isna(r["달성률"]) else f"{r['달성률']:.1f}%",
+                       f"{r['실적']:,.0f} / {r['계획']:,.0f} EA", delta_color="off")
+    if len(lines) > 4:
+        st.dataframe(lines, hide_index=True, use_container_width=True)
+    p = tracker.pace(now)
+    if not p["lines"].empty:
+        st.markdown(f"##### {p['shift']} 교대 진행 ({p['start']:%H:%M}~{p['end']:%H:%M}, 경과 {p['elapsed']:.1f}시간)")
+        st.dataframe(p["lines"], hide_index=True, use_container_width=True,
+                     column_config={"예상 달성률": st.column_config.NumberColumn(format="%.1f%%")})
+
+def site_summary(site, day):
+    # 사이트 1곳의 일간 요약 (해당 사이트 허브 스냅샷/집계 기준) - 반환: (요약 dict, OEE 교대 행)
+    day = pd.Timestamp(day).normalize()
+    prod = analytics.prepare_production(load_data(SHEET_RECORDS, COLS_RECORDS, columns=["날짜", "구분", "수량"], date_col="날짜",
+                                                  start=day - pd.Timedelta(days=1), end=day, site=site, span=True))
+    by_day = prod.groupby("날짜")["수량"].sum()
+    maint = analytics.prepare_maintenance(load_data(SHEET_MAINTENANCE, COLS_MAINTENANCE, date_col="날짜", start=day, end=day, site=site, span=True))
+    done, total, ng = get_check_calendar(site).progress(day)
+    row = {"생산량": float(by_day.get(day, 0)), "전일 생산량": float(by_day.get(day - pd.Timedelta(days=1), 0)),
+           "점검 완료": done, "점검 전체": total, "NG": ng, "정비": len(maint), "비가동(분)": float(maint["비가동시간"].sum()) if len(maint) else 0.0}
+    return row, get_oee_engine(site).shifts(day, day)
+
+@st.cache_data(max_entries=8)
+def group_summary(day, version):
+    # 전체 사이트를 병렬 조회 후 합산 - 반환: (사이트별 표 + 합계 행, 조회 실패 {사이트: 오류})
+    #  version: sites_version() (캐시 키 용도 - 어느 사이트든 데이터가 바뀌면 재계산)
+    conf = sites.all_sites(sheets.GOOGLE_SHEET_NAME)
+    for site in conf:
+        # 사이트별 허브/집계 객체는 세션 스레드에서 먼저 생성 (병렬 작업 스레드는 조회/동기화만)
+        _data_hub(site); _oee_holder(site); _calendar_holder(site)
+        # 연초/전일이 작년인 경우 함께 읽는 작년 샤드 허브
+        yday = pd.Timestamp(day) - pd.Timedelta(days=1)
+        for prev in {p for n in sheets.YEARLY_SHEETS for start in (yday, None) for p in sheets.previous_shards(n, site, start)}: _data_hub(prev)
+    results = sites.fan_out(lambda site: site_summary(site, day), conf)
+    rows, shifts, errors = [], [], {}
+    for site, (res, err) in results.items():
+        if err: errors[conf[site]["label"]] = err; continue
+        row, t = res
+        rows.append({"사이트": conf[site]["label"], **row})
+        shifts.append(t.assign(사이트=conf[site]["label"]))
+    table = pd.DataFrame(rows)
+    if table.empty: return table, errors
+    total = {c: table[c].sum() for c in table.columns if c != "사이트"}
+    table = pd.concat([table, pd.DataFrame([{"사이트": "합계", **total}])], ignore_index=True)
+    t = pd.concat(shifts) if shifts else pd.DataFrame()
+    rates = pd.concat([oee.rates_frame(t, ["사이트"]), oee.rates_frame(t.assign(사이트="합계"), ["사이트"])]) if not t.empty else pd.DataFrame(columns=["사이트", "가동률", "OEE"])
+    table = table.merge(rates[["사이트", "가동률", "OEE"]], on="사이트", how="left")
+    table["점검률"] = (table["점검 완료"] / table["점검 전체"].where(table["점검 전체"] > 0) * 100).round(1)
+    return table, errors
+
+def render_dashboard_sites():
+    # 사이트가 여러 곳일 때만 표시 (사이트별 허브를 병렬 조회해 합산)
+    st.subheader("🌐 사이트별 현황 (Today)")
+    t0 = time.perf_counter()
+    table, errors = group_summary(datetime.now().strftime("%Y-%m-%d"), sites_version())
+    metrics.observe("group_summary_ms", (time.perf_counter() - t0) * 1000)
+    for label, err in errors.items(): st.warning(f"{label}: 조회 실패 ({err})")
+    if table.empty:
+        st.info("조회된 사이트가 없습니다."); return
+    cols = ["사이트", "생산량", "전일 생산량", "점검 완료", "점검 전체", "점검률", "NG", "정비", "비가동(분)", "가동률", "OEE"]
+    st.dataframe(table[cols], hide_index=True, use_container_width=True,
+                 column_config={c: st.column_config.NumberColumn(format="%.1f%%") for c in ("점검률", "가동률", "OEE")})
+    st.caption("합계 행의 가동률/OEE는 사이트별 교대 시간을 합산해 다시 계산")
+
+def render_dashboard_maintenance():
+    st.subheader("🛠 최근 설비 정비 이력 (Last 5)")
+    _, recent_maint = get_maintenance_today(datetime.now().strftime("%Y-%m-%d"), get_data_version(SHEET_MAINTENANCE, COLS_MAINTENANCE))
+    if recent_maint is not None:
+        st.dataframe(recent_maint, hide_index=True, use_container_width=True)
+    else:
+        st.info("정비 이력이 없습니다.")
+
+def _today_versions(*sheet_cols):
+    # (오늘 날짜, 시트 버전...) - 날짜가 바뀌면 금일 기준 패널도 갱신
+    return (datetime.now().strftime("%Y-%m-%d"),) + tuple(get_data_version(s, c) for s, c in sheet_cols)
+
+def sites_version():
+    # 전체 사이트 대시보드 소스 버전 (사이트별 생산/정비/라인 매핑/점검 결과/점검 기준)
+    return tuple((site, get_oee_version(site), get_data_version(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, site), get_data_version(SHEET_CHECK_MASTER, COLS_CHECK_MASTER, site))
+                 for site in sites.all_sites(sheets.GOOGLE_SHEET_NAME))
+
+# 패널: 키 -> (그리기 함수, 소스 버전 함수)
+LIVE_PANELS = {
+    "kpis": (render_dashboard_kpis, lambda: _today_versions((SHEET_RECORDS, COLS_RECORDS), (SHEET_CHECK_RESULT, COLS_CHECK_RESULT), (SHEET_MAINTENANCE, COLS_MAINTENANCE))),
+    "charts": (render_dashboard_charts, lambda: _today_versions((SHEET_RECORDS, COLS_RECORDS))),
+    "ng": (render_dashboard_ng, lambda: _today_versions((SHEET_CHECK_RESULT, COLS_CHECK_RESULT))),
+    "maintenance": (render_dashboard_maintenance, lambda: _today_versions((SHEET_MAINTENANCE, COLS_MAINTENANCE))),
+    "oee": (render_dashboard_oee, lambda: _today_versions() + (get_oee_version(),)),
+    "plan": (render_dashboard_plan, lambda: (pd.Timestamp.now().floor(PACE_REFRESH),) + _today_versions((SHEET_RECORDS, COLS_RECORDS), (SHEET_PLAN, COLS_PLAN))),
+    "sites": (render_dashboard_sites, lambda: _today_versions() + (sites_version(),)),
+}
+
+def live_panel(key):
+    # 그리기 직전의 소스 버전을 기록 (라이브 모드 비교 기준)
+    render, version = LIVE_PANELS[key]
+    st.session_state.setdefault("live_versions", {})[key] = version()
+    render()
+
+def live_poll(keys):
+    # 라이브 모드 확인 작업 - 화면에는 아무것도 보내지 않고 버전만 비교
+    #  fragment 재실행은 해당 fragment 내용을 모두 다시 보내므로 패널은 주기 실행하지 않고,
+    #  마지막으로 그린 버전과 다른 패널이 있을 때만 화면을 다시 그림 (변경 없는 패널은 캐시 조회만)
+    shown = st.session_state.get("live_versions", {})
+    if any(LIVE_PANELS[k][1]() != shown.get(k) for k in keys): st.rerun(scope="app")
+
+@st.cache_data(max_entries=8)
+def get_maintenance_date_bounds(version):
+    df = analytics.prepare_maintenance(load_snapshot(SHEET_MAINTENANCE, COLS_MAINTENANCE))
+    if df.empty: return None
+    return df["날짜"].min().date(), df["날짜"].max().date()
+
+@st.cache_data(max_entries=32)
+def get_query_positions(sheet_name, cols, version, date_col=None, start=None, end=None, equals=(), text_cols=(), text="", sort_col=None, ascending=False):
+    # 필터/정렬 결과는 행 위치만 캐시 (페이지 이동 시 재계산 없음)
+    #  위치는 load_data()와 같은 올해 표 기준 (연초 작년 행을 붙인 load_snapshot 표를 쓰면 위치가 어긋남)
+    df = get_data_hub().get(sheet_name, cols, copy=False)
+    return paging.query_positions(df, date_col, start, end, dict(equals), list(text_cols), text, sort_col, ascending)
+
+def render_paged_table(df, key, positions=None, columns=None, default_size=50):
+    # 전체 프레임 대신 현재 페이지 행만 브라우저로 전달
+    if positions is None: positions = list(range(len(df)))
+    total = len(positions)
+    p1, p2, p3 = st.columns([1, 1, 3])
+    size = p1.selectbox("페이지 크기", paging.PAGE_SIZES, index=paging.PAGE_SIZES.index(default_size) if default_size in paging.PAGE_SIZES else 0, key=f"{key}_size")
+    pages = max(1, -(-total // size))
+    if st.session_state.get(f"{key}_page", 1) > pages: st.session_state[f"{key}_page"] = pages
+    page = p2.number_input("페이지", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    start, stop, pages, page = paging.page_slice(total, page, size)
+    p3.write("")
+    p3.caption(f"총 {total:,}건 · {page}/{pages} 페이지")
+    view = df.iloc[positions[start:stop]]
+    if columns: view = view[columns]
+    st.dataframe(view, use_container_width=True, hide_index=True)
+
+def render_export_buttons(df, positions, file_stem, key):
+    # 다운로드 클릭 시점에만 청크 단위로 파일 생성
+    e1, e2, _ = st.columns([1, 1, 3])
+    e1.download_button("⬇ CSV", data=lambda: paging.export_csv(df, positions), file_name=f"{file_stem}.csv", mime="text/csv", key=f"{key}_csv", on_click="ignore")
+    e2.download_button("⬇ XLSX", data=lambda: paging.export_xlsx(df, positions, sheet_name=file_stem), file_name=f"{file_stem}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key=f"{key}_xlsx", on_click="ignore")
+
+@st.cache_resource
+def _item_index_holder(site):
+    return {"index": None, "lock": threading.Lock()}
+
+def get_item_index():
+    # 프로세스 공용 품목 색인 (사이트별) - item_codes 시트 버전이 바뀔 때만 재생성
+    site = current_site()
+    version = get_data_version(SHEET_ITEMS, COLS_ITEMS, site)
+    holder = _item_index_holder(site)
+    ix = holder["index"]
+    if ix is None or ix.version != version:
+        with holder["lock"]:
+            ix = holder["index"]
+            if ix is None or ix.version != version:
+                ix = holder["index"] = item_index.ItemIndex(load_snapshot(SHEET_ITEMS, COLS_ITEMS, site), version)
+    return ix
+
+@st.cache_resource
+def _quality_holder(site):
+    return {"history": quality.QualityHistory(), "lock": threading.Lock()}
+
+def get_quality_history(site=None):
+    # 프로세스 공용 점검 이력 (사이트별) - 점검 결과 시트 버전이 바뀌면 추가분만 반영
+    site = site or current_site()
+    version = get_data_version(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, site)
+    holder = _quality_holder(site)
+    hist = holder["history"]
+    if hist.version != version:
+        with holder["lock"]:
+            if hist.version != version:
+                hist.sync(load_snapshot(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, site), version)
+    return hist
+
+@st.cache_resource
+def _oee_holder(site):
+    return {"engine": oee.OeeEngine(), "lock": threading.Lock()}
+
+def get_oee_version(site=None):
+    return tuple(get_data_version(s, c, site) for s, c in ((SHEET_RECORDS, COLS_RECORDS), (SHEET_MAINTENANCE, COLS_MAINTENANCE), (SHEET_LINE_EQUIPMENT, COLS_LINE_EQUIPMENT)))
+
+def get_oee_engine(site=None):
+    # 프로세스 공용 OEE 집계 (사이트별) - 생산/정비/라인 매핑 시트 버전이 바뀌면 추가분만 반영
+    site = site or current_site()
+    version = get_oee_version(site)
+    holder = _oee_holder(site)
+    engine = holder["engine"]
+    if engine.version != version:
+        with holder["lock"]:
+            if engine.version != version:
+                engine.sync(load_snapshot(SHEET_RECORDS, COLS_RECORDS, site), load_snapshot(SHEET_MAINTENANCE, COLS_MAINTENANCE, site),
+                            load_snapshot(SHEET_LINE_EQUIPMENT, COLS_LINE_EQUIPMENT, site), version)
+    return engine
+
+@st.cache_data(max_entries=32)
+def get_oee_analytics(start, end, line, version):
+    engine = get_oee_engine()
+    return {"summary": engine.summary(start, end, line), "by_line": engine.by_line(start, end),
+            "by_shift": engine.by_shift(start, end, line), "trend": engine.trend(start, end, line)}
+
+@st.cache_data(max_entries=32)
+def build_oee_trend_spec(start, end, line, version):
+    # 일자별 라인 OEE(목표 UPH 없으면 가동률) 추이 - 기간이 길면 주/월 단위로 합산 후 비율 재계산
+    alt = load_altair()
+    if alt is None: return None
+    trend = get_oee_analytics(start, end, line, version)["trend"]
+    if trend.empty: return None
+    agg, unit, fmt = charts.bucket_time(trend, "날짜", ["계획", "가동", "생산수량", "목표수량"], ["구분"])
+    agg = oee.ratios(agg)
+    metric = "OEE" if agg["OEE"].notna().any() else "가동률"
+    x_title = "날짜" if unit == "일" else f"날짜 ({unit} 단위)"
+    return alt.Chart(agg.dropna(subset=[metric])).mark_line(point=True).encode(
+        x=alt.X("날짜:T", axis=alt.Axis(format=fmt, labelAngle=0, title=x_title)),
+        y=alt.Y(f"{metric}:Q", axis=alt.Axis(title=f"{metric}(%)")),
+        color=alt.Color("구분:N", legend=alt.Legend(title="라인", orient="top")),
+        tooltip=[alt.Tooltip("날짜:T", format="%Y-%m-%d"), "구분", alt.Tooltip("가동률:Q", format=".1f"), alt.Tooltip("성능:Q", format=".1f"), alt.Tooltip("OEE:Q", format=".1f")]
+    ).properties(height=300).to_dict()
+
+def render_oee_analysis():
+    engine = get_oee_engine()
+    version = engine.version
+    if engine.table.empty:
+        st.info("집계할 생산/비가동 실적이 없습니다."); return
+    lo, hi = engine.table["날짜"].min().date(), engine.table["날짜"].max().date()
+    c1, c2 = st.columns([2, 1])
+    period = c1.date_input("조회 기간", value=(max(lo, hi - timedelta(days=29)), hi), min_value=lo, max_value=hi, key="oee_range")
+    lines = sorted(engine.table["구분"].unique())
+    line = c2.selectbox("라인", ["전체"] + lines, key="oee_line")
+    start, end = (period[0], period[-1]) if isinstance(period, (tuple, list)) and len(period) > 0 else (lo, hi)
+    line = None if line == "전체" else line
+    res = get_oee_analytics(start, end, line, version)
+    s = res["summary"]
+    pct = lambda v: "-" if v is None else f"{v:.1f}%"
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("OEE", pct(s["oee"]))
+    k2.metric("가동률", pct(s["availability"]), f"비가동 {s['down']:,.0f}분 / 계획 {s['plan']:,.0f}분", delta_color="off")
+    k3.metric("성능", pct(s["performance"]))
+    k4.metric("생산 수량", f"{s['output']:,.0f} EA")
+    if not engine.rates: st.caption("⚠️ 라인-설비 매핑/목표 UPH가 없습니다. '기준정보관리 > 🔗 라인-설비'에서 등록하면 성능/OEE가 계산됩니다.")
+    spec = build_oee_trend_spec(start, end, line, version)
+    if spec is not None: st.vega_lite_chart(spec, use_container_width=True)
+    st.markdown("##### 라인별")
+    st.dataframe(res["by_line"], hide_index=True, use_container_width=True)
+    st.markdown("##### 교대별")
+    st.dataframe(res["by_shift"], hide_index=True, use_container_width=True)
+    shifts = " / ".join(f"{n} {a:02d}:00~{b % 24:02d}:00" for n, a, b in oee.SHIFTS)
+    st.caption(f"교대: {shifts} · 계획 = 생산 또는 비가동이 있는 교대 시간 · 라인 내 설비 비가동은 겹치는 시간을 한 번만 계산 · 품질은 100% 가정")
+
+@st.cache_resource
+def _calendar_holder(site):
+    return {"calendar": check_calendar.CheckCalendar(), "lock": threading.Lock()}
+
+def get_check_calendar(site=None):
+    # 프로세스 공용 점검 달력 (사이트별) - 결과 시트에 추가된 날짜만 반영, 점검 기준 변경 시 재구성
+    site = site or current_site()
+    version = (get_data_version(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, site), get_data_version(SHEET_CHECK_MASTER, COLS_CHECK_MASTER, site))
+    holder = _calendar_holder(site)
+    cal = holder["calendar"]
+    if cal.version != version:
+        with holder["lock"]:
+            if cal.version != version:
+                cal.sync(load_snapshot(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, site), load_snapshot(SHEET_CHECK_MASTER, COLS_CHECK_MASTER, site), version)
+    return cal
+
+@st.cache_resource
+def _attainment_holder(site):
+    return {"tracker": attainment.AttainmentTracker(), "lock": threading.Lock()}
+
+def get_attainment(site=None):
+    # 프로세스 공용 계획 대비 실적 (사이트별) - 실적 시트에 추가된 행만 카운터에 반영, 계획 시트 변경 시 계획만 다시 읽음
+    site = site or current_site()
+    version = (get_data_version(SHEET_RECORDS, COLS_RECORDS, site), get_data_version(SHEET_PLAN, COLS_PLAN, site))
+    holder = _attainment_holder(site)
+    tracker = holder["tracker"]
+    if tracker.version != version:
+        with holder["lock"]:
+            if tracker.version != version:
+                tracker.sync(load_snapshot(SHEET_RECORDS, COLS_RECORDS, site), load_snapshot(SHEET_PLAN, COLS_PLAN, site), version)
+    return tracker
+
+@st.cache_data(max_entries=32)
+def build_pace_spec(hourly, version):
+    # 현재 교대 시간대별 누계 실적(선) vs 목표 누계(점선)
+    alt = load_altair()
+    if alt is None or hourly.empty: return None
+    df = hourly.melt(id_vars=["시각", "구분"], value_vars=["누계", "목표 누계"], var_name="항목", value_name="수량")
+    return alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X("시각:T", axis=alt.Axis(format="%H:%M", labelAngle=0, title="시각")),
+        y=alt.Y("수량:Q", axis=alt.Axis(title="누계 수량")),
+        color=alt.Color("구분:N", legend=alt.Legend(title="라인", orient="top")),
+        strokeDash=alt.StrokeDash("항목:N", legend=alt.Legend(title="", orient="top")),
+        tooltip=[alt.Tooltip("시각:T", format="%H:%M"), "구분", "항목", alt.Tooltip("수량:Q", format=",.0f")]
+    ).properties(height=280).to_dict()
+
+def render_attainment():
+    tracker = get_attainment()
+    c1, c2 = st.columns([1, 2])
+    day = c1.date_input("조회 날짜", datetime.now(), key="plan_day")
+    lines = tracker.by_line(day)
+    if lines.empty:
+        st.info("해당 날짜의 생산 계획/실적이 없습니다.")
+    else:
+        cols = st.columns(min(len(lines), 4))
+        for i, r in enumerate(lines.head(4).to_dict("records")):
+            cols[i].metric(r["구분"], "-" if pd.isna(r["달성률"]) else f"{r['달성률']:.1f}%", f"{r['차이']:+,.0f} EA", delta_color="normal")
+        pct = {"달성률": st.column_config.NumberColumn(format="%.1f%%")}
+        st.markdown("##### 라인별")
+        st.dataframe(lines, hide_index=True, use_container_width=True, column_config=pct)
+        st.markdown("##### 품목별")
+        st.dataframe(tracker.items(day), hide_index=True, use_container_width=True, column_config=pct)
+
+    p = tracker.pace(pd.Timestamp.now())
+    st.markdown(f"##### ⏱ 현재 교대 진행 - {p['day']:%Y-%m-%d} {p['shift']} ({p['start']:%H:%M}~{p['end']:%H:%M}, 경과 {p['elapsed']:.1f}시간)")
+    if p["lines"].empty: st.info("현재 교대의 계획/실적이 없습니다.")
+    else:
+        st.dataframe(p["lines"], hide_index=True, use_container_width=True, column_config={"예상 달성률": st.column_config.NumberColumn(format="%.1f%%")})
+        spec = build_pace_spec(p["hourly"], tracker.version)
+        if spec is not None: st.vega_lite_chart(spec, use_container_width=True)
+    st.caption("교대 목표 = 일 계획 x 교대 시간 비율 · 예상 수량 = 현재 시간당 실적 유지 시 교대 종료 시점 수량 · 시간대는 실적 입력시간 기준")
+
+    st.markdown("##### 최근 30일 달성률")
+    trend = tracker.trend(pd.Timestamp(day) - pd.Timedelta(days=29), day)
+    trend = trend[trend["계획"] > 0]
+    if trend.empty: st.info("최근 30일 계획이 없습니다.")
+    else: st.dataframe(trend.pivot_table(index="날짜", columns="구분", values="달성률").sort_index(ascending=False).reset_index().assign(날짜=lambda d: d["날짜"].dt.strftime("%Y-%m-%d")),
+                       hide_index=True, use_container_width=True)
+
+    with st.expander("📋 생산 계획 관리"):
+        st.caption("날짜/구분/품목코드별 계획수량 - 품목코드를 비우면 라인 전체 목표 (없으면 품목 계획 합계 사용)")
+        if st.session_state.user_info['role'] in ['admin', 'editor']:
+            render_master_editor(SHEET_PLAN, COLS_PLAN, "plan_master", "계획 저장")
+        else: render_paged_table(load_data(SHEET_PLAN, COLS_PLAN), "plan_master_view")
+
+CALENDAR_VIEWS = {"월간": "MS", "연간": "YS"}
+
+@st.cache_data(max_entries=32)
+def build_calendar_spec(start, end, view, version):
+    # 월간: 일 x 라인, 연간: 월 x 라인 완료율 히트맵 (NG 있는 칸은 점 표시)
+    alt = load_altair()
+    if alt is None: return None
+    g = get_check_calendar().grid(start, end)
+    if g.empty: return None
+    if view == "연간":
+        g = g.assign(날짜=g["날짜"].dt.to_period("M").dt.start_time).groupby(["날짜", "line"], as_index=False)[["완료", "전체", "NG", "미점검"]].sum()
+        g["완료율"] = (g["완료"] / g["전체"].where(g["전체"] > 0) * 100).round(1).fillna(0)
+        x = alt.X("month(날짜):O", axis=alt.Axis(title="월", labelAngle=0))
+    else:
+        x = alt.X("date(날짜):O", axis=alt.Axis(title="일", labelAngle=0))
+    tooltip = [alt.Tooltip("날짜:T", format="%Y-%m-%d" if view == "월간" else "%Y-%m"), alt.Tooltip("line:N", title="라인"), "완료", "전체", "미점검", "NG", alt.Tooltip("완료율:Q", format=".1f")]
+    base = alt.Chart(g).encode(x=x, y=alt.Y("line:N", title="라인"))
+    heat = base.mark_rect(stroke="white").encode(
+        color=alt.Color("완료율:Q", scale=alt.Scale(domain=[0, 100], scheme="redyellowgreen"), legend=alt.Legend(title="완료율(%)")), tooltip=tooltip)
+    ng = base.transform_filter("datum.NG > 0").mark_point(shape="diamond", filled=True, color="black", size=40).encode(tooltip=tooltip)
+    return alt.layer(heat, ng).properties(height=max(120, 28 * g["line"].nunique())).to_dict()
+
+def render_check_calendar():
+    cal = get_check_calendar()
+    if not cal.lines():
+        st.info("점검 기준 항목이 없습니다."); return
+    c1, c2, c3 = st.columns([1, 2, 2])
+    view = c1.radio("보기", list(CALENDAR_VIEWS), horizontal=True, key="cal_view")
+    today = pd.Timestamp(datetime.now().date())
+    if view == "월간":
+        months = pd.period_range(today - pd.DateOffset(months=11), today, freq="M")[::-1]
+        month = c2.selectbox("월", months, format_func=lambda p: p.strftime("%Y-%m"), key="cal_month")
+        start, end = month.start_time, min(month.end_time.normalize(), today)
+    else:
+        year = c2.selectbox("연도", list(range(today.year, today.year - 5, -1)), key="cal_year")
+        start, end = pd.Timestamp(year=year, month=1, day=1), min(pd.Timestamp(year=year, month=12, day=31), today)
+    t0 = time.perf_counter()
+    spec = build_calendar_spec(start, end, view, cal.version)
+    if spec: st.vega_lite_chart(spec, use_container_width=True)
+    grid = cal.grid(start, end)
+    gaps = grid[(grid["미점검"] > 0) | (grid["NG"] > 0)].sort_values(["날짜", "line"], ascending=[False, True])
+    st.caption(f"미점검/NG 발생 {len(gaps):,}건 · 조회 {(time.perf_counter() - t0) * 1000:,.0f} ms · 현재 점검 기준 항목 기준")
+    if gaps.empty:
+        st.success("선택한 기간에 미점검/NG 항목이 없습니다."); return
+    render_paged_table(gaps.assign(날짜=gaps["날짜"].dt.strftime("%Y-%m-%d")), "cal_gaps", columns=["날짜", "line", "완료", "전체", "미점검", "NG", "완료율"], default_size=20)
+    pick = c3.selectbox("상세 (날짜 · 라인)", list(zip(gaps["날짜"], gaps["line"])), format_func=lambda k: f"{k[0]:%Y-%m-%d} · {k[1]}", key="cal_pick")
+    if pick:
+        d1, d2 = st.columns(2)
+        with d1:
+            st.markdown("**⬜ 미점검 항목**")
+            miss = cal.missing(*pick)
+            if miss: st.dataframe(pd.DataFrame(miss, columns=["equip_id", "item_name"]), hide_index=True, use_container_width=True)
+            else: st.caption("없음")
+        with d2:
+            st.markdown("**🚨 NG 항목**")
+            ng = cal.ng_items(*pick)
+            if ng: st.dataframe(pd.DataFrame(ng, columns=["equip_id", "item_name"]), hide_index=True, use_container_width=True)
+            else: st.caption("없음")
+
+# 보고서 원본 키 -> (시트, 컬럼)
+REPORT_SOURCES = {
+    "production": (SHEET_RECORDS, COLS_RECORDS),
+    "inv_history": (SHEET_INV_HISTORY, COLS_INV_HISTORY),
+    "inventory": (SHEET_INVENTORY, COLS_INVENTORY),
+    "maintenance": (SHEET_MAINTENANCE, COLS_MAINTENANCE),
+}
+
+@st.cache_resource
+def get_exporter():
+    return reports.Exporter()
+
+def report_frame(sheet_name, cols, start, end):
+    # 보고서 원본 - 연도 분리 시트는 기간 행만 (기간이 지난 연도면 해당 연도 스프레드시트 포함), 그 외는 현재 스냅샷
+    date_col = sheets.YEAR_COLS.get(sheet_name)
+    if date_col is None: return load_snapshot(sheet_name, cols)
+    return load_data(sheet_name, cols, date_col=date_col, start=start, end=end, span=True)
+
+def request_report(name, start, end):
+    # 요청 시점 스냅샷과 데이터 버전으로 생성 요청 (같은 보고서/기간/버전은 기존 파일 재사용)
+    sources = reports.REPORTS[name][1]
+    version = tuple(get_data_version(*REPORT_SOURCES[k], start=start) for k in sources)
+    frames = {k: report_frame(*REPORT_SOURCES[k], start, end) for k in sources}
+    return get_exporter().request(name, start, end, frames, version)
+
+def render_excel_reports():
+    c1, c2, c3 = st.columns([2, 2, 1])
+    name = c1.selectbox("보고서 종류", list(reports.REPORTS), format_func=lambda k: reports.REPORTS[k][0], key="xlsx_report")
+    today = pd.Timestamp(datetime.now().date())
+    months = pd.period_range(today - pd.DateOffset(months=23), today, freq="M")[::-1]
+    month = c2.selectbox("대상 월", months, format_func=lambda p: p.strftime("%Y-%m"), key="xlsx_month")
+    c3.write(""); c3.write("")
+    if c3.button("생성", key="xlsx_make", use_container_width=True):
+        start, end = month.start_time.date(), month.end_time.date()
+        key, _ = request_report(name, start, end)
+        st.session_state["xlsx_job"] = (key, f"{reports.REPORTS[name][0].replace(' / ', '_').replace(' ', '_')}_{month.strftime('%Y-%m')}.xlsx")
+    job = st.session_state.get("xlsx_job")
+    if job:
+        status = get_exporter().status(job[0])
+        waiting = status is not None and status["status"] in ("queued", "running")
+        st.fragment(render_report_job, run_every=1 if waiting else None)()
+
+def render_report_job():
+    # 생성 중에는 이 영역만 1초마다 상태 확인 (완료되면 전체 재실행으로 폴링 종료)
+    key, file_name = st.session_state["xlsx_job"]
+    exporter = get_exporter()
+    job = exporter.status(key)
+    if job is None: return
+    if job["status"] in ("queued", "running"):
+        st.session_state["xlsx_wait"] = True
+        st.info(f"⏳ 보고서 생성 중... ({'생성 중' if job['status'] == 'running' else f'대기 {exporter.pending()}건'})")
+    elif st.session_state.pop("xlsx_wait", False):
+        st.rerun()
+    elif job["status"] == "done":
+        path = job["path"]
+        def read():
+            with open(path, "rb") as f: return f.read()
+        st.download_button(f"⬇ {file_name} ({job['bytes'] / 1024:,.0f}KB)", data=read, file_name=file_name, mime=reports.XLSX_MIME, key="xlsx_download", on_click="ignore")
+        st.caption(f"생성 {job['seconds']}초" if job["seconds"] else "같은 기간/데이터의 기존 파일 사용")
+    else:
+        st.error(f"보고서 생성 실패: {job['error']}")
+
+@st.cache_data(max_entries=32)
+def get_quality_analytics(start, end, by, version):
+    hist = get_quality_history()
+    return {"summary": hist.ng_summary(start, end), "trend": hist.ng_trend(start, end, by), "by_equip": hist.ng_by_equipment(start, end)}
+
+@st.cache_data(max_entries=32)
+def build_ng_trend_spec(start, end, by, version):
+    # 그룹(라인/설비)별 NG율 추이 - 기간이 길면 주/월 단위로 버킷팅
+    alt = load_altair()
+    if alt is None: return None
+    trend = get_quality_analytics(start, end, by, version)["trend"]
+    if trend.empty: return None
+    top = trend.groupby(by)["점검수"].sum().nlargest(charts.MAX_CATEGORIES - 1).index
+    trend = trend.assign(**{by: trend[by].where(trend[by].isin(top), "기타")})
+    agg, unit, fmt = charts.bucket_time(trend, "날짜", ["점검수", "NG수"], [by])
+    agg["NG율"] = (agg["NG수"] / agg["점검수"].where(agg["점검수"] > 0) * 100).round(2).fillna(0)
+    x_title = "날짜" if unit == "일" else f"날짜 ({unit} 단위)"
+    label = QUALITY_GROUPS_LABEL[by]
+    return alt.Chart(agg).mark_line(point=True).encode(
+        x=alt.X("날짜:T", axis=alt.Axis(format=fmt, labelAngle=0, title=x_title)),
+        y=alt.Y("NG율:Q", axis=alt.Axis(title="NG율(%)")),
+        color=alt.Color(f"{by}:N", legend=alt.Legend(title=label, orient="top")),
+        tooltip=[alt.Tooltip("날짜:T", format="%Y-%m-%d"), alt.Tooltip(f"{by}:N", title=label), "점검수", "NG수", alt.Tooltip("NG율:Q", format=".2f")]
+    ).properties(height=300).to_dict()
+
+@st.cache_data(max_entries=32)
+def get_spc_result(line, equip_id, item_name, start, end, n, lsl, usl, version):
+    # 수치 점검 항목 관리도 - n=1: 개별값(I-MR), n>=2: X-bar/R
+    values = get_quality_history().series(line, equip_id, item_name, start, end)
+    chart = quality.individuals(values["value"]) if n == 1 else quality.xbar_r(values["value"], n)
+    if chart is None: return None
+    frame = quality.control_frame(values["날짜"], chart, n)
+    return {"chart": {k: v for k, v in chart.items() if k not in ("points", "ranges")}, "frame": frame,
+            "cap": quality.capability(values["value"], chart["sigma"], lsl, usl), "count": len(values)}
+
+def spc_chart(res, lsl=None, usl=None, n=1):
+    alt = load_altair()
+    if alt is None: return None
+    frame, c = res["frame"], res["chart"]
+    x = alt.X("순번:Q", axis=alt.Axis(title="부분군" if n > 1 else "측정 순번", tickMinStep=1))
+    tip = [alt.Tooltip("날짜:T", format="%Y-%m-%d"), alt.Tooltip("값:Q", format=".3f"), alt.Tooltip("범위:Q", format=".3f")]
+    base = alt.Chart(frame).encode(x=x)
+    pts = base.mark_line(point=alt.OverlayMarkDef(size=40), color="#2563eb").encode(y=alt.Y("값:Q", scale=alt.Scale(zero=False), title="평균" if n > 1 else "측정값"), tooltip=tip)
+    out = base.transform_filter("datum.이탈").mark_point(color="#dc2626", size=90, filled=True).encode(y="값:Q", tooltip=tip)
+    lines = [("UCL", c["ucl"], "#f59e0b"), ("CL", c["center"], "#16a34a"), ("LCL", c["lcl"], "#f59e0b")]
+    if n == 1:
+        # 규격 한계는 개별값 관리도에만 표시 (평균 관리도와 비교 대상이 아님)
+        lines += [(name, v, "#dc2626") for name, v in (("USL", usl), ("LSL", lsl)) if v is not None]
+    rules = alt.Chart(pd.DataFrame(lines, columns=["구분", "y", "color"])).mark_rule(strokeDash=[4, 4]).encode(
+        y="y:Q", color=alt.Color("color:N", scale=None), tooltip=["구분", alt.Tooltip("y:Q", format=".3f")])
+    top = alt.layer(pts, out, rules).properties(height=260)
+    r_rules = alt.Chart(pd.DataFrame([("UCL", c["r_ucl"]), ("CL", c["r_center"])], columns=["구분", "y"])).mark_rule(strokeDash=[4, 4], color="#f59e0b").encode(y="y:Q")
+    r_line = base.mark_line(point=True, color="#64748b").encode(y=alt.Y("범위:Q", title="범위(R)" if n > 1 else "이동범위(MR)"), tooltip=tip)
+    return alt.vconcat(top, alt.layer(r_line, r_rules).properties(height=140)).resolve_scale(x="shared")
+
+QUALITY_GROUPS_LABEL = {"line": "라인", "equip_id": "설비"}
+
+def render_quality_analytics():
+    st.markdown("#### 📈 점검 품질 분석")
+    version = get_data_version(SHEET_CHECK_RESULT, COLS_CHECK_RESULT)
+    today = datetime.now().date()
+    c1, c2 = st.columns([2, 1])
+    q_range = c1.date_input("분석 기간", value=(today - timedelta(days=89), today), key="quality_range")
+    by = c2.radio("NG율 구분", list(QUALITY_GROUPS_LABEL.keys()), format_func=QUALITY_GROUPS_LABEL.get, horizontal=True, key="quality_by")
+    if isinstance(q_range, tuple) and len(q_range) == 2: q_start, q_end = q_range
+    else:
+        st.warning("종료 날짜를 선택해주세요.")
+        q_start = q_end = q_range[0] if q_range else today
+
+    res = get_quality_analytics(q_start, q_end, by, version)
+    summary = res["summary"]
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("점검 건수", f"{summary['checks']:,} 건")
+    k2.metric("NG 건수", f"{summary['ng']:,} 건")
+    k3.metric("NG율", f"{summary['rate']:.2f} %")
+    k4.metric("점검 일수", f"{summary['days']} 일")
+    if summary['checks'] == 0:
+        st.info("선택한 기간에 점검 데이터가 없습니다.")
+        return
+
+    st.markdown("##### 📉 NG율 추이")
+    spec = build_ng_trend_spec(q_start, q_end, by, version)
+    if spec: st.vega_lite_chart(spec, use_container_width=True)
+    st.markdown("##### 🛠 설비별 NG율")
+    st.dataframe(res["by_equip"].rename(columns={"line": "라인", "equip_id": "설비ID", "NG율": "NG율(%)"}), hide_index=True, use_container_width=True)
+
+    st.divider()
+    st.markdown("##### 📐 수치 항목 관리도 (SPC)")
+    items = quality.numeric_items(load_snapshot(SHEET_CHECK_MASTER, COLS_CHECK_MASTER))
+    if items.empty:
+        st.info("수치 입력 점검 항목이 없습니다.")
+        return
+    s1, s2, s3 = st.columns([3, 1, 1])
+    labels = [f"{r.line} / {r.equip_name or r.equip_id} / {r.item_name}" for r in items.itertuples()]
+    pick = s1.selectbox("점검 항목", range(len(items)), format_func=lambda i: labels[i], key="spc_item")
+    mode = s2.radio("관리도", ["I-MR", "X̄-R"], horizontal=True, key="spc_mode")
+    n = s3.number_input("부분군 크기", min_value=2, max_value=10, value=5, key="spc_n") if mode != "I-MR" else 1
+    row = items.iloc[pick]
+    lsl = None if pd.isna(row["lsl"]) else float(row["lsl"])
+    usl = None if pd.isna(row["usl"]) else float(row["usl"])
+    spc = get_spc_result(row["line"], row["equip_id"], row["item_name"], q_start, q_end, int(n), lsl, usl, version)
+    if spc is None:
+        st.info("관리도를 그리기에 측정값이 부족합니다.")
+        return
+    c, cap = spc["chart"], spc["cap"]
+    fmt = lambda v: "-" if v is None else f"{v:.2f}"
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("측정 수", f"{spc['count']}")
+    m2.metric("평균", f"{c['center']:.3f} {row['unit']}".strip())
+    m3.metric("σ (관리도 추정)", f"{c['sigma']:.3f}")
+    m4.metric("Cpk", fmt(cap["cpk"]), f"Cp {fmt(cap['cp'])} · Ppk {fmt(cap['ppk'])}", delta_color="off")
+    m5.metric("관리 이탈", f"{int(spc['frame']['이탈'].sum())} 점")
+    st.caption(f"규격: {fmt(lsl)} ~ {fmt(usl)} · UCL {c['ucl']:.3f} / CL {c['center']:.3f} / LCL {c['lcl']:.3f} · 일자별 최신 측정값 기준")
+    chart = spc_chart(spc, lsl, usl, int(n))
+    if chart is not None: st.altair_chart(chart, use_container_width=True)
+
+def render_master_editor(sheet_name, cols, key, label):
+    # 편집 시작 시점의 버전/원본을 세션에 보관 - 저장 시 그 사이 변경이 있으면 거부 후 비교표 표시
+    base_key, conflict_key = f"{key}_base", f"{key}_conflict"
+    if base_key not in st.session_state:
+        snap = get_data_hub().snapshot(sheet_name, cols)
+        st.session_state[base_key] = (snap.digest, snap.df.copy())
+    digest, base = st.session_state[base_key]
+
+    def reload():
+        for k in (base_key, conflict_key, key): st.session_state.pop(k, None)
+
+    st.caption(f"편집 기준 버전: {digest[:8]} · 키: {', '.join(MASTER_KEYS[sheet_name])}")
+    edited = st.data_editor(base, num_rows="dynamic", use_container_width=True, key=key)
+
+    def do_save(force=False):
+        status, detail = save_master_changes(sheet_name, cols, digest, base, edited, force=force)
+        if status == "saved":
+            reload()
+            st.toast(f"저장 완료 ({master_edit.summarize(detail)})")
+            st.rerun()
+        elif status == "nochange": st.info("변경된 내용이 없습니다.")
+        elif status == "stale": st.session_state[conflict_key] = detail
+        else: st.error("저장 실패 - 잠시 후 다시 시도해주세요.")
+
+    c1, c2, _ = st.columns([1, 1, 3])
+    if c1.button(label, key=f"{key}_save", type="primary"): do_save()
+    if c2.button("🔄 최신 데이터 불러오기", key=f"{key}_reload"): reload(); st.rerun()
+
+    merge = st.session_state.get(conflict_key)
+    if merge is not None:
+        n_conflict = int(merge["충돌"].sum()) if not merge.empty else 0
+        st.warning(f"편집을 시작한 뒤 다른 사용자가 이 시트를 변경했습니다. (충돌 {n_conflict}건) 아래 비교표를 확인하세요.")
+        st.dataframe(merge, use_container_width=True, hide_index=True)
+        m1, m2, _ = st.columns([1, 1, 2])
+        if m1.button("최신 버전 기준으로 내 변경 적용", key=f"{key}_force"): do_save(force=True)
+        if m2.button("내 변경 취소하고 최신 데이터 불러오기", key=f"{key}_discard"): reload(); st.rerun()
+
+def render_audit_log():
+    # 시트/키/기간으로 변경 이력 조회 + 선택한 행(키)의 이력 타임라인
+    log = load_data(SHEET_AUDIT_LOG, COLS_AUDIT_LOG)
+    if log.empty:
+        st.info("기록된 변경 이력이 없습니다."); return
+    a1, a2, a3 = st.columns([1, 2, 2])
+    sheet_name = a1.selectbox("시트", list(AUDIT_KEYS), key="audit_sheet")
+    query = a2.text_input("키 검색", key="audit_key", placeholder="입력시간 / 품목코드 / 설비 ID 등")
+    period = a3.date_input("기간", value=(), key="audit_range")
+    view = log[log["시트"].astype(str) == sheet_name]
+    if query.strip(): view = view[view["키"].astype(str).str.contains(query.strip(), regex=False)]
+    if isinstance(period, (tuple, list)) and len(period) > 0:
+        day = pd.to_datetime(view["시각"].astype(str).str[:10], errors="coerce")
+        view = view[(day >= pd.Timestamp(period[0])) & (day <= pd.Timestamp(period[-1]))]
+    view = view.iloc[::-1]
+    shown = view.assign(변경내용=[audit.describe(a, audit._parse(c)) for a, c in zip(view["작업"], view["변경내용"])])
+    render_paged_table(shown[COLS_AUDIT_LOG], "audit_view", default_size=20)
+    keys = view["키"].astype(str).drop_duplicates().tolist()
+    if keys:
+        pick = st.selectbox("행 이력 보기", keys, key="audit_pick")
+        hist = audit.record_history(log, sheet_name, pick)
+        for r in hist.to_dict("records"):
+            st.markdown(f"- `{r['시각'][:19]}` **{r['작업']}** · {r['사용자'] or '-'} · {audit.describe(r['작업'], r['변경내용'])}")
+
+# 일괄 등록 대상: 종류 -> (화면 이름, 시트, 컬럼)
+IMPORT_TARGETS = {
+    "production": ("생산 실적", SHEET_RECORDS, COLS_RECORDS),
+    "check": ("점검 결과", SHEET_CHECK_RESULT, COLS_CHECK_RESULT),
+}
+
+def _import_validator(kind):
+    # 청크 검증 함수 (기준정보는 한 번만 조회)
+    if kind == "production":
+        items = get_item_index()
+        return lambda chunk, **kw: importer.validate_production(chunk, items, **kw)
+    master = load_snapshot(SHEET_CHECK_MASTER, COLS_CHECK_MASTER)
+    return lambda chunk, **kw: importer.validate_checks(chunk, master, **kw)
+
+def check_import(kind, data, filename):
+    # 기록 없이 전체 파일 검증 - 반환: {"rows", "valid", "errors"(최대 500건), "missing"}
+    validate = _import_validator(kind)
+    result = {"rows": 0, "valid": 0, "errors": [], "missing": []}
+    for n, chunk in enumerate(importer.read_chunks(data, filename)):
+        if n == 0:
+            result["missing"] = importer.missing_columns(chunk, kind)
+            if result["missing"]: return result
+        valid, errors = validate(chunk, offset=result["rows"])
+        result["rows"] += len(chunk)
+        result["valid"] += len(valid)
+        if len(result["errors"]) < 500: result["errors"].append(errors.head(500))
+    result["errors"] = pd.concat(result["errors"], ignore_index=True).head(500) if result["errors"] else pd.DataFrame(columns=["행", "사유"])
+    return result
+
+def run_import(kind, data, filename, user, deduct=True, progress=None, total_rows=None):
+    # 청크마다 append_rows 1회, 재고는 품목코드별 순증감을 마지막에 1회 반영 - 반환: (기록 건수, 오류 건수, 실패 여부)
+    _, sheet_name, cols = IMPORT_TARGETS[kind]
+    validate = _import_validator(kind)
+    stamp = pd.Timestamp.now()
+    offset = written = skipped = 0
+    failed = False
+    net = {}
+    for chunk in importer.read_chunks(data, filename):
+        valid, errors = validate(chunk, offset=offset, user=user, stamp=stamp)
+        offset += len(chunk)
+        skipped += len(errors)
+        if not valid.empty:
+            if not sheets.append_records(valid.values.tolist(), sheet_name, cols, site=current_site()):
+                failed = True
+                break
+            written += len(valid)
+            if kind == "production": importer.merge_deltas(net, importer.inventory_deltas(valid, deduct))
+        if progress is not None and total_rows: progress.progress(min(offset / total_rows, 1.0), text=f"{offset:,} / {total_rows:,} 행 처리")
+    if written: clear_cache(sheet_name)
+    # 실패 시에도 이미 기록된 청크의 재고는 반영
+    apply_inventory_deltas([(code, name, d) for code, (name, d) in net.items() if d], f"일괄등록({filename})", user)
+    return written, skipped, failed
+
+def render_importer(kind):
+    label, _, _ = IMPORT_TARGETS[kind]
+    required, optional = importer.KINDS[kind]
+    st.markdown(f"#### 📥 {label} 일괄 등록")
+    st.caption(f"필수 컬럼: {', '.join(required)} · 선택 컬럼: {', '.join(optional)} (첫 행은 머리글)")
+    up = st.file_uploader("파일 선택 (xlsx, xls, csv)", type=["xlsx", "xls", "csv"], key=f"import_file_{kind}")
+    if up is None: return
+    data = up.getvalue()
+    check_key = f"import_check_{kind}"
+    if st.session_state.get(check_key, (None,))[0] != up.file_id:
+        try:
+            with st.spinner("파일 검증 중..."):
+                st.session_state[check_key] = (up.file_id, check_import(kind, data, up.name))
+        except Exception as e:
+            st.error(f"파일을 읽을 수 없습니다: {e}")
+            return
+    res = st.session_state[check_key][1]
+    if res["missing"]:
+        st.error(f"필수 컬럼이 없습니다: {', '.join(res['missing'])}")
+        return
+    n_err = res["rows"] - res["valid"]
+    m1, m2, m3 = st.columns(3)
+    m1.metric("전체 행", f"{res['rows']:,}")
+    m2.metric("등록 가능", f"{res['valid']:,}")
+    m3.metric("오류", f"{n_err:,}")
+    if n_err:
+        st.warning("오류 행은 등록에서 제외됩니다. (최대 500건 표시)")
+        st.dataframe(res["errors"], hide_index=True, use_container_width=True)
+    deduct = st.checkbox("후공정 재고 차감 적용", value=True, key=f"import_deduct_{kind}") if kind == "production" else False
+    if res["valid"] and st.button(f"{res['valid']:,}건 등록", type="primary", key=f"import_run_{kind}"):
+        bar = st.progress(0.0, text="등록 중...")
+        written, skipped, failed = run_import(kind, data, up.name, st.session_state.user_info['id'], deduct, progress=bar, total_rows=res["rows"])
+        st.session_state.pop(check_key, None)
+        if failed: st.error(f"등록 중 오류가 발생했습니다. {written:,}건까지 등록되었습니다.")
+        else: st.success(f"{written:,}건 등록 완료 (오류 {skipped:,}건 제외)")
+
+# 통합 검색 대상: (시트, 컬럼, 자유 텍스트 컬럼, 구조 필드, 날짜 컬럼, 표시 컬럼)
+SEARCH_SOURCES = {
+    "생산": (SHEET_RECORDS, COLS_RECORDS, ["제품명"], ["품목코드", "구분", "작성자"], "날짜", ["구분", "품목코드", "제품명", "수량", "작성자"]),
+    "정비": (SHEET_MAINTENANCE, COLS_MAINTENANCE, ["작업내용", "교체부품"], ["설비ID", "설비명", "작업구분", "작업자"], "날짜", ["설비ID", "설비명", "작업구분", "작업내용", "교체부품", "비용"]),
+    "점검": (SHEET_CHECK_RESULT, COLS_CHECK_RESULT, ["비고", "item_name"], ["line", "equip_id", "ox", "checker"], "date", ["line", "equip_id", "item_name", "value", "ox", "비고", "checker"]),
+}
+
+@st.cache_resource
+def _search_index(site):
+    return search_index.SearchIndex()
+
+def get_search_index():
+    # 프로세스 공용 역색인 (세션 간 공유, 사이트별)
+    return _search_index(current_site())
+
+def sync_search_index(sources=None):
+    # 시트에 추가된 행만 새로 색인 (기존 행이 바뀐 소스만 재색인)
+    ix = get_search_index()
+    added = 0
+    for name, (sheet, cols, text_cols, field_cols, date_col, show_cols) in SEARCH_SOURCES.items():
+        if sources and name not in sources: continue
+        added += ix.sync(name, load_snapshot(sheet, cols), text_cols, field_cols, date_col, show_cols, version=get_data_version(sheet, cols))
+    return ix, added
+
+@st.cache_resource
+def get_blob_store():
+    # 서명 이미지 로컬 저장소 (SMT_BLOB_DIR, 기본 ./blobs)
+    return signature.open_blobs()
+
+def _upload_signature(ref, data):
+    # 서명 원본은 내용 주소(ref) 기준이라 사이트와 무관하게 기본 사이트 시트에 보관 (업로드 스레드에는 세션이 없음)
+    return sheets.append_records([[ref, data, str(datetime.now())]], SHEET_SIGNATURE_BLOBS, COLS_SIGNATURE_BLOBS)
+
+@st.cache_resource
+def get_signature_uploader():
+    # 서명 백업 업로드 전용 스레드 (저장 버튼 응답을 기다리게 하지 않음)
+    return signature.Uploader(get_blob_store(), _upload_signature)
+
+def save_signature(image_data):
+    # 반환: 시트에 기록할 참조 문자열 (잉크가 없으면 None)
+    png = signature.encode_png(image_data)
+    if png is None: return None
+    ref = get_blob_store().put(png)
+    get_signature_uploader().submit(ref)
+    return ref
+
+def signature_image(ref):
+    # 서명 PNG 경로 - 로컬에 없으면 백업 시트에서 복원
+    if not signature.is_ref(ref): return None
+    store = get_blob_store()
+    path = signature.image_path(store, ref)
+    if path: return path
+    blobs = load_snapshot(SHEET_SIGNATURE_BLOBS, COLS_SIGNATURE_BLOBS, sheets.shard_of())
+    hit = blobs[blobs["ref"] == ref] if not blobs.empty else blobs
+    if hit.empty: return None
+    try: store.put(base64.b64decode(hit["data"].iloc[-1]))
+    except Exception: return None
+    return signature.image_path(store, ref)
+
 def generate_all_daily_check_pdf(date_str):
     try:
         df_m = load_data(SHEET_CHECK_MASTER, COLS_CHECK_MASTER)
-        df_r = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT)
+        df_r = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, date_col="date", start=date_str, end=date_str)
         
         checker_name = ""
         if not df_r.empty:
@@ -234,6 +1320,7 @@ def generate_all_daily_check_pdf(date_str):
                 urllib.request.urlretrieve(url, font_filename)
             except: pass
 
+        from fpdf import FPDF
         pdf = FPDF()
         font_name = 'Arial'
         try:
@@ -241,6 +1328,13 @@ def generate_all_daily_check_pdf(date_str):
             font_name = 'Korean'
         except: pass
 
+        # 라인별 마지막 서명
+        df_s = load_data(SHEET_CHECK_SIGNATURE, COLS_CHECK_SIGNATURE, date_col="date", start=date_str, end=date_str)
+        if not df_s.empty:
+            df_s = df_s[df_s['date'].astype(str).str.split().str[0] == date_str]
+            df_s = df_s.assign(_ts=pd.to_datetime(df_s['timestamp'], errors='coerce')).sort_values('_ts').drop_duplicates('line', keep='last')
+        signs = {r['line']: r for _, r in df_s.iterrows()} if not df_s.empty else {}
+
         lines = df_m['line'].unique()
         first_page = True 
 
@@ -334,7 +1428,7 @@ def generate_all_daily_check_pdf(date_str):
                 pdf.ln()
                 
                 if ox == 'NG' and '비고' in row and row['비고']:
-                    pdf.set_font(font_name, 'I', 9)
+                    pdf.set_font(font_name, 'I' if font_name == 'Arial' else '', 9)  # 한글 글꼴은 기울임꼴 미등록
                     pdf.set_text_color(100, 100, 100)
                     pdf.cell(190, 6, f"   └ 조치내역: {row['비고']}", 1, 1, 'L', fill)
                     pdf.set_font(font_name, '', 10)
@@ -343,6 +1437,17 @@ def generate_all_daily_check_pdf(date_str):
                 fill = not fill
             pdf.ln(10)
 
+            sign = signs.get(line)
+            if sign is not None:
+                pdf.set_text_color(60, 60, 60)
+                pdf.set_font(font_name, '', 10)
+                pdf.cell(0, 8, f"Signature: {sign['signer']}", 0, 1, 'L')
+                img = signature_image(sign['signature_data'])
+                if img:
+                    if pdf.get_y() > 250: pdf.add_page()
+                    pdf.image(img, 10, pdf.get_y(), 60)
+                    pdf.ln(25)
+
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
             pdf.output(tmp_file.name)
             with open(tmp_file.name, "rb") as f:
@@ -352,7 +1457,7 @@ def generate_all_daily_check_pdf(date_str):
     except Exception as e:
         return None
 
-def generate_production_report_pdf(df_prod, date_str):
+def generate_production_report_pdf(df_prod, date_str, attain=None):
     try:
         font_filename = 'NanumGothic.ttf'
         if not os.path.exists(font_filename):
@@ -361,6 +1466,7 @@ def generate_production_report_pdf(df_prod, date_str):
                 urllib.request.urlretrieve(url, font_filename)
             except: pass
 
+        from fpdf import FPDF
         pdf = FPDF()
         font_name = 'Arial'
         try:
@@ -419,6 +1525,26 @@ def generate_production_report_pdf(df_prod, date_str):
         pdf.set_font(font_name, '', 12)
         pdf.cell(0, 10, f"Total Quantity: {total_qty:,} EA", 0, 1, 'R')
 
+        # 계획 대비 실적 (라인별)
+        if attain is not None and not attain.empty and (attain["계획"] > 0).any():
+            pdf.ln(4)
+            pdf.set_font(font_name, '', 12)
+            pdf.cell(0, 10, "Plan vs Actual", 0, 1, 'L')
+            pdf.set_font(font_name, '', 10)
+            pdf.set_fill_color(240, 240, 240)
+            a_headers = ["구분", "계획", "실적", "달성률", "차이"]
+            a_widths = [50, 35, 35, 35, 35]
+            for i, h in enumerate(a_headers):
+                pdf.cell(a_widths[i], 10, h, 1, 0, 'C', 1)
+            pdf.ln()
+            for _, r in attain.iterrows():
+                rate = "-" if pd.isna(r['달성률']) else f"{r['달성률']:.1f}%"
+                pdf.cell(a_widths[0], 8, str(r['구분']), 1, 0, 'C')
+                pdf.cell(a_widths[1], 8, f"{r['계획']:,.0f}", 1, 0, 'R')
+                pdf.cell(a_widths[2], 8, f"{r['실적']:,.0f}", 1, 0, 'R')
+                pdf.cell(a_widths[3], 8, rate, 1, 0, 'R')
+                pdf.cell(a_widths[4], 8, f"{r['차이']:+,.0f}", 1, 1, 'R')
+
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
             pdf.output(tmp_file.name)
             with open(tmp_file.name, "rb") as f:
@@ -430,25 +1556,40 @@ def generate_production_report_pdf(df_prod, date_str):
 # ------------------------------------------------------------------
 # 4. 사용자 인증
 # ------------------------------------------------------------------
-def make_hash(password): return hashlib.sha256(str.encode(password)).hexdigest()
+# 비밀번호는 솔트 PBKDF2 해시로만 보관 (새 해시 생성: python auth.py <비밀번호>)
 USERS = {
-    "박종선": {"name": "박종선", "password_hash": make_hash("1083"), "role": "admin"},
-    "김윤석": {"name": "김윤석", "password_hash": make_hash("1734"), "role": "editor"},
-    "kim": {"name": "Kim", "password_hash": make_hash("8943"), "role": "editor"}
+    "박종선": {"name": "박종선", "password_hash": "pbkdf2_sha256$200000$917e649a0386be1af0dedb033e2e98bb$c69c92c88646660b29b08b796f707d2895e97c5c901af46518033e2455eca1d8", "role": "admin"},
+    "김윤석": {"name": "김윤석", "password_hash": "pbkdf2_sha256$200000$251c2b1436723d021b0755b221b5ea93$f741fb45ca9dc73cc3333e67e07e747a6da452356b2ca50acb227a2d3dfcf040", "role": "editor"},
+    "kim": {"name": "Kim", "password_hash": "pbkdf2_sha256$200000$0a74c3a631139f44aff11b722bf64d37$7e6eae7746184fa156c6ef9e1230a9d0741274fb8eb15250c320514385e1737d", "role": "editor"}
 }
+
+@st.cache_resource
+def get_sessions():
+    # 로그인 세션 저장소 (프로세스 공용, 재시작 후에도 유지)
+    return auth.open_sessions()
+
+def login_as(user_id):
+    st.session_state.logged_in = True
+    st.session_state.user_info = {k: v for k, v in USERS[user_id].items() if k != "password_hash"}
+    st.session_state.user_info['id'] = user_id
+
+def logout():
+    try:
+        token = st.query_params.get("session")
+        if token: get_sessions().revoke(token)
+        st.query_params.clear()
+    except: pass
+    st.session_state.logged_in = False
+
 def check_password():
     if "logged_in" not in st.session_state: 
         st.session_state.logged_in = False
     
     if not st.session_state.logged_in:
+        # URL의 세션 토큰으로 이어서 로그인 (토큰은 로그인 시 발급된 임의 값)
         try:
-            qp = st.query_params
-            if "session" in qp:
-                saved_id = qp["session"]
-                if saved_id in USERS:
-                    st.session_state.logged_in = True
-                    st.session_state.user_info = USERS[saved_id]
-                    st.session_state.user_info['id'] = saved_id
+            user_id = get_sessions().resume(st.query_params.get("session"))
+            if user_id in USERS: login_as(user_id)
         except: pass
 
     if st.session_state.logged_in: return True
@@ -462,18 +1603,38 @@ def check_password():
             id = st.text_input("ID")
             pw = st.text_input("PW", type="password")
             if st.form_submit_button("로그인", use_container_width=True):
-                if id in USERS and make_hash(pw) == USERS[id]["password_hash"]:
-                    st.session_state.logged_in = True
-                    st.session_state.user_info = USERS[id]
-                    st.session_state.user_info['id'] = id
-                    try: st.query_params["session"] = id
+                if id in USERS and auth.verify_password(pw, USERS[id]["password_hash"]):
+                    login_as(id)
+                    try: st.query_params["session"] = get_sessions().create(id)
                     except: pass
                     st.rerun()
                 else: st.error("로그인 실패")
+    if "login_form_timed" not in st.session_state:
+        # 세션 최초 로그인 화면 표시까지 걸린 시간 (프로세스 첫 화면은 콜드 스타트로 구분)
+        st.session_state.login_form_timed = True
+        elapsed = (time.perf_counter() - _RUN_STARTED) * 1000
+        metrics.observe("login_form_cold_ms" if metrics.once("login_form") else "login_form_ms", elapsed)
+        start_prewarm()
     return False
 
 if not check_password(): st.stop()
 
+def render_site_selector():
+    # 사이트가 여러 곳(또는 연도별 스프레드시트)일 때만 표시 - 선택한 샤드는 세션에 보관
+    conf = sites.all_sites(sheets.GOOGLE_SHEET_NAME)
+    if len(conf) < 2 and not any(c["years"] for c in conf.values()): return
+    site = st.selectbox("사이트", list(conf), format_func=lambda k: conf[k]["label"], key="site_pick")
+    this_year = str(datetime.now().year)
+    years = sorted((y for y in conf[site]["years"] if y != this_year), reverse=True)
+    year = st.selectbox("연도", ["올해"] + years, key="site_year") if years else "올해"
+    shard = sites.shard_key(site, None if year == "올해" else year)
+    if shard != current_site():
+        # 이전 사이트 기준으로 편집 중이던 표/작업은 버림 (다른 사이트에 저장되지 않도록)
+        for k in [k for k in st.session_state if str(k).endswith(("_base", "_conflict"))]:
+            st.session_state.pop(k, None); st.session_state.pop(str(k).rsplit("_", 1)[0], None)
+        st.session_state.pop("xlsx_job", None)
+        st.session_state.site = shard
+
 with st.sidebar:
     if os.path.exists("logo.png"):
         st.image("logo.png", width=180)
@@ -481,14 +1642,44 @@ with st.sidebar:
     u = st.session_state.user_info
     role_badge = "👑 Admin" if u["role"] == "admin" else "👤 User"
     st.markdown(f"<div style='padding:10px; background:#f1f5f9; border-radius:8px; margin-bottom:10px;'><b>{u['name']}</b>님 ({role_badge})</div>", unsafe_allow_html=True)
-    menu = st.radio("업무 선택", ["📊 대시보드", "🏭 생산관리", "🛠 설비보전관리", "✅ 일일점검관리", "⚙ 기준정보관리"])
+    render_site_selector()
+    menu = st.radio("업무 선택", ["📊 대시보드", "🏭 생산관리", "🛠 설비보전관리", "✅ 일일점검관리", "🔍 통합검색", "⚙ 기준정보관리"])
     st.divider()
+    if u["role"] == "admin":
+        with st.expander("⏱ 성능 지표"):
+            rows = metrics.summary()
+            if rows: st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+            st.caption(f"기동 후 {int(time.time() - metrics.LOADED_AT)}초 · 시트 조회 {get_data_hub().stats['fetches']}회")
+        with st.expander("🗜 점검 결과 정리"):
+            st.caption(f"마감된 날짜(최근 {compaction.KEEP_DAYS}일 제외)의 재저장 이전 행을 보관 파일로 옮기고 시트에서 삭제합니다.")
+            c_dry, c_run = st.columns(2)
+            if c_dry.button("미리보기", key="compact_dry"): st.session_state.compact_report = run_compaction(dry_run=True)
+            if c_run.button("정리 실행", key="compact_run"): st.session_state.compact_report = run_compaction()
+            rep = st.session_state.get("compact_report")
+            if rep:
+                if rep["error"]: st.error(rep["error"])
+                st.caption(f"전체 {rep['rows']:,}행 · 정리 {rep['removed']:,}행 ({rep['days']}일) · 셀 {rep['cells']:,}개 · 약 {rep['bytes'] / 1024:,.1f}KB"
+                           + (f" · 보관 {rep['archive_bytes'] / 1024:,.1f}KB" if rep["archive"] else ""))
+        with st.expander("🕘 스냅샷 / 복원"):
+            if get_snapshots().error: st.warning("최근 스냅샷 실패 ({0} · {1}): {2}".format(*get_snapshots().error))
+            snap_sheet = st.selectbox("시트", list(sheets.SHEET_COLUMNS), key="snap_sheet")
+            hist = get_snapshots().history(snap_sheet)
+            if st.button("📸 지금 스냅샷", key="snap_take"):
+                snapshots.take_all(get_snapshots(), lambda name, cols: get_data_hub().get(name, cols, copy=False), reason="manual")
+                st.rerun()
+            if hist:
+                pick = st.selectbox("복원 시점", range(len(hist)), key="snap_pick",
+                                    format_func=lambda i: f"{hist[i]['at'][:19]} · {SNAPSHOT_REASONS.get(hist[i]['reason'], hist[i]['reason'])} · {hist[i]['rows']:,}행")
+                ok = st.checkbox("현재 내용을 이 시점으로 덮어씁니다", key="snap_confirm")
+                if st.button("복원", key="snap_restore", disabled=not ok):
+                    if restore_sheet(snap_sheet, hist[pick]["at"]): st.success("복원되었습니다.")
+                    else: st.error("복원 실패")
+            else: st.caption("저장된 스냅샷이 없습니다.")
     if st.button("로그아웃"): 
-        st.session_state.logged_in = False
-        try: st.query_params.clear()
-        except: pass
+        logout()
         st.rerun()
 
+start_snapshots(current_site())
 st.markdown(f'<div class="dashboard-header"><h3>{menu}</h3></div>', unsafe_allow_html=True)
 
 # ------------------------------------------------------------------
@@ -499,154 +1690,34 @@ main_holder = st.empty()
 
 with main_holder.container():
     if menu == "📊 대시보드":
+        live = st.toggle("⚡ 라이브 모드 (라인 모니터용)", key="dash_live", help="패널별 데이터 버전을 주기적으로 확인하여 바뀐 경우에만 화면을 갱신합니다.")
         try:
-            df_prod = load_data(SHEET_RECORDS, COLS_RECORDS)
-            df_check = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT)
-            df_maint = load_data(SHEET_MAINTENANCE, COLS_MAINTENANCE)
-            
-            today = datetime.now()
-            today_str = today.strftime("%Y-%m-%d")
-            yesterday_str = (today - timedelta(days=1)).strftime("%Y-%m-%d")
-            
-            # [수정] 이번 달 1일 날짜 구하기 (월간 집계용)
-            this_month_start = today.replace(day=1)
-            
-            # 1. 생산량 KPI
-            prod_today_val = 0
-            prod_yesterday_val = 0
-            
-            if not df_prod.empty:
-                df_prod['날짜'] = pd.to_datetime(df_prod['날짜'], errors='coerce')
-                df_prod['수량'] = pd.to_numeric(df_prod['수량'], errors='coerce').fillna(0)
-                
-                prod_today_val = df_prod[df_prod['날짜'].dt.strftime("%Y-%m-%d") == today_str]['수량'].sum()
-                prod_yesterday_val = df_prod[df_prod['날짜'].dt.strftime("%Y-%m-%d") == yesterday_str]['수량'].sum()
-            
-            delta_prod = prod_today_val - prod_yesterday_val
-            
-            # 2. 품질 KPI
-            check_today_cnt = 0
-            ng_today_cnt = 0
-            ng_rate = 0.0
-            
-            if not df_check.empty:
-                df_check['date_only'] = df_check['date'].astype(str).str.split().str[0]
-                df_check['timestamp'] = pd.to_datetime(df_check['timestamp'], errors='coerce')
-                
-                df_today_chk = df_check[df_check['date_only'] == today_str]
-                if not df_today_chk.empty:
-                    df_today_unique = df_today_chk.sort_values('timestamp').drop_duplicates(['line', 'equip_id', 'item_name'], keep='last')
-                    check_today_cnt = len(df_today_unique)
-                    ng_today_cnt = len(df_today_unique[df_today_unique['ox'] == 'NG'])
-                    if check_today_cnt > 0:
-                        ng_rate = (ng_today_cnt / check_today_cnt) * 100
-
-            # 3. 보전 KPI
-            maint_today_cnt = 0
-            if not df_maint.empty:
-                maint_today_cnt = len(df_maint[df_maint['날짜'].astype(str) == today_str])
-
-            # KPI 카드 재배치 및 통합
-            col1, col2, col3 = st.columns(3)
-            # 1. 오늘 생산량
-            col1.metric("오늘 생산량", f"{prod_today_val:,.0f} EA", f"{delta_prod:,.0f} (전일비)")
-            # 2. 금일 설비 정비
-            col2.metric("금일 설비 정비", f"{maint_today_cnt} 건", "특이사항 없음" if maint_today_cnt == 0 else "확인 필요", delta_color="inverse")
-            # 3. 일일점검 (완료/NG 통합)
-            col3.metric("일일점검 (완료/NG)", f"{check_today_cnt} 건 / {ng_today_cnt} 건", f"불량률: {ng_rate:.1f}%", delta_color="inverse")
+            shown = ["kpis", "charts", "ng", "maintenance", "oee", "plan"]
+            live_panel("kpis")
 
             st.markdown("---")
-
-            # 차트 및 상세 분석 섹션
-            c1, c2 = st.columns([2, 1])
-
-            with c1:
-                st.subheader("📈 주간 생산 추이 & 유형")
-                if not df_prod.empty and HAS_ALTAIR:
-                    last_7_days = today - timedelta(days=7)
-                    chart_data = df_prod[df_prod['날짜'] >= last_7_days]
-                    
-                    if not chart_data.empty:
-                        chart_agg = chart_data.groupby(['날짜', '구분'])['수량'].sum().reset_index()
-                        
-                        # [수정] 생산량 세로쓰기 타이틀 적용
-                        chart = alt.Chart(chart_agg).mark_line(point=True).encode(
-                            x=alt.X('날짜:T', axis=alt.Axis(format="%m-%d", labelAngle=0, title="날짜")),
-                            y=alt.Y('수량:Q', axis=alt.Axis(labelAngle=0, title="생\n산\n량", titleAngle=0, titlePadding=20, titleFontWeight="bold", titleFontSize=14)),
-                            color=alt.Color('구분', legend=alt.Legend(title="공정 구분")),
-                            tooltip=['날짜', '구분', '수량']
-                        ).properties(height=300)
-                        
-                        st.altair_chart(chart, use_container_width=True)
-                    else:
-                        st.info("최근 7일간 생산 데이터가 없습니다.")
-                else:
-                    st.info("생산 데이터가 없습니다.")
-
-            with c2:
-                # [수정] 타이틀 변경
-                st.subheader("🏭 월간 생산 품목 비율")
-                
-                if not df_prod.empty:
-                    # [수정] 이번 달 데이터 필터링
-                    df_month_prod = df_prod[(df_prod['날짜'] >= this_month_start) & (df_prod['날짜'] <= today)]
-                    
-                    if not df_month_prod.empty:
-                        pie_data = df_month_prod.groupby('구분')['수량'].sum().reset_index()
-                        
-                        # 비율 및 라벨 계산
-                        total_q = pie_data['수량'].sum()
-                        pie_data['비율'] = (pie_data['수량'] / total_q * 100).round(1)
-                        # [수정] 가독성을 위해 글씨가 잘리지 않도록 포맷 변경
-                        pie_data['Label'] = pie_data['수량'].astype(str) + " (" + pie_data['비율'].astype(str) + "%)"
-                        
-                        # [수정] 글씨 겹침 방지: threshold 설정 (비중이 3% 이상인 경우만 라벨 표시)
-                        pie_data['DisplayLabel'] = pie_data.apply(lambda x: x['Label'] if x['비율'] > 3 else "", axis=1)
-
-                        base = alt.Chart(pie_data).encode(
-                            theta=alt.Theta("수량", stack=True),
-                            color=alt.Color("구분", legend=alt.Legend(title="공정 구분", orient="bottom")) 
-                        )
-                        
-                        # 도넛 차트 (크기 확대)
-                        pie = base.mark_arc(outerRadius=120, innerRadius=60).encode(
-                            tooltip=["구분", "수량", "비율"]
-                        )
-                        
-                        # 텍스트 라벨 (도넛 바깥쪽에 표시하여 가독성 확보)
-                        text = base.mark_text(radius=140).encode(
-                            text="DisplayLabel",
-                            order=alt.Order("구분"),
-                            color=alt.value("black") 
-                        )
-                        
-                        # 차트 표시
-                        st.altair_chart((pie + text).properties(height=400), use_container_width=True)
-                    else:
-                        st.info("이번 달 생산 실적이 없습니다.")
-                else:
-                    st.info("데이터 없음")
+            live_panel("charts")
 
             st.markdown("---")
-            
             c3, c4 = st.columns(2)
             with c3:
-                st.subheader("🚨 실시간 NG 현황 (Today)")
-                if not df_check.empty and ng_today_cnt > 0:
-                    ng_df = df_today_unique[df_today_unique['ox'] == 'NG'][['line', 'equip_id', 'item_name', 'value', 'checker', '비고']]
-                    st.dataframe(ng_df, hide_index=True, use_container_width=True)
-                elif ng_today_cnt == 0:
-                    st.success("🎉 현재까지 발견된 NG 항목이 없습니다. (All Green)")
-                else:
-                    st.info("점검 데이터가 없습니다.")
-
+                live_panel("ng")
             with c4:
-                st.subheader("🛠 최근 설비 정비 이력 (Last 5)")
-                if not df_maint.empty:
-                    recent_maint = df_maint.sort_values("날짜", ascending=False).head(5)[['날짜', '설비명', '작업구분', '작업내용']]
-                    st.dataframe(recent_maint, hide_index=True, use_container_width=True)
-                else:
-                    st.info("정비 이력이 없습니다.")
+                live_panel("maintenance")
+
+            st.markdown("---")
+            live_panel("oee")
+
+            st.markdown("---")
+            live_panel("plan")
+
+            if len(sites.all_sites(sheets.GOOGLE_SHEET_NAME)) > 1:
+                st.markdown("---")
+                live_panel("sites")
+                shown.append("sites")
+
+            # 라이브 모드: 버전 확인만 주기 실행 (변경 없으면 전송 없음)
+            if live: st.fragment(live_poll, run_every=LIVE_INTERVAL)(shown)
 
         except Exception as e:
             st.error(f"대시보드 로딩 중 오류 발생: {e}")
@@ -654,7 +1725,7 @@ with main_holder.container():
     elif menu == "🏭 생산관리":
         # ... (이전과 동일한 탭 분리 코드, try-except 강화) ...
         try:
-            t1, t2, t3, t4 = st.tabs(["📝 실적 등록", "📦 재고 현황", "📊 스마트 생산 분석", "📑 일일 보고서"])
+            t1, t2, t3, t4, t5, t6, t7 = st.tabs(["📝 실적 등록", "📦 재고 현황", "📊 스마트 생산 분석", "📑 보고서", "📥 일괄 등록", "⚙️ OEE / 비가동", "🎯 계획 대비 실적"])
             with t1:
                 # ... (실적 등록 코드, 날짜 처리 오류 방어 추가 가능) ...
                 c1, c2 = st.columns([1, 1.5])
@@ -664,13 +1735,28 @@ with main_holder.container():
                         with st.container(border=True):
                             st.markdown("#### ✏️ 신규 생산 등록")
                             date = st.date_input("작업 일자")
-                            cat = st.selectbox("공정 구분", ["PC", "CM1", "CM3", "배전", "샘플", "후공정", "후공정 외주"])
-                            item_df = load_data(SHEET_ITEMS, COLS_ITEMS)
-                            item_map = dict(zip(item_df['품목코드'], item_df['제품명'])) if not item_df.empty else {}
+                            cat = st.selectbox("공정 구분", importer.PROCESS_TYPES)
+                            items = get_item_index()
                             def on_code():
-                                c = st.session_state.code_in.upper().strip()
-                                if c in item_map: st.session_state.name_in = item_map[c]
-                            code = st.text_input("품목 코드", key="code_in", on_change=on_code)
+                                # 정확 일치 또는 유일한 접두어 일치 시 코드/제품명 자동 입력
+                                c = st.session_state.code_in
+                                hit = items.lookup(c)
+                                if hit is not None:
+                                    st.session_state.code_in = item_index.normalize_code(c); st.session_state.name_in = hit
+                                else:
+                                    cands = items.complete(c, 2)
+                                    if len(cands) == 1: st.session_state.code_in, st.session_state.name_in = cands[0]
+                            def on_pick():
+                                picked = st.session_state.code_pick
+                                if picked: st.session_state.code_in, st.session_state.name_in = picked
+                            code = st.text_input("품목 코드", key="code_in", on_change=on_code, placeholder="코드 또는 제품명 일부 입력 후 Enter")
+                            typed = st.session_state.get("code_in", "")
+                            if typed and items.lookup(typed) is None:
+                                suggestions = items.complete(typed, 10)
+                                if suggestions:
+                                    st.selectbox("추천 품목", suggestions, index=None, format_func=lambda x: f"{x[0]} · {x[1]}", key="code_pick", on_change=on_pick, placeholder=f"일치 품목 {len(suggestions)}건 - 선택하세요")
+                                else:
+                                    st.caption("일치하는 품목이 없습니다. (신규 품목은 제품명을 직접 입력)")
                             name = st.text_input("제품명", key="name_in")
                             qty = st.number_input("생산 수량", min_value=1, value=100, key="prod_qty")
                             auto_deduct = st.checkbox("재고 차감 적용", value=True) if cat in ["후공정", "후공정 외주"] else False
@@ -706,13 +1792,14 @@ with main_holder.container():
                             to_delete = edited_df[edited_df["삭제"] == True]
                             if not to_delete.empty:
                                 try:
-                                    ws = get_worksheet(SHEET_RECORDS)
-                                    all_records = get_as_dataframe(ws)
-                                    for t in to_delete['입력시간']:
-                                        idx_to_drop = all_records[all_records['입력시간'].astype(str) == str(t)].index
-                                        all_records = all_records.drop(idx_to_drop)
-                                    
-                                    save_data(all_records, SHEET_RECORDS)
+                                    with get_write_locks().lock(SHEET_RECORDS):
+                                        current = sheets.fetch_sheet(SHEET_RECORDS, COLS_RECORDS, site=current_site())
+                                        all_records = current
+                                        for t in to_delete['입력시간']:
+                                            idx_to_drop = all_records[all_records['입력시간'].astype(str) == str(t)].index
+                                            all_records = all_records.drop(idx_to_drop)
+                                        
+                                        save_data(all_records, SHEET_RECORDS, base=current)
                                     st.success(f"{len(to_delete)}건 삭제 완료")
                                     time.sleep(1)
                                     st.rerun()
@@ -745,16 +1832,17 @@ with main_holder.container():
                         to_delete = edited_inv[edited_inv["삭제"] == True]
                         if not to_delete.empty:
                             try:
-                                ws = get_worksheet(SHEET_INVENTORY)
-                                all_inv = get_as_dataframe(ws)
-                                
-                                # 품목코드를 기준으로 삭제
-                                for code in to_delete['품목코드']:
-                                    # 품목코드가 일치하는 행 인덱스 찾기
-                                    idx_to_drop = all_inv[all_inv['품목코드'] == code].index
-                                    all_inv = all_inv.drop(idx_to_drop)
-                                
-                                save_data(all_inv, SHEET_INVENTORY)
+                                with get_write_locks().lock(SHEET_INVENTORY):
+                                    current = sheets.fetch_sheet(SHEET_INVENTORY, COLS_INVENTORY, site=current_site())
+                                    all_inv = current
+                                    
+                                    # 품목코드를 기준으로 삭제
+                                    for code in to_delete['품목코드']:
+                                        # 품목코드가 일치하는 행 인덱스 찾기
+                                        idx_to_drop = all_inv[all_inv['품목코드'] == code].index
+                                        all_inv = all_inv.drop(idx_to_drop)
+                                    
+                                    save_data(all_inv, SHEET_INVENTORY, base=current)
                                 st.success(f"{len(to_delete)}개 품목 삭제 완료")
                                 time.sleep(1)
                                 st.rerun()
@@ -801,6 +1889,8 @@ with main_holder.container():
                         else:
                             st.warning("종료 날짜를 선택해주세요.")
                             df_filtered = df.copy()
+                            start_date, end_date = min_date, max_date
+                        prod_version = get_data_version(SHEET_RECORDS, COLS_RECORDS)
 
                         if not df_filtered.empty:
                             total_qty = df_filtered['수량'].sum()
@@ -819,33 +1909,16 @@ with main_holder.container():
                             
                             with col_chart1:
                                 st.markdown("##### 📅 일별/공정별 생산 추이")
-                                if HAS_ALTAIR:
-                                    chart_data = df_filtered.groupby(['날짜', '구분'])['수량'].sum().reset_index()
-                                    bar = alt.Chart(chart_data).mark_bar().encode(
-                                        x=alt.X('날짜:T', axis=alt.Axis(format="%y-%m-%d", labelAngle=0, title="날짜")),
-                                        y=alt.Y('수량:Q', axis=alt.Axis(title="생산량")),
-                                        color=alt.Color('구분', legend=alt.Legend(title="공정", orient="top")),
-                                        tooltip=['날짜', '구분', '수량']
-                                    ).properties(height=350)
-                                    st.altair_chart(bar, use_container_width=True)
+                                if load_altair():
+                                    spec = build_production_trend_spec(start_date, end_date, prod_version)
+                                    if spec: st.vega_lite_chart(spec, use_container_width=True)
 
                             with col_chart2:
                                 st.markdown("##### 🥧 기간 내 공정 점유율")
-                                if HAS_ALTAIR:
-                                    pie_data = df_filtered.groupby('구분')['수량'].sum().reset_index()
-                                    base = alt.Chart(pie_data).encode(
-                                        theta=alt.Theta("수량", stack=True),
-                                        color=alt.Color("구분", legend=None)
-                                    )
-                                    pie = base.mark_arc(outerRadius=120, innerRadius=0).encode( 
-                                        tooltip=["구분", "수량"]
-                                    )
-                                    text = base.mark_text(radius=140).encode(
-                                        text=alt.Text("수량", format=",.0f"),
-                                        order=alt.Order("구분"),
-                                        color=alt.value("black")
-                                    )
-                                    st.altair_chart(pie + text, use_container_width=True)
+                                if load_altair():
+                                    spec = build_production_share_spec(start_date, end_date, prod_version)
+                                    if spec: st.vega_lite_chart(spec, use_container_width=True)
+                                    pie_data = get_production_share(start_date, end_date, prod_version)
                                     st.dataframe(
                                         pie_data.sort_values('수량', ascending=False).assign(비중=lambda x: (x['수량']/x['수량'].sum()*100).round(1).astype(str)+'%'),
                                         hide_index=True,
@@ -864,13 +1937,15 @@ with main_holder.container():
                 report_date = c_rep1.date_input("보고서 날짜", datetime.now())
                 
                 if c_rep2.button("📄 PDF 다운로드"):
-                    df = load_data(SHEET_RECORDS, COLS_RECORDS)
+                    df = load_data(SHEET_RECORDS, COLS_RECORDS, columns=REPORT_COLS, date_col="날짜", start=report_date, end=report_date)
                     if not df.empty:
                         df['날짜'] = pd.to_datetime(df['날짜']).dt.date
                         daily_df = df[df['날짜'] == report_date].copy()
                         daily_df = daily_df[~daily_df['구분'].astype(str).str.contains("외주")]
                         if not daily_df.empty:
-                            pdf_bytes = generate_production_report_pdf(daily_df, str(report_date))
+                            attain = get_attainment().by_line(report_date)
+                            attain = attain[~attain['구분'].astype(str).str.contains("외주")]
+                            pdf_bytes = generate_production_report_pdf(daily_df, str(report_date), attain)
                             if pdf_bytes:
                                 st.download_button(label="PDF 파일 받기", data=pdf_bytes, file_name=f"Production_Report_{report_date}.pdf", mime='application/pdf')
                             else:
@@ -880,7 +1955,7 @@ with main_holder.container():
                     else:
                         st.warning("데이터가 없습니다.")
                 
-                df = load_data(SHEET_RECORDS, COLS_RECORDS)
+                df = load_data(SHEET_RECORDS, COLS_RECORDS, columns=REPORT_COLS, date_col="날짜", start=report_date, end=report_date)
                 if not df.empty:
                     df['날짜'] = pd.to_datetime(df['날짜']).dt.date
                     daily_df = df[df['날짜'] == report_date].copy()
@@ -889,6 +1964,20 @@ with main_holder.container():
                         st.dataframe(daily_df[['구분', '품목코드', '제품명', '수량']], use_container_width=True, hide_index=True)
                     else: st.warning("해당 날짜에 생산 실적이 없습니다.")
 
+                st.divider()
+                st.markdown("#### 📊 엑셀 보고서 (XLSX)")
+                render_excel_reports()
+
+            with t5:
+                if st.session_state.user_info['role'] in ['admin', 'editor']: render_importer("production")
+                else: st.warning("쓰기 권한이 없습니다.")
+
+            with t6:
+                render_oee_analysis()
+
+            with t7:
+                render_attainment()
+
         except Exception as e: 
             st.error(f"생산관리 로딩 중 오류 발생: {e}")
 
@@ -933,48 +2022,77 @@ with main_holder.container():
                         df = df.sort_values("입력시간", ascending=False).head(50)
                         st.dataframe(df, use_container_width=True, hide_index=True)
             with t2:
+                st.markdown("#### 📋 정비 이력 조회")
                 df_hist = load_data(SHEET_MAINTENANCE, COLS_MAINTENANCE)
-                st.dataframe(df_hist, use_container_width=True)
+                if not df_hist.empty:
+                    h1, h2, h3, h4 = st.columns([2, 2, 1.5, 2])
+                    h_range = h1.date_input("작업 기간", value=(), key="hist_range")
+                    h_eq = h2.multiselect("설비ID", sorted(df_hist['설비ID'].astype(str).unique()), key="hist_eq")
+                    h_type = h3.multiselect("작업구분", sorted(t for t in df_hist['작업구분'].astype(str).unique() if t), key="hist_type")
+                    h_text = h4.text_input("작업내용 검색", key="hist_text")
+                    s1, s2, _ = st.columns([1, 1, 3])
+                    h_sort = s1.selectbox("정렬 기준", ["날짜", "입력시간", "설비ID", "작업구분", "비용", "비가동시간"], key="hist_sort")
+                    h_asc = s2.radio("정렬 순서", ["내림차순", "오름차순"], key="hist_order") == "오름차순"
+
+                    h_start, h_end = (h_range[0], h_range[-1]) if isinstance(h_range, (tuple, list)) and len(h_range) > 0 else (None, None)
+                    positions = get_query_positions(
+                        SHEET_MAINTENANCE, COLS_MAINTENANCE, get_data_version(SHEET_MAINTENANCE, COLS_MAINTENANCE),
+                        date_col="날짜", start=h_start, end=h_end,
+                        equals=(("설비ID", tuple(h_eq)), ("작업구분", tuple(h_type))),
+                        text_cols=("작업내용",), text=h_text, sort_col=h_sort, ascending=h_asc
+                    )
+                    render_paged_table(df_hist, "hist", positions, columns=[c for c in COLS_MAINTENANCE if c in df_hist.columns])
+                    render_export_buttons(df_hist, positions, "maintenance_history", "hist")
+                else:
+                    st.info("정비 이력이 없습니다.")
 
             with t3:
-                # [수정] 설비 보전관리 분석 대시보드화
+                # [수정] 설비 보전관리 분석 대시보드화 (서버 사이드 집계)
                 st.markdown("#### 📊 설비 보전 분석")
-                df = load_data(SHEET_MAINTENANCE, COLS_MAINTENANCE)
-                if not df.empty:
-                    # 데이터 전처리
-                    df['비용'] = pd.to_numeric(df['비용'], errors='coerce').fillna(0)
-                    df['비가동시간'] = pd.to_numeric(df['비가동시간'], errors='coerce').fillna(0)
-                    
-                    # KPI Cards
-                    total_cost = df['비용'].sum()
-                    total_downtime = df['비가동시간'].sum()
-                    count_maint = len(df)
-                    top_type = df['작업구분'].mode()[0] if not df.empty else "-"
+                maint_version = get_data_version(SHEET_MAINTENANCE, COLS_MAINTENANCE)
+                bounds = get_maintenance_date_bounds(maint_version)
+                if bounds:
+                    min_date, max_date = bounds
+                    default_start = max(min_date, max_date - timedelta(days=364))
+                    c_f1, c_f2 = st.columns([2, 1])
+                    m_range = c_f1.date_input("분석 기간", value=(default_start, max_date), min_value=min_date, max_value=max_date, key="maint_range")
+                    m_unit = c_f2.selectbox("집계 단위", list(analytics.PERIOD_FREQ.keys()), index=2, key="maint_unit")
+                    if isinstance(m_range, tuple) and len(m_range) == 2:
+                        m_start, m_end = m_range
+                    else:
+                        st.warning("종료 날짜를 선택해주세요.")
+                        m_start, m_end = min_date, max_date
+
+                    res = get_maintenance_analytics(m_start, m_end, analytics.PERIOD_FREQ[m_unit], maint_version)
+                    summary = res["summary"]
 
+                    # KPI Cards
                     k1, k2, k3, k4 = st.columns(4)
-                    k1.metric("총 소요 비용", f"{total_cost:,.0f} 원")
-                    k2.metric("총 비가동 시간", f"{total_downtime} 분")
-                    k3.metric("총 정비 건수", f"{count_maint} 건")
-                    k4.metric("주요 정비 유형", top_type)
+                    k1.metric("총 소요 비용", f"{summary['total_cost']:,.0f} 원")
+                    k2.metric("총 비가동 시간", f"{summary['total_downtime']:,.0f} 분")
+                    k3.metric("총 정비 건수", f"{summary['count']} 건", f"BM {summary['bm_count']} 건", delta_color="inverse")
+                    k4.metric("주요 정비 유형", summary['top_type'])
 
                     st.divider()
 
-                    # Charts
-                    if HAS_ALTAIR:
+                    # Charts (집계 결과만 Vega 스펙에 포함)
+                    alt = load_altair()
+                    if summary['count'] == 0:
+                        st.info("선택한 기간에 정비 데이터가 없습니다.")
+                    elif alt:
                         chart_col1, chart_col2 = st.columns(2)
                         
                         with chart_col1:
                             st.markdown("##### 🥧 정비 유형별 비율")
-                            # Pie chart for Maintenance Type
-                            base = alt.Chart(df).encode(
-                                theta=alt.Theta("count()", stack=True),
+                            base = alt.Chart(res["by_type"]).encode(
+                                theta=alt.Theta("건수:Q", stack=True),
                                 color=alt.Color("작업구분")
                             )
                             pie = base.mark_arc(outerRadius=120).encode(
-                                tooltip=["작업구분", "count()"]
+                                tooltip=["작업구분", "건수", alt.Tooltip("비용", format=",.0f")]
                             )
                             text = base.mark_text(radius=140).encode(
-                                text=alt.Text("count()"),
+                                text=alt.Text("건수:Q"),
                                 order=alt.Order("작업구분"),
                                 color=alt.value("black")
                             )
@@ -982,14 +2100,29 @@ with main_holder.container():
 
                         with chart_col2:
                             st.markdown("##### 💸 설비별 유지보수 비용")
-                            # Bar chart for Cost by Equipment
-                            bar = alt.Chart(df).mark_bar().encode(
-                                x=alt.X('설비명', axis=alt.Axis(labelAngle=0)), # Horizontal labels
-                                y=alt.Y('sum(비용)', axis=alt.Axis(title="비\n용", titleAngle=0, titlePadding=20)),
+                            # 설비 수가 많아도 상위 항목 + 기타로 제한
+                            cost_data = charts.cap_categories(res["by_equip"], '설비명', '비용')
+                            bar = alt.Chart(cost_data).mark_bar().encode(
+                                x=alt.X('설비명', axis=alt.Axis(labelAngle=0), sort='-y'),
+                                y=alt.Y('비용:Q', axis=alt.Axis(title="비\n용", titleAngle=0, titlePadding=20)),
                                 color='설비명',
-                                tooltip=['설비명', 'sum(비용)']
+                                tooltip=['설비명', alt.Tooltip('비용', format=",.0f")]
                             ).interactive()
                             st.altair_chart(bar, use_container_width=True)
+
+                        st.markdown(f"##### 📈 {m_unit} 비용 / 비가동 추이")
+                        trend = res["trend"].groupby("기간", as_index=False)[["비용", "비가동시간", "BM건수"]].sum().tail(charts.MAX_POINTS)
+                        base = alt.Chart(trend).encode(x=alt.X('기간:T', axis=alt.Axis(title="기간", labelAngle=0)))
+                        cost_bar = base.mark_bar(opacity=0.6).encode(y=alt.Y('비용:Q', axis=alt.Axis(title="비용")), tooltip=['기간:T', alt.Tooltip('비용', format=",.0f"), '비가동시간', 'BM건수'])
+                        down_line = base.mark_line(point=True, color="#dc2626").encode(y=alt.Y('비가동시간:Q', axis=alt.Axis(title="비가동(분)")))
+                        st.altair_chart(alt.layer(cost_bar, down_line).resolve_scale(y='independent').properties(height=300), use_container_width=True)
+
+                    st.markdown("##### 🔧 설비별 신뢰성 지표 (MTBF / MTTR)")
+                    st.caption("BM(고장) 이력 기준 · MTBF = (기간 총 시간 - 고장 비가동) / 고장 건수, MTTR = 고장 비가동 / 고장 건수")
+                    st.dataframe(
+                        res["by_equip"].rename(columns={"MTBF": "MTBF(시간)", "MTTR": "MTTR(분)", "비가동시간": "비가동(분)"}),
+                        hide_index=True, use_container_width=True
+                    )
                 else:
                     st.info("정비 데이터가 없습니다.")
 
@@ -997,7 +2130,7 @@ with main_holder.container():
 
     elif menu == "✅ 일일점검관리":
         try:
-            tab1, tab2, tab3 = st.tabs(["✍ 점검 입력 (Native)", "📊 점검 현황", "📄 점검 이력 / PDF"])
+            tab1, tab2, tab3, tab4, tab5 = st.tabs(["✍ 점검 입력 (Native)", "📊 점검 현황", "📄 점검 이력 / PDF", "📥 일괄 등록", "📈 품질 분석"])
             # ... (일일점검관리 기존 코드 유지)
             with tab1:
                 if st.session_state.get('scroll_to_top'):
@@ -1020,19 +2153,14 @@ with main_holder.container():
                 with c_date:
                     sel_date = st.date_input("점검 일자", datetime.now(), key="chk_date")
                 
-                df_res_check = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT)
+                df_res_check = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, date_col="date", start=sel_date, end=sel_date)
                 df_master_check = get_daily_check_master_data()
                 
-                total_count = len(df_master_check)
-                current_count = 0
+                # 진행률은 점검 달력 색인에서 조회 (결과 시트 재집계 없음)
+                current_count, total_count, _ = get_check_calendar().progress(sel_date)
                 
                 if not df_res_check.empty:
                     df_res_check['date_only'] = df_res_check['date'].astype(str).str.split().str[0]
-                    df_done = df_res_check[df_res_check['date_only'] == str(sel_date)]
-                    if not df_done.empty:
-                        df_done['timestamp'] = pd.to_datetime(df_done['timestamp'], errors='coerce')
-                        df_done = df_done.sort_values('timestamp').drop_duplicates(['line', 'equip_id', 'item_name'], keep='last')
-                        current_count = len(df_done)
                 
                 if total_count > 0:
                     progress = current_count / total_count
@@ -1125,7 +2253,8 @@ with main_holder.container():
                     st.markdown("---")
                     st.markdown("#### ✍️ 전자 서명 (필수)")
                     signature_data = None
-                    if HAS_CANVAS:
+                    st_canvas = load_canvas()
+                    if st_canvas:
                         canvas_result = st_canvas(fill_color="rgba(255, 165, 0, 0.3)", stroke_width=2, stroke_color="#000000", background_color="#ffffff", height=150, width=400, drawing_mode="freedraw", key=f"canvas_{selected_line}")
                         if canvas_result.image_data is not None:
                             signature_data = canvas_result.image_data
@@ -1171,9 +2300,11 @@ with main_holder.container():
                                 except: ox = 'NG'
                             rows_to_save.append([str(sel_date), row['line'], row['equip_id'], row['item_name'], final_val, ox, signer_name, str(datetime.now()), memo_val])
 
+                        # 서명은 1비트 PNG로 변환해 로컬 저장 (빈 캔버스는 None)
+                        sig_ref = save_signature(signature_data) if st_canvas and signer_name and not missing_values else None
                         if not signer_name:
                             st.error("⚠️ 점검자 성명을 입력해주세요.")
-                        elif HAS_CANVAS and (canvas_result is None or canvas_result.image_data is None):
+                        elif st_canvas and sig_ref is None:
                             st.error("⚠️ 서명(Canvas)이 누락되었습니다. 서명을 완료해주세요.")
                         elif missing_values:
                             st.error(f"⚠️ 다음 항목의 수치를 입력해야 저장할 수 있습니다:\n {', '.join(missing_values[:3])} 등")
@@ -1181,8 +2312,7 @@ with main_holder.container():
                             try:
                                 if rows_to_save:
                                     if append_rows(rows_to_save, SHEET_CHECK_RESULT, COLS_CHECK_RESULT):
-                                        sig_type = "Canvas Signature" if signature_data is not None else "Text Signature"
-                                        sig_row = [str(sel_date), selected_line, signer_name, sig_type, str(datetime.now())]
+                                        sig_row = [str(sel_date), selected_line, signer_name, sig_ref or "Text Signature", str(datetime.now())]
                                         append_rows([sig_row], SHEET_CHECK_SIGNATURE, COLS_CHECK_SIGNATURE)
                                         st.toast(f"✅ {selected_line} 점검 결과가 저장되었습니다.", icon="🎉")
                                         st.session_state['scroll_to_top'] = True
@@ -1199,7 +2329,7 @@ with main_holder.container():
                 # ... (점검 현황 탭)
                 st.markdown("##### 오늘의 점검 현황")
                 today = datetime.now().strftime("%Y-%m-%d")
-                df_res = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT)
+                df_res = load_data(SHEET_CHECK_RESULT, COLS_CHECK_RESULT, date_col="date", start=today, end=today)
                 df_master = get_daily_check_master_data()
                 if not df_res.empty:
                     df_res['date_only'] = df_res['date'].astype(str).str.split().str[0]
@@ -1225,10 +2355,15 @@ with main_holder.container():
                 
                 if ng_items > 0:
                     st.error("🚨 금일 NG 발생 항목")
-                    st.dataframe(df_today[df_today['ox']=='NG'])
+                    df_ng = df_today[df_today['ox']=='NG']
+                    render_paged_table(df_ng, "ng_today", columns=[c for c in COLS_CHECK_RESULT if c in df_ng.columns], default_size=20)
                 else:
                     if done_items == 0: st.info("오늘 점검 데이터가 아직 없습니다.")
                     elif done_items >= total_items * 0.9: st.success("오늘의 점검이 완료되었습니다.")
+
+                st.divider()
+                st.markdown("##### 🗓 점검 완료 달력")
+                render_check_calendar()
             
             with tab3:
                 # ... (PDF 출력 탭)
@@ -1241,35 +2376,73 @@ with main_holder.container():
                     else:
                         st.warning("데이터가 없습니다.")
 
+            with tab4:
+                if st.session_state.user_info['role'] in ['admin', 'editor']: render_importer("check")
+                else: st.warning("쓰기 권한이 없습니다.")
+
+            with tab5:
+                render_quality_analytics()
+
         except Exception as e:
             st.error(f"일일점검관리 로딩 중 오류 발생: {e}")
 
+    elif menu == "🔍 통합검색":
+        try:
+            st.markdown("#### 🔍 생산 · 정비 · 점검 이력 통합 검색")
+            st.caption("여러 단어는 모두 포함하는 이력만 검색됩니다. `필드:값` 형태로 조건 지정 가능 (예: `작업구분:BM 마운터 노즐`, `ox:NG 온도`)")
+            q1, q2, q3 = st.columns([3, 2, 2])
+            query = q1.text_input("검색어", key="search_query", placeholder="예: 작업구분:BM 노즐 교체")
+            src = q2.multiselect("검색 대상", list(SEARCH_SOURCES.keys()), default=list(SEARCH_SOURCES.keys()), key="search_sources")
+            s_range = q3.date_input("기간", value=(), key="search_range")
+            if query.strip():
+                t0 = time.perf_counter()
+                ix, _ = sync_search_index(src)
+                s_start, s_end = (s_range[0], s_range[-1]) if isinstance(s_range, (tuple, list)) and len(s_range) > 0 else (None, None)
+                hits = ix.search(query, sources=src, start=s_start, end=s_end, limit=200)
+                elapsed = (time.perf_counter() - t0) * 1000
+                st.caption(f"검색 결과 {len(hits)}건 · {elapsed:,.0f} ms · 색인 {len(ix):,}건")
+                if hits:
+                    res_df = pd.DataFrame([{
+                        "점수": score, "구분": source, "날짜": date.strftime("%Y-%m-%d") if pd.notna(date) else "",
+                        "내용": " · ".join(f"{k}: {v}" for k, v in shown.items() if str(v).strip())
+                    } for score, source, _, date, shown in hits])
+                    render_paged_table(res_df, "search_result", default_size=20)
+                else:
+                    st.info("검색 결과가 없습니다.")
+        except Exception as e:
+            st.error(f"검색 중 오류 발생: {e}")
+
     elif menu == "⚙ 기준정보관리":
         try:
-            t1, t2, t3 = st.tabs(["📦 품목 기준정보", "🏭 설비 기준정보", "✅ 일일점검 기준정보"])
+            t1, t2, t3, t4, t5 = st.tabs(["📦 품목 기준정보", "🏭 설비 기준정보", "✅ 일일점검 기준정보", "🔗 라인-설비", "🧾 변경 이력"])
             with t1:
                 if st.session_state.user_info['role'] == 'admin':
                     st.markdown("#### 품목 마스터 관리")
-                    df = load_data(SHEET_ITEMS, COLS_ITEMS)
-                    edited = st.data_editor(df, num_rows="dynamic", use_container_width=True, key="item_master")
-                    if st.button("품목 저장"): save_data(edited, SHEET_ITEMS); st.rerun()
-                else: st.dataframe(load_data(SHEET_ITEMS, COLS_ITEMS))
+                    render_master_editor(SHEET_ITEMS, COLS_ITEMS, "item_master", "품목 저장")
+                else: render_paged_table(load_data(SHEET_ITEMS, COLS_ITEMS), "items_view")
             with t2:
                 if st.session_state.user_info['role'] == 'admin':
                     st.markdown("#### 설비 마스터 관리")
-                    df = load_data(SHEET_EQUIPMENT, COLS_EQUIPMENT)
-                    edited = st.data_editor(df, num_rows="dynamic", use_container_width=True, key="eq_master")
-                    if st.button("설비 저장"): save_data(edited, SHEET_EQUIPMENT); st.rerun()
-                else: st.dataframe(load_data(SHEET_EQUIPMENT, COLS_EQUIPMENT))
+                    render_master_editor(SHEET_EQUIPMENT, COLS_EQUIPMENT, "eq_master", "설비 저장")
+                else: render_paged_table(load_data(SHEET_EQUIPMENT, COLS_EQUIPMENT), "equip_view")
             with t3:
                 if st.session_state.user_info['role'] == 'admin':
                     st.markdown("#### 일일점검 항목 관리 (Master)")
                     st.caption("여기서 수정한 내용은 '일일점검관리' -> '점검 입력'에 반영됩니다.")
-                    df = load_data(SHEET_CHECK_MASTER, COLS_CHECK_MASTER)
-                    edited = st.data_editor(df, num_rows="dynamic", use_container_width=True, key="check_master")
-                    if st.button("점검 기준 저장"): 
-                        save_data(edited, SHEET_CHECK_MASTER)
-                        st.rerun()
-                else: st.dataframe(load_data(SHEET_CHECK_MASTER, COLS_CHECK_MASTER))
+                    render_master_editor(SHEET_CHECK_MASTER, COLS_CHECK_MASTER, "check_master", "점검 기준 저장")
+                else: render_paged_table(load_data(SHEET_CHECK_MASTER, COLS_CHECK_MASTER), "check_master_view")
+            with t4:
+                if st.session_state.user_info['role'] == 'admin':
+                    st.markdown("#### 라인-설비 매핑 / 목표 UPH")
+                    st.caption("구분은 생산 실적의 공정 구분, 목표 UPH는 시간당 목표 생산 수량입니다. (라인 설비 중 가장 낮은 값 사용) '생산관리 > OEE / 비가동'에 반영됩니다.")
+                    render_master_editor(SHEET_LINE_EQUIPMENT, COLS_LINE_EQUIPMENT, "line_master", "매핑 저장")
+                else: render_paged_table(load_data(SHEET_LINE_EQUIPMENT, COLS_LINE_EQUIPMENT), "line_master_view")
+            with t5:
+                st.markdown("#### 변경 이력")
+                st.caption("저장 시 바뀐 행만 기록되며, 수정된 행에는 수정자/수정시간이 함께 남습니다.")
+                render_audit_log()
         except Exception as e:
-            st.error("설정 페이지 로딩 중 오류가 발생했습니다.")
\ No newline at end of file
+            st.error("설정 페이지 로딩 중 오류가 발생했습니다.")
+
+# 메뉴별 화면 생성 시간 (ms)
+metrics.observe(f"page_ms:{menu}", (time.perf_counter() - _RUN_STARTED) * 1000)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+import oee
+
+# ------------------------------------------------------------------
+# 생산 계획 대비 실적 (달성률 / 교대 진행률)
+#  - 계획: production_plan 시트 (날짜, 구분, 품목코드, 계획수량) - 품목코드가 빈 행은 라인 전체 목표
+#    라인 목표 = 라인 전체 행이 있으면 그 값, 없으면 품목별 계획 합계
+#  - 실적은 날짜별 {(구분, 품목코드): 누계}, 시간대별 {구분: 누계} 카운터로 보관
+#    실적 시트 뒤에 행이 추가되면 새 행만 카운터에 더함 (기존 행이 바뀌면 전체 재집계), 계획 시트는 작아서 바뀔 때마다 다시 읽음
+#  - 교대 진행률: 현재 교대(oee.SHIFTS) 시간대별 실적(입력시간 기준)으로 교대 종료 예상 수량 / 남은 시간당 필요 수량 계산
+#    교대 목표 = 생산일 라인 목표 x 교대 시간 비율
+# ------------------------------------------------------------------
+KEYS = ["날짜", "구분", "품목코드"]
+DAY_HOURS = oee.SHIFTS[-1][2] - oee.SHIFTS[0][1]
+
+
+def _hashes(df):
+    return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy() if df is not None and not df.empty else np.array([], dtype=np.uint64)
+
+
+def _text(s):
+    return s.fillna("").astype(str).str.strip()
+
+
+def _qty(s):
+    return pd.to_numeric(s.astype(str).str.replace(",", "", regex=False), errors="coerce").fillna(0)
+
+
+def prepare_actual(df):
+    # 생산 실적 -> [날짜, 구분, 품목코드, 수량, 시각(입력시간 정시)] (날짜 없는 행 제외)
+    if df is None or df.empty:
+        return pd.DataFrame({"날짜": pd.Series(dtype="datetime64[ns]"), "구분": pd.Series(dtype=object), "품목코드": pd.Series(dtype=object),
+                             "수량": pd.Series(dtype=float), "시각": pd.Series(dtype="datetime64[ns]")})
+    day = pd.to_datetime(df["날짜"].astype(str).str.split(" ").str[0], errors="coerce")
+    ts = pd.to_datetime(df["입력시간"].astype(str), errors="coerce", format="mixed")
+    out = pd.DataFrame({"날짜": day.to_numpy(), "구분": _text(df["구분"]).to_numpy(), "품목코드": _text(df["품목코드"]).to_numpy(),
+                        "수량": _qty(df["수량"]).to_numpy(), "시각": ts.dt.floor("h").to_numpy()})
+    return out.dropna(subset=["날짜"]).reset_index(drop=True)
+
+
+def prepare_plan(df):
+    # 계획 시트 -> [날짜, 구분, 품목코드, 계획수량] (같은 키는 합산, 날짜/구분 없는 행 제외)
+    if df is None or df.empty: return pd.DataFrame({"날짜": pd.Series(dtype="datetime64[ns]"), "구분": pd.Series(dtype=object), "품목코드": pd.Series(dtype=object), "계획수량": pd.Series(dtype=float)})
+    out = pd.DataFrame({"날짜": pd.to_datetime(df["날짜"].astype(str).str.split(" ").str[0], errors="coerce").to_numpy(),
+                        "구분": _text(df["구분"]).to_numpy(), "품목코드": _text(df["품목코드"]).to_numpy(), "계획수량": _qty(df["계획수량"]).to_numpy()})
+    out = out[out["날짜"].notna() & (out["구분"] != "")]
+    return out.groupby(KEYS, as_index=False, sort=False)["계획수량"].sum()
+
+
+def line_targets(plan, by=()):
+    # 계획 -> 라인 목표 Series[(by..., 구분)] (라인 전체 행 우선, 없으면 품목 계획 합계)
+    keys = list(by) + ["구분"]
+    total = plan[plan["품목코드"] == ""].groupby(keys)["계획수량"].sum()
+    items = plan[plan["품목코드"] != ""].groupby(keys)["계획수량"].sum()
+    return total.combine_first(items)
+
+
+def rates(df, plan="계획", made="실적"):
+    # 계획/실적 열 -> 차이, 달성률(%) (계획 없으면 달성률 빈값)
+    df = df.copy()
+    df["차이"] = df[made] - df[plan]
+    df["달성률"] = (df[made] / df[plan].where(df[plan] > 0) * 100).round(1)
+    return df
+
+
+def current_shift(now):
+    # 반환: (생산일, 교대, 시작, 종료) - 생산일 08시 이전이면 전날 야간
+    now = pd.Timestamp(now)
+    day = now.normalize()
+    if now < day + pd.Timedelta(hours=oee.DAY_START): day -= pd.Timedelta(days=1)
+    for name, a, b in oee.SHIFTS:
+        start, end = day + pd.Timedelta(hours=a), day + pd.Timedelta(hours=b)
+        if start <= now < end: return day, name, start, end
+    return day, oee.SHIFTS[-1][0], start, end
+
+
+class AttainmentTracker:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._hashes = np.array([], dtype=np.uint64)
+        self.version = None
+        self.plan = prepare_plan(None)
+        self.actual = defaultdict(Counter)  # 날짜 -> {(구분, 품목코드): 수량}
+        self.hourly = defaultdict(Counter)  # 시각(정시) -> {구분: 수량}
+
+    def sync(self, records, plan, version=None):
+        # 반환: 카운터에 더한 실적 행 수 (-1: 전체 재집계)
+        with self._lock:
+            if version is not None and version == self.version: return 0
+            self.plan = prepare_plan(plan)
+            rh = _hashes(records)
+            n = len(self._hashes)
+            if n and len(rh) >= n and np.array_equal(rh[:n], self._hashes):
+                touched = self._add(prepare_actual(records.iloc[n:]))
+            else:
+                self.actual, self.hourly = defaultdict(Counter), defaultdict(Counter)
+                self._add(prepare_actual(records))
+                touched = -1
+            self._hashes, self.version = rh, version
+            return touched
+
+    def _add(self, rows):
+        if rows.empty: return 0
+        for (day, line, code), qty in rows.groupby(KEYS, sort=False)["수량"].sum().items():
+            self.actual[day][(line, code)] += qty
+        for (hour, line), qty in rows.dropna(subset=["시각"]).groupby(["시각", "구분"], sort=False)["수량"].sum().items():
+            self.hourly[hour][line] += qty
+        return len(rows)
+
+    # -------------------- 조회 --------------------
+    def _day(self, day):
+        day = pd.Timestamp(day).normalize()
+        with self._lock:
+            act = dict(self.actual.get(day, {}))
+            plan = self.plan[self.plan["날짜"] == day]
+        return act, plan
+
+    def items(self, day, line=None):
+        # 품목별 계획 대비 실적 - 반환: DataFrame[구분, 품목코드, 계획, 실적, 차이, 달성률] (계획 또는 실적이 있는 품목)
+        act, plan = self._day(day)
+        a = pd.DataFrame([(ln, code, q) for (ln, code), q in act.items()], columns=["구분", "품목코드", "실적"])
+        p = plan[plan["품목코드"] != ""].rename(columns={"계획수량": "계획"})[["구분", "품목코드", "계획"]]
+        out = p.merge(a, on=["구분", "품목코드"], how="outer").fillna({"계획": 0.0, "실적": 0.0})
+        if line: out = out[out["구분"] == line]
+        return rates(out[["구분", "품목코드", "계획", "실적"]]).sort_values(["구분", "품목코드"]).reset_index(drop=True)
+
+    def by_line(self, day):
+        # 라인별 - 반환: DataFrame[구분, 계획, 실적, 차이, 달성률]
+        act, plan = self._day(day)
+        made = Counter()
+        for (ln, _), q in act.items(): made[ln] += q
+        target = line_targets(plan).to_dict()
+        lines = sorted(set(made) | set(target))
+        out = pd.DataFrame({"구분": lines, "계획": [float(target.get(ln, 0)) for ln in lines], "실적": [float(made[ln]) for ln in lines]})
+        return rates(out)
+
+    def trend(self, start, end, line=None):
+        # 일자 x 라인 달성률 - 반환: DataFrame[날짜, 구분, 계획, 실적, 차이, 달성률]
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        with self._lock:
+            made = [(d, ln, q) for d, c in self.actual.items() if start <= d <= end for (ln, _), q in c.items()]
+            plan = self.plan[(self.plan["날짜"] >= start) & (self.plan["날짜"] <= end)]
+        made = pd.DataFrame(made, columns=["날짜", "구분", "실적"]).groupby(["날짜", "구분"])["실적"].sum()
+        target = line_targets(plan, ["날짜"]).rename("계획")
+        out = pd.concat([target, made], axis=1).fillna(0.0).rename_axis(["날짜", "구분"]).reset_index()
+        if line: out = out[out["구분"] == line]
+        return rates(out[["날짜", "구분", "계획", "실적"]]).sort_values(["날짜", "구분"]).reset_index(drop=True)
+
+    def pace(self, now, line=None):
+        # 현재 교대 진행률 - 반환: {"day", "shift", "start", "end", "elapsed"(시간), "lines": DataFrame, "hourly": DataFrame}
+        #  lines: [구분, 교대 목표, 실적, 시간당 실적, 예상 수량, 예상 달성률, 필요 시간당]
+        #  hourly: [시각, 구분, 실적, 누계, 목표 누계] (교대 시작 ~ 현재 시각)
+        now = pd.Timestamp(now)
+        day, shift, start, end = current_shift(now)
+        length = (end - start) / pd.Timedelta(hours=1)
+        elapsed = max((now - start) / pd.Timedelta(hours=1), 1 / 60)
+        hours = pd.date_range(start, min(now, end - pd.Timedelta(hours=1)).floor("h"), freq="h")
+        with self._lock:
+            per_hour = {h: dict(self.hourly.get(h, {})) for h in hours}
+        _, plan = self._day(day)
+        share = {ln: t * length / DAY_HOURS for ln, t in line_targets(plan).to_dict().items()}
+        lines = sorted({ln for c in per_hour.values() for ln in c} | set(share))
+        if line: lines = [ln for ln in lines if ln == line]
+        hourly = pd.DataFrame([(h, ln, float(per_hour[h].get(ln, 0))) for h in hours for ln in lines], columns=["시각", "구분", "실적"])
+        if not hourly.empty:
+            hourly["누계"] = hourly.groupby("구분")["실적"].cumsum()
+            span = ((hourly["시각"] - start) / pd.Timedelta(hours=1) + 1).clip(upper=length)
+            hourly["목표 누계"] = (hourly["구분"].map(share).fillna(0) * span / length).round(0)
+        made = hourly.groupby("구분")["실적"].sum() if not hourly.empty else pd.Series(dtype=float)
+        remaining = max(length - elapsed, 0)
+        rows = []
+        for ln in lines:
+            target, done = float(share.get(ln, 0)), float(made.get(ln, 0))
+            projected = done / elapsed * length
+            rows.append({"구분": ln, "교대 목표": round(target), "실적": done, "시간당 실적": round(done / elapsed, 1), "예상 수량": round(projected),
+                         "예상 달성률": round(projected / target * 100, 1) if target > 0 else None,
+                         "필요 시간당": round(max(target - done, 0) / remaining, 1) if target > 0 and remaining > 0 else None})
+        cols = ["구분", "교대 목표", "실적", "시간당 실적", "예상 수량", "예상 달성률", "필요 시간당"]
+        return {"day": day, "shift": shift, "start": start, "end": end, "elapsed": round(min(elapsed, length), 2),
+                "lines": pd.DataFrame(rows, columns=cols), "hourly": hourly}
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import master_edit
+
+# ------------------------------------------------------------------
+# 변경 이력 (행 단위 변경 추적)
+#  - 저장할 표와 현재 시트를 행 해시로 비교해 같은 행은 건너뛰고, 키(입력시간 등)로 수정/추가/삭제 판정
+#  - 시트에는 바뀐 셀/추가 행/삭제 행만 기록 (sheets.apply_changes), 수정된 행은 수정자/수정시간 채움
+#  - 변경 내용은 audit_log 시트에 한 줄씩 추가 (수정: {컬럼: [이전, 이후]}, 추가/삭제: 행 전체)
+# ------------------------------------------------------------------
+MODIFIER_COLS = ["수정자", "수정시간"]
+ACTIONS = {"insert": "추가", "update": "수정", "delete": "삭제"}
+
+
+def normalize(df, cols):
+    # 비교용 문자열 표 (master_edit.norm 기준: 12.0 -> "12", NaN -> "")
+    if df is None or df.empty: return pd.DataFrame(columns=cols, dtype=object)
+    return df.reindex(columns=cols).apply(lambda s: s.map(master_edit.norm)).astype(object)
+
+
+def _occurrence_keys(h):
+    # 같은 내용의 행이 여러 개면 (해시, 순번)으로 개수만큼 짝지음
+    s = pd.Series(h)
+    return pd.MultiIndex.from_arrays([h, s.groupby(s).cumcount().to_numpy()])
+
+
+def key_label(values):
+    return " / ".join(str(v) for v in values)
+
+
+def diff(before, after, keys, cols, user="", now=""):
+    # before: 현재 시트 (인덱스 = 데이터 행 위치), after: 저장할 표
+    # 반환: {"cells": [(위치, 컬럼, 값)], "appends": [dict], "deletes": [위치], "events": [(작업, 키, 내용)]}
+    b, a = normalize(before, cols), normalize(after, cols).reset_index(drop=True)
+    plan = {"cells": [], "appends": [], "deletes": [], "events": []}
+    bh = pd.util.hash_pandas_object(b, index=False).to_numpy() if len(b) else np.array([], dtype=np.uint64)
+    ah = pd.util.hash_pandas_object(a, index=False).to_numpy() if len(a) else np.array([], dtype=np.uint64)
+    bk, ak = _occurrence_keys(bh), _occurrence_keys(ah)
+    b_rest, a_rest = b[~bk.isin(ak)], a[~ak.isin(bk)]
+    if b_rest.empty and a_rest.empty: return plan
+
+    # 키가 같은 행끼리 짝지어 수정으로 처리 (키가 비었거나 중복이면 삭제 + 추가)
+    valid = lambda df: df[(df[keys] != "").all(axis=1) & ~df.duplicated(keys, keep=False)]
+    pairs = valid(b_rest).reset_index(names="_pos").merge(valid(a_rest).reset_index(names="_new"), on=keys, suffixes=("", "_after"))
+    track = [c for c in cols if c not in keys]
+    stamp = [c for c in MODIFIER_COLS if c in cols]
+    for row in pairs.to_dict("records"):
+        changes = {c: [row[c], row[c + "_after"]] for c in track if row[c] != row[c + "_after"]}
+        pos, key = int(row["_pos"]), key_label(row[k] for k in keys)
+        plan["cells"].extend((pos, c, new) for c, (_, new) in changes.items())
+        if stamp and not any(c in changes for c in stamp):
+            plan["cells"].extend((pos, c, v) for c, v in zip(stamp, (user, now)))
+        plan["events"].append(("update", key, {c: v for c, v in changes.items() if c not in stamp}))
+
+    for pos, row in b_rest.drop(index=pairs["_pos"]).iterrows():
+        plan["deletes"].append(int(pos))
+        plan["events"].append(("delete", key_label(row[k] for k in keys), row.to_dict()))
+    for _, row in a_rest.drop(index=pairs["_new"]).iterrows():
+        plan["appends"].append(row.to_dict())
+        plan["events"].append(("insert", key_label(row[k] for k in keys), row.to_dict()))
+    plan["deletes"].sort()
+    return plan
+
+
+def change_events(changes, current, keys, cols):
+    # master_edit.compute_changes 결과 -> 이력 이벤트 (이전 값은 현재 시트 기준)
+    cur = master_edit._keyed(current, keys, cols)
+    events = []
+    for key, d in changes["updates"].items():
+        old = cur.get(key, (None, {}))[1]
+        events.append(("update", key_label(key), {c: [old.get(c, ""), v] for c, v in d.items()}))
+    for key, values in changes["inserts"].items():
+        events.append(("insert", key_label(key), values))
+    for key in changes["deletes"]:
+        events.append(("delete", key_label(key), cur.get(key, (None, {}))[1]))
+    return events
+
+
+def log_rows(sheet_name, events, user, now):
+    # audit_log 시트 행 (COLS_AUDIT_LOG 순서)
+    return [[str(now), sheet_name, key, ACTIONS[action], json.dumps(content, ensure_ascii=False), user] for action, key, content in events]
+
+
+def record_history(log, sheet_name, key):
+    # 한 행(키)의 변경 이력 - 최신순, 변경내용은 dict로 변환
+    if log is None or log.empty: return pd.DataFrame(columns=["시각", "작업", "사용자", "변경내용"])
+    hit = log[(log["시트"].astype(str) == sheet_name) & (log["키"].astype(str) == str(key))]
+    out = hit[["시각", "작업", "사용자"]].copy()
+    out["변경내용"] = hit["변경내용"].map(_parse)
+    return out.iloc[::-1].reset_index(drop=True)
+
+
+def _parse(text):
+    try: return json.loads(text)
+    except (TypeError, ValueError): return {}
+
+
+def describe(action, content):
+    # 이력 표시용 한 줄 요약
+    if action == ACTIONS["update"] and isinstance(content, dict):
+        return ", ".join(f"{c}: {o} → {n}" for c, (o, n) in content.items()) or "(수정자만 변경)"
+    return ", ".join(f"{c}={v}" for c, v in content.items() if v != "") if isinstance(content, dict) else str(content)
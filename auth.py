@@ -0,0 +1,131 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+
+# ------------------------------------------------------------------
+# 사용자 인증 / 세션
+#  - 비밀번호: 솔트 + PBKDF2-SHA256 (검증 성공 결과는 프로세스 내 캐시)
+#  - 세션: 임의 토큰을 URL(?session=)에 보관, 서버에는 토큰 해시와 만료 시각만 저장
+#    메모리 조회 우선(SESSION_RECHECK 초 이내 확인분), 그 외에는 SQLite 조회 (재시작/다른 프로세스에서도 이어서 사용, 다른 프로세스의 로그아웃도 반영)
+#    만료 세션은 로그인 시 정리 (프로세스당 SESSION_PURGE_INTERVAL 초에 한 번)
+# ------------------------------------------------------------------
+KDF_ITERATIONS = 200_000
+SESSION_TTL = 7 * 24 * 3600    # 세션 유효 시간 (초) - 사용 중이면 자동 연장
+SESSION_RECHECK = 5.0          # 메모리 캐시 세션을 SQLite로 다시 확인하는 주기 (초)
+SESSION_PURGE_INTERVAL = 3600  # 만료 세션 정리 주기 (초)
+SESSION_DB_ENV = "SMT_SESSION_DB"
+SESSION_DB_DEFAULT = "sessions.db"
+
+
+def hash_password(password, salt=None, iterations=KDF_ITERATIONS):
+    # 반환: "pbkdf2_sha256$반복횟수$솔트$해시"
+    salt = salt or secrets.token_hex(16)
+    dk = hashlib.pbkdf2_hmac("sha256", str(password).encode(), bytes.fromhex(salt), iterations)
+    return f"pbkdf2_sha256${iterations}${salt}${dk.hex()}"
+
+
+_verified = {}
+_verified_lock = threading.Lock()
+
+
+def verify_password(password, stored):
+    # 같은 비밀번호 재검증 시 KDF를 다시 돌리지 않음 (캐시에는 솔트 결합 해시만 보관)
+    try:
+        algo, iterations, salt, expected = stored.split("$")
+    except (AttributeError, ValueError): return False
+    if algo != "pbkdf2_sha256": return False
+    quick = hashlib.sha256(bytes.fromhex(salt) + str(password).encode()).digest()
+    with _verified_lock:
+        cached = _verified.get(stored)
+    if cached is not None: return hmac.compare_digest(cached, quick)
+    dk = hashlib.pbkdf2_hmac("sha256", str(password).encode(), bytes.fromhex(salt), int(iterations))
+    if not hmac.compare_digest(dk.hex(), expected): return False
+    with _verified_lock:
+        _verified[stored] = quick
+    return True
+
+
+def _token_key(token):
+    return hashlib.sha256(str(token).encode()).hexdigest()
+
+
+class SessionStore:
+    def __init__(self, path, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._mem = {}   # 토큰 해시 -> (사용자 ID, 만료 시각, 확인 시각)
+        self._purged = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conn().execute("CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, user_id TEXT, expires REAL)")
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return con
+
+    def create(self, user_id):
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        key, expires = _token_key(token), now + self.ttl
+        self._conn().execute("INSERT OR REPLACE INTO sessions (token, user_id, expires) VALUES (?, ?, ?)", (key, user_id, expires))
+        with self._lock:
+            self._mem[key] = (user_id, expires, now)
+            purge = now - self._purged > SESSION_PURGE_INTERVAL
+            if purge: self._purged = now
+        if purge: self.purge()
+        return token
+
+    def resume(self, token):
+        # 반환: 사용자 ID (없거나 만료 시 None) - 남은 시간이 절반 이하이면 연장
+        if not token: return None
+        key, now = _token_key(token), time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+        if hit is None or now - hit[2] > SESSION_RECHECK:
+            # 다른 프로세스에서 로그아웃(삭제)/연장했을 수 있으므로 행을 다시 확인
+            row = self._conn().execute("SELECT user_id, expires FROM sessions WHERE token=?", (key,)).fetchone()
+            if row is None:
+                with self._lock:
+                    self._mem.pop(key, None)
+                return None
+            hit = (row[0], row[1], now)
+        user_id, expires, checked = hit
+        if expires < now:
+            self.revoke(token)
+            return None
+        if expires - now < self.ttl / 2:
+            expires = now + self.ttl
+            self._conn().execute("UPDATE sessions SET expires=? WHERE token=?", (expires, key))
+        with self._lock:
+            self._mem[key] = (user_id, expires, checked)
+        return user_id
+
+    def revoke(self, token):
+        key = _token_key(token)
+        with self._lock:
+            self._mem.pop(key, None)
+        self._conn().execute("DELETE FROM sessions WHERE token=?", (key,))
+
+    def purge(self):
+        # 만료 세션 정리 - 반환: 삭제 건수
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, exp, _) in self._mem.items() if exp < now]: del self._mem[key]
+        return self._conn().execute("DELETE FROM sessions WHERE expires < ?", (now,)).rowcount
+
+
+def open_sessions(path=None):
+    return SessionStore(path or os.environ.get(SESSION_DB_ENV) or SESSION_DB_DEFAULT)
+
+
+if __name__ == "__main__":
+    # 사용자 추가 시 비밀번호 해시 생성: python auth.py <비밀번호>
+    if len(sys.argv) != 2: sys.exit("usage: python auth.py <password>")
+    print(hash_password(sys.argv[1]))
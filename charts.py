@@ -0,0 +1,46 @@
+import pandas as pd
+
+# ------------------------------------------------------------------
+# 차트 데이터 예산 관리
+#  - Vega-Lite 스펙 크기는 행 수에 비례하므로 항상 pandas에서 먼저 집계
+#  - 시계열은 max_points를 넘으면 일 -> 주 -> 월 단위로 자동 버킷팅
+# ------------------------------------------------------------------
+MAX_POINTS = 400
+MAX_CATEGORIES = 12
+TIME_BUCKETS = [("D", "일", "%m-%d"), ("W", "주", "%m-%d"), ("M", "월", "%y-%m")]
+
+
+def bucket_time(df, date_col, value_cols, group_cols=(), max_points=MAX_POINTS, agg="sum"):
+    # 반환: (집계 DataFrame, 단위 라벨, 축 포맷)
+    if isinstance(value_cols, str): value_cols = [value_cols]
+    keys = [date_col] + list(group_cols)
+    g = pd.DataFrame(columns=keys + list(value_cols))
+    label, fmt = TIME_BUCKETS[0][1], TIME_BUCKETS[0][2]
+    if df.empty: return g, label, fmt
+    for freq, label, fmt in TIME_BUCKETS:
+        bucket = df[date_col].dt.to_period(freq).dt.start_time
+        g = df.assign(**{date_col: bucket}).groupby(keys, as_index=False)[list(value_cols)].agg(agg)
+        if len(g) <= max_points: break
+    if len(g) > max_points:
+        # 월 단위로도 초과하면 최근 구간만 유지
+        g = g.sort_values(date_col).tail(max_points)
+    return g.reset_index(drop=True), label, fmt
+
+
+def cap_categories(df, cat_col, value_col, max_items=MAX_CATEGORIES, other_label="기타"):
+    # 상위 max_items 범주만 남기고 나머지는 '기타'로 합산
+    g = df.groupby(cat_col, as_index=False)[value_col].sum().sort_values(value_col, ascending=False)
+    if len(g) <= max_items: return g.reset_index(drop=True)
+    head = g.head(max_items - 1)
+    rest = pd.DataFrame([{cat_col: other_label, value_col: g[value_col].iloc[max_items - 1:].sum()}])
+    return pd.concat([head, rest], ignore_index=True)
+
+
+def cap_series_groups(df, group_col, value_col, max_groups=MAX_CATEGORIES, other_label="기타"):
+    # 시계열의 범례(그룹) 수 제한 - 상위 그룹 외에는 '기타'로 묶음
+    if df.empty or df[group_col].nunique() <= max_groups: return df
+    top = df.groupby(group_col)[value_col].sum().nlargest(max_groups - 1).index
+    out = df.copy()
+    out[group_col] = out[group_col].where(out[group_col].isin(top), other_label)
+    keys = [c for c in out.columns if c != value_col]
+    return out.groupby(keys, as_index=False)[value_col].sum()
@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import quality
+
+# ------------------------------------------------------------------
+# 점검 완료 달력 (일자 x 라인 비트맵 색인)
+#  - 점검 기준(daily_check_master) 항목마다 라인 내 비트 번호를 부여
+#  - (날짜, 라인)마다 완료/NG 비트셋(정수) 2개만 보관 -> 완료수/NG수/미점검 항목은 비트 연산으로 조회
+#  - 같은 날 같은 항목을 다시 저장하면 최신 1건 기준 (품질 분석/대시보드와 동일)
+#  - 결과 시트 뒤에 행만 추가되면 새 행의 날짜만 다시 계산, 점검 기준이 바뀌면 전체 재구성
+# ------------------------------------------------------------------
+KEYS = quality.KEYS
+
+
+def _hashes(df):
+    return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy() if df is not None and not df.empty else np.array([], dtype=np.uint64)
+
+
+def _bits(positions):
+    out = 0
+    for p in positions: out |= 1 << int(p)
+    return out
+
+
+class CheckCalendar:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._hashes = np.array([], dtype=np.uint64)
+        self._master = None
+        self.version = None
+        self.items = {}   # 라인 -> [(equip_id, item_name)] (비트 순서)
+        self.full = {}    # 라인 -> 전체 항목 비트셋
+        self._bit = pd.Series(dtype=float)  # (line, equip_id, item_name) -> 비트 번호
+        self.typed = quality.prepare_checks(pd.DataFrame())
+        self.cells = {}   # (날짜, 라인) -> (완료 비트셋, NG 비트셋)
+
+    def sync(self, results, master, version=None):
+        # 반환: 다시 계산한 날짜 수 (-1: 전체 재구성)
+        with self._lock:
+            if version is not None and version == self.version: return 0
+            mh = _hashes(master)
+            rh = _hashes(results)
+            n = len(self._hashes)
+            if self._master is not None and np.array_equal(mh, self._master) and n and len(rh) >= n and np.array_equal(rh[:n], self._hashes):
+                new = quality.prepare_checks(results.iloc[n:], n)
+                self.typed = pd.concat([self.typed, new]) if not self.typed.empty else new
+                touched = self._rebuild_days(new["날짜"].unique())
+            else:
+                self._index(master)
+                self.typed = quality.prepare_checks(results if results is not None else pd.DataFrame())
+                self.cells = {}
+                self._rebuild_days(None)
+                touched = -1
+            self._hashes, self._master, self.version = rh, mh, version
+            return touched
+
+    def _index(self, master):
+        m = master.reindex(columns=KEYS).fillna("").astype(str).apply(lambda s: s.str.strip()) if master is not None and not master.empty else pd.DataFrame(columns=KEYS)
+        m = m[m["line"] != ""].drop_duplicates(KEYS)
+        pos = m.groupby("line", sort=False).cumcount()
+        self._bit = pd.Series(pos.to_numpy(), index=pd.MultiIndex.from_frame(m[KEYS]))
+        self.items = {line: list(zip(g["equip_id"], g["item_name"])) for line, g in m.groupby("line", sort=False)}
+        self.full = {line: (1 << len(v)) - 1 for line, v in self.items.items()}
+
+    def _rebuild_days(self, days):
+        typed = self.typed if days is None else self.typed[self.typed["날짜"].isin(days)]
+        if days is not None:
+            days = set(pd.to_datetime(days))
+            self.cells = {k: v for k, v in self.cells.items() if k[0] not in days}
+        latest = quality.latest_per_day(typed)
+        if latest.empty or self._bit.empty: return len(days or ())
+        bit = self._bit.reindex(pd.MultiIndex.from_frame(latest[KEYS])).to_numpy()
+        latest = latest.assign(_bit=bit)[~np.isnan(bit)]
+        for (day, line), g in latest.groupby(["날짜", "line"], sort=False):
+            self.cells[(day, line)] = (_bits(g["_bit"]), _bits(g.loc[g["ng"], "_bit"]))
+        return len(days) if days is not None else len(self.cells)
+
+    # -------------------- 조회 --------------------
+    def lines(self):
+        return list(self.items)
+
+    def progress(self, day, line=None):
+        # 반환: (완료수, 전체수, NG수) - line 없으면 전체 라인 합계
+        day = pd.Timestamp(day).normalize()
+        done = total = ng = 0
+        for ln in ([line] if line else self.items):
+            d, n = self.cells.get((day, ln), (0, 0))
+            done += d.bit_count(); ng += n.bit_count(); total += self.full.get(ln, 0).bit_count()
+        return done, total, ng
+
+    def grid(self, start, end):
+        # 기간 x 라인 완료 현황 - 반환: DataFrame[날짜, line, 완료, 전체, NG, 미점검, 완료율]
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+        cols = ["날짜", "line", "완료", "전체", "NG", "미점검", "완료율"]
+        if not len(days) or not self.items: return pd.DataFrame(columns=cols)
+        rows = []
+        with self._lock:
+            cells, full = self.cells, self.full
+        for day in days:
+            for line, mask in full.items():
+                d, n = cells.get((day, line), (0, 0))
+                rows.append((day, line, d.bit_count(), mask.bit_count(), n.bit_count()))
+        out = pd.DataFrame(rows, columns=cols[:5])
+        out["미점검"] = out["전체"] - out["완료"]
+        out["완료율"] = (out["완료"] / out["전체"].where(out["전체"] > 0) * 100).round(1).fillna(0)
+        return out
+
+    def missing(self, day, line):
+        # 미점검 항목 [(equip_id, item_name)]
+        d, _ = self.cells.get((pd.Timestamp(day).normalize(), line), (0, 0))
+        return [it for i, it in enumerate(self.items.get(line, [])) if not d >> i & 1]
+
+    def ng_items(self, day, line):
+        _, n = self.cells.get((pd.Timestamp(day).normalize(), line), (0, 0))
+        return [it for i, it in enumerate(self.items.get(line, [])) if n >> i & 1]
@@ -0,0 +1,100 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+import quality
+import shared_store
+from sheets import SHEET_CHECK_RESULT, COLS_CHECK_RESULT
+
+# ------------------------------------------------------------------
+# 일일점검 결과 정리 (중복 저장분 압축)
+#  - 점검 화면에서 같은 라인을 다시 저장하면 전체 행이 새로 추가되므로
+#    마감된 날짜는 (date, line, equip_id, item_name)별 최신 1건만 남김
+#  - 밀려난 행은 삭제 전에 gzip CSV 보관 파일로 이동 (SMT_ARCHIVE_DIR, 기본 archive/)
+#  - 시트를 다시 쓰지 않고 해당 행만 삭제 -> 정리 중 뒤에 추가되는 행과 충돌 없음
+#  실행(야간 cron 권장): python compaction.py [--keep-days 2] [--dry-run]
+# ------------------------------------------------------------------
+ARCHIVE_DIR_ENV = "SMT_ARCHIVE_DIR"
+ARCHIVE_DIR_DEFAULT = "archive"
+KEEP_DAYS = 2  # 오늘 포함 최근 며칠은 재저장 가능성이 있어 정리하지 않음
+
+
+def cutoff(keep_days=KEEP_DAYS, today=None):
+    # 이 날짜 이전(미포함)만 정리
+    return pd.Timestamp(today or pd.Timestamp.now()).normalize() - pd.Timedelta(days=max(keep_days - 1, 0))
+
+
+def plan(df, before):
+    # 반환: 밀려난 행 DataFrame (인덱스 = 시트 데이터 행 위치)
+    #  최신 판정은 품질 분석과 같은 기준 (입력시간, 같으면 시트 순서), 날짜를 읽을 수 없는 행은 대상 아님
+    if df.empty: return df.iloc[:0]
+    typed = quality.prepare_checks(df.reset_index(drop=True))
+    typed = typed[typed["날짜"] < pd.Timestamp(before)]
+    latest = quality.latest_per_day(typed)
+    stale = typed.index.difference(latest.index)
+    return df.iloc[stale]
+
+
+def archive_dir(root=None, sheet_name=SHEET_CHECK_RESULT):
+    return os.path.join(root or os.environ.get(ARCHIVE_DIR_ENV) or ARCHIVE_DIR_DEFAULT, sheet_name)
+
+
+def write_archive(rows, sheet_name=SHEET_CHECK_RESULT, root=None, stamp=None):
+    # 실행 1회당 파일 1개 (임시 파일 후 교체) - 반환: (경로, 압축 크기)
+    stamp = pd.Timestamp(stamp or pd.Timestamp.now())
+    folder = archive_dir(root, sheet_name)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{stamp:%Y%m%d-%H%M%S-%f}.csv.gz")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    rows.assign(archived_at=str(stamp)).to_csv(tmp, index=False, compression="gzip", encoding="utf-8")
+    os.replace(tmp, path)
+    return path, os.path.getsize(path)
+
+
+def read_archive(sheet_name=SHEET_CHECK_RESULT, root=None):
+    # 보관된 이전 저장분 전체 (감사/복원 조회용)
+    folder = archive_dir(root, sheet_name)
+    files = sorted(f for f in os.listdir(folder) if f.endswith(".csv.gz")) if os.path.isdir(folder) else []
+    if not files: return pd.DataFrame(columns=COLS_CHECK_RESULT + ["archived_at"])
+    return pd.concat([pd.read_csv(os.path.join(folder, f), dtype=str, keep_default_na=False) for f in files], ignore_index=True)
+
+
+def compact(fetch, delete, locks, before, root=None, dry_run=False):
+    # fetch(sheet, cols) -> DataFrame, delete(sheet, positions) -> bool
+    # 반환: 정리 결과 {rows, removed, days, cells, bytes, archive, archive_bytes, seconds, error}
+    t0 = time.perf_counter()
+    with locks.lock(SHEET_CHECK_RESULT):
+        df = fetch(SHEET_CHECK_RESULT, COLS_CHECK_RESULT)
+        stale = plan(df, before)
+        report = {
+            "rows": len(df), "removed": len(stale),
+            "days": int(stale["date"].astype(str).str.split(" ").str[0].nunique()) if len(stale) else 0,
+            "cells": len(stale) * len(COLS_CHECK_RESULT),
+            "bytes": int(stale.astype(str).apply(lambda s: s.str.len()).to_numpy().sum()) if len(stale) else 0,
+            "archive": None, "archive_bytes": 0, "error": None,
+        }
+        if not dry_run and len(stale):
+            # 보관 파일을 먼저 남기고 삭제 - 삭제 실패 시 보관 파일 제거 (다음 실행에서 다시 보관)
+            path, size = write_archive(stale, root=root)
+            if delete(SHEET_CHECK_RESULT, stale.index.tolist()):
+                report.update(archive=path, archive_bytes=size)
+            else:
+                os.remove(path)
+                report["error"] = "행 삭제 실패"
+    report["seconds"] = round(time.perf_counter() - t0, 2)
+    return report
+
+
+if __name__ == "__main__":
+    import sheets
+    parser = argparse.ArgumentParser(description="일일점검 결과 중복 저장분 정리")
+    parser.add_argument("--keep-days", type=int, default=KEEP_DAYS, help="정리하지 않을 최근 일수 (오늘 포함)")
+    parser.add_argument("--dry-run", action="store_true", help="삭제 없이 대상만 집계")
+    args = parser.parse_args()
+    locks = shared_store.open_store() or shared_store.LocalLocks()
+    res = compact(sheets.fetch_sheet, sheets.delete_positions, locks, cutoff(args.keep_days), dry_run=args.dry_run)
+    print(f"전체 {res['rows']:,}행 중 {res['removed']:,}행 정리 ({res['days']}일, 셀 {res['cells']:,}개, 약 {res['bytes'] / 1024:,.1f}KB)"
+          + (f" -> {res['archive']} ({res['archive_bytes'] / 1024:,.1f}KB)" if res["archive"] else "")
+          + (f" 오류: {res['error']}" if res["error"] else "") + f" [{res['seconds']}초]")
@@ -0,0 +1,213 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+# ------------------------------------------------------------------
+# 프로세스 공용 데이터 허브
+#  - 백그라운드 스레드 하나가 모든 시트를 주기적으로 동기화
+#  - 내용이 바뀐 경우에만 버전을 올려 스냅샷 발행
+#  - 세션은 스냅샷을 구독만 하므로 구글 조회 횟수는 접속자 수와 무관
+#  - 공유 저장소(shared_store) 지정 시 여러 프로세스 중 하나만 구글을 조회하고
+#    나머지는 공유 캐시의 스냅샷을 가져옴
+# ------------------------------------------------------------------
+DEFAULT_INTERVAL = 5.0
+PULL_INTERVAL = 1.0  # 공유 저장소 모드에서 다른 프로세스의 발행 여부 확인 주기
+IDLE_AFTER = 600.0   # 이 시간 동안 아무도 조회하지 않은 시트는 동기화 중지
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    df: pd.DataFrame
+    digest: str
+    fetched_at: float
+
+
+def frame_digest(df):
+    if df.empty: return "empty:" + ",".join(map(str, df.columns))
+    return hashlib.md5(pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy().tobytes()).hexdigest()
+
+
+class DataHub:
+    def __init__(self, fetch, interval=DEFAULT_INTERVAL, intervals=None, idle_after=IDLE_AFTER, store=None):
+        # fetch(sheet_name, cols) -> DataFrame (실제 구글 조회 함수)
+        self._fetch = fetch
+        self._store = store
+        self._poll_due = {}
+        self._interval = interval
+        self._intervals = dict(intervals or {})
+        self._idle_after = idle_after
+        self._cols = {}
+        self._snapshots = {}
+        self._last_access = {}
+        self._due = {}
+        self._fetch_locks = {}
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"fetches": 0, "errors": 0, "published": 0, "pulled": 0}
+
+    # -------------------- 구독 --------------------
+    def get(self, sheet_name, cols=None, copy=True):
+        # 현재 스냅샷 조회 (최초 조회 또는 장시간 미사용 후에만 동기 로드)
+        snap = self.snapshot(sheet_name, cols)
+        return snap.df.copy() if copy else snap.df
+
+    def snapshot(self, sheet_name, cols=None):
+        self._register(sheet_name, cols)
+        snap = self._snapshots.get(sheet_name)
+        if snap is None and self._store is not None:
+            # 다른 프로세스가 최근에 발행한 스냅샷이 있으면 구글 조회 없이 사용
+            snap = self._pull(sheet_name, max_age=self._interval_of(sheet_name) * 2)
+        if snap is None or time.time() - snap.fetched_at > self._idle_after:
+            snap = self.refresh(sheet_name)
+        return snap
+
+    def version(self, sheet_name, cols=None):
+        return self.snapshot(sheet_name, cols).version
+
+    def versions(self, sheet_names=None):
+        # 시트 목록을 지정한 조회는 구독으로 간주 (유휴 판정 갱신)
+        if sheet_names:
+            now = time.monotonic()
+            with self._cond:
+                for n in sheet_names:
+                    if n in self._last_access: self._last_access[n] = now
+        names = sheet_names or list(self._snapshots)
+        return {n: self._snapshots[n].version for n in names if n in self._snapshots}
+
+    def wait_for_change(self, known, timeout=None):
+        # known: {시트: 버전} - 하나라도 바뀌면 바뀐 시트 목록 반환, 시간 초과 시 빈 목록
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                changed = [n for n, v in known.items() if n in self._snapshots and self._snapshots[n].version != v]
+                if changed: return changed
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0: return []
+                self._cond.wait(remaining)
+
+    # -------------------- 동기화 --------------------
+    def _register(self, sheet_name, cols, touch=True):
+        now = time.monotonic()
+        with self._cond:
+            if sheet_name not in self._cols:
+                self._cols[sheet_name] = cols
+                self._fetch_locks[sheet_name] = threading.Lock()
+                self._due[sheet_name] = now + self._tick_of(sheet_name)
+                self._poll_due[sheet_name] = now + self._interval_of(sheet_name)
+                self._last_access[sheet_name] = now
+            elif cols and not self._cols[sheet_name]:
+                self._cols[sheet_name] = cols
+            if touch: self._last_access[sheet_name] = now
+
+    def refresh(self, sheet_name, cols=None):
+        # 즉시 동기화 (쓰기 직후 호출) - 같은 시트에 대한 동시 조회는 한 번만 수행
+        self._register(sheet_name, cols, touch=False)
+        lock = self._fetch_locks[sheet_name]
+        with lock:
+            try:
+                df = self._fetch(sheet_name, self._cols.get(sheet_name))
+                self.stats["fetches"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+                prev = self._snapshots.get(sheet_name)
+                if prev is not None: return prev
+                df = pd.DataFrame(columns=self._cols.get(sheet_name) or [])
+            return self._publish(sheet_name, df)
+
+    def _interval_of(self, sheet_name):
+        return self._intervals.get(sheet_name, self._interval)
+
+    def _tick_of(self, sheet_name):
+        # 공유 저장소 모드에서는 짧은 주기로 공유 캐시만 확인
+        interval = self._interval_of(sheet_name)
+        return min(interval, PULL_INTERVAL) if self._store is not None else interval
+
+    def _publish(self, sheet_name, df):
+        digest = frame_digest(df)
+        now = time.monotonic()
+        shared_version = None
+        if self._store is not None:
+            try: shared_version = self._store.publish(sheet_name, digest, df)
+            except Exception: self.stats["errors"] += 1
+        with self._cond:
+            self._due[sheet_name] = now + self._tick_of(sheet_name)
+            self._poll_due[sheet_name] = now + self._interval_of(sheet_name)
+            prev = self._snapshots.get(sheet_name)
+            if prev is not None and prev.digest == digest:
+                snap = Snapshot(prev.version, prev.df, digest, time.time())
+            else:
+                version = shared_version if shared_version is not None else ((prev.version + 1) if prev else 1)
+                snap = Snapshot(version, df, digest, time.time())
+                self.stats["published"] += 1
+            self._snapshots[sheet_name] = snap
+            self._cond.notify_all()
+            return snap
+
+    def _pull(self, sheet_name, max_age=None):
+        # 공유 캐시에 더 새로운 버전이 있으면 가져옴 - 반환: 현재 스냅샷 (없으면 None)
+        head = self._store.head(sheet_name)
+        prev = self._snapshots.get(sheet_name)
+        if head is None or (max_age is not None and time.time() - head[2] > max_age): return prev
+        if prev is not None and prev.digest == head[1]: return prev
+        loaded = self._store.load(sheet_name)
+        if loaded is None: return prev
+        version, digest, fetched_at, df = loaded
+        with self._cond:
+            self._due[sheet_name] = time.monotonic() + self._tick_of(sheet_name)
+            snap = self._snapshots[sheet_name] = Snapshot(version, df, digest, fetched_at)
+            self.stats["pulled"] += 1
+            self._cond.notify_all()
+            return snap
+
+    def _sync(self, sheet_name):
+        # 주기 동기화 - 공유 저장소 모드에서는 조회 임대를 가진 프로세스만 구글 조회
+        if self._store is None: return self.refresh(sheet_name)
+        now = time.monotonic()
+        interval = self._interval_of(sheet_name)
+        try:
+            if self._poll_due.get(sheet_name, 0) <= now and self._store.try_lease(f"poll:{sheet_name}", ttl=interval * 3):
+                return self.refresh(sheet_name)
+            snap = self._pull(sheet_name)
+        except Exception:
+            self.stats["errors"] += 1
+            snap = None
+        with self._cond:
+            self._due[sheet_name] = now + self._tick_of(sheet_name)
+        return snap
+
+    def invalidate(self, sheet_name=None):
+        # 다음 주기를 기다리지 않고 백그라운드에서 곧바로 동기화
+        with self._cond:
+            for n in ([sheet_name] if sheet_name else list(self._due)):
+                if n in self._due: self._due[n] = self._poll_due[n] = 0
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            now = time.monotonic()
+            with self._cond:
+                active = [n for n in self._due if now - self._last_access.get(n, 0) < self._idle_after]
+                due = [n for n in active if self._due[n] <= now]
+                next_due = min([self._due[n] for n in active if n not in due] or [now + self._interval])
+            for n in due:
+                if self._stop.is_set(): break
+                self._sync(n)
+            if not due:
+                self._wake.wait(max(0.05, min(next_due - now, self._interval)))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="data-hub", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
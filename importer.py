@@ -0,0 +1,195 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from item_index import normalize_code
+from sheets import COLS_RECORDS, COLS_CHECK_RESULT
+
+# ------------------------------------------------------------------
+# 생산 실적 / 점검 결과 일괄 등록 (MES 내보내기 등 XLSX/CSV)
+#  - 파일을 청크 단위로 읽어 컬럼별 벡터 연산으로 검증
+#  - 청크마다 append_rows 1회로 기록, 재고는 품목코드별 순증감만 마지막에 1회 반영
+# ------------------------------------------------------------------
+IMPORT_CHUNK = 2000
+PROCESS_TYPES = ["PC", "CM1", "CM3", "배전", "샘플", "후공정", "후공정 외주"]
+DEDUCT_TYPES = ["후공정", "후공정 외주"]  # 재고 차감 대상 공정
+OX_VALUES = ["OK", "NG"]
+
+KINDS = {
+    # 종류: (필수 컬럼, 선택 컬럼)
+    "production": (["날짜", "구분", "품목코드", "수량"], ["제품명", "입력시간", "작성자"]),
+    "check": (["date", "line", "equip_id", "item_name", "value", "ox"], ["checker", "timestamp", "비고"]),
+}
+
+
+def read_chunks(data, filename, chunksize=IMPORT_CHUNK):
+    # 반환: 문자열 DataFrame 청크 이터레이터 (머리글 1행 기준)
+    name = filename.lower()
+    if name.endswith(".csv"):
+        yield from _csv_chunks(data, chunksize)
+    elif name.endswith(".xlsx"):
+        yield from _xlsx_chunks(data, chunksize)
+    elif name.endswith(".xls"):
+        # xlrd는 스트리밍 미지원 - 읽은 뒤 청크로 분할
+        df = pd.read_excel(io.BytesIO(data), dtype=str, engine="xlrd").fillna("")
+        for i in range(0, len(df), chunksize): yield df.iloc[i:i + chunksize].reset_index(drop=True)
+    else:
+        raise ValueError("지원하지 않는 파일 형식입니다. (xlsx, xls, csv)")
+
+
+def _csv_chunks(data, chunksize):
+    # MES 내보내기는 CP949인 경우가 많아 UTF-8 실패 시 재시도
+    for enc in ("utf-8-sig", "cp949"):
+        try:
+            data.decode(enc)
+        except UnicodeDecodeError: continue
+        reader = pd.read_csv(io.BytesIO(data), dtype=str, encoding=enc, chunksize=chunksize, keep_default_na=False, quoting=csv.QUOTE_MINIMAL)
+        for chunk in reader: yield chunk.reset_index(drop=True)
+        return
+    raise ValueError("CSV 인코딩을 확인할 수 없습니다. (UTF-8 또는 CP949)")
+
+
+def _xlsx_chunks(data, chunksize):
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        buf = []
+        for row in rows:
+            buf.append(["" if v is None else str(v) for v in row[:len(header)]])
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf: yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
+
+def missing_columns(chunk, kind):
+    required, _ = KINDS[kind]
+    cols = [str(c).strip() for c in chunk.columns]
+    return [c for c in required if c not in cols]
+
+
+def _frame(chunk, kind):
+    required, optional = KINDS[kind]
+    chunk = chunk.rename(columns=lambda c: str(c).strip())
+    return chunk.reindex(columns=required + optional, fill_value="").fillna("").astype(str).apply(lambda s: s.str.strip())
+
+
+def _dates(s):
+    # 문자열/엑셀 날짜 모두 YYYY-MM-DD로 정규화 (실패 시 NaT)
+    return pd.to_datetime(s.where(s != ""), errors="coerce").dt.normalize()
+
+
+def _result(out, reasons, offset):
+    # 반환: (정상 행 DataFrame, 오류 DataFrame[행, 사유])
+    bad = reasons != ""
+    rows = np.flatnonzero(bad.to_numpy()) + offset + 2  # 파일 행 번호 (머리글 1행)
+    errors = pd.DataFrame({"행": rows, "사유": reasons[bad].str.rstrip(", ").to_numpy()})
+    return out[~bad.to_numpy()].reset_index(drop=True), errors
+
+
+def _add_reason(reasons, mask, text):
+    return reasons.where(~mask, reasons + text + ", ")
+
+
+def validate_production(chunk, items, offset=0, user="", stamp=None):
+    # items: item_index.ItemIndex - 품목코드 존재 여부 확인 및 제품명 보완
+    df = _frame(chunk, "production")
+    reasons = pd.Series("", index=df.index)
+    dates = _dates(df["날짜"])
+    reasons = _add_reason(reasons, dates.isna(), "날짜 오류")
+    reasons = _add_reason(reasons, ~df["구분"].isin(PROCESS_TYPES), "공정 구분 오류")
+    codes = df["품목코드"].map(normalize_code)
+    names = codes.map(items.by_code)
+    reasons = _add_reason(reasons, names.isna(), "미등록 품목코드")
+    qty = pd.to_numeric(df["수량"].str.replace(",", "", regex=False), errors="coerce")
+    reasons = _add_reason(reasons, ~((qty > 0) & (qty % 1 == 0)), "수량 오류")
+
+    out = pd.DataFrame({
+        "날짜": dates.dt.strftime("%Y-%m-%d"),
+        "구분": df["구분"],
+        "품목코드": codes,
+        "제품명": df["제품명"].where(df["제품명"] != "", names),
+        "수량": qty.fillna(0).astype("int64"),
+        # 입력시간은 행 삭제 시 식별자로도 쓰이므로 파일에 없으면 행마다 고유하게 부여
+        "입력시간": df["입력시간"].where(df["입력시간"] != "", _stamps(stamp, offset, len(df))),
+        "작성자": df["작성자"].where(df["작성자"] != "", user),
+        "수정자": "",
+        "수정시간": "",
+    }, columns=COLS_RECORDS)
+    return _result(out, reasons, offset)
+
+
+def validate_checks(chunk, master, offset=0, user="", stamp=None):
+    # master: 일일점검 기준정보 - (line, equip_id, item_name) 조합이 등록된 항목만 허용
+    df = _frame(chunk, "check")
+    reasons = pd.Series("", index=df.index)
+    dates = _dates(df["date"])
+    reasons = _add_reason(reasons, dates.isna(), "날짜 오류")
+    keys = ["line", "equip_id", "item_name"]
+    known = master[keys].astype(str).apply(lambda s: s.str.strip()).drop_duplicates()
+    hit = df[keys].merge(known, on=keys, how="left", indicator=True)["_merge"].eq("both").to_numpy()
+    reasons = _add_reason(reasons, pd.Series(~hit, index=df.index), "미등록 점검 항목")
+    ox = df["ox"].str.upper()
+    reasons = _add_reason(reasons, ~ox.isin(OX_VALUES), "OX 오류")
+
+    out = pd.DataFrame({
+        "date": dates.dt.strftime("%Y-%m-%d"),
+        "line": df["line"], "equip_id": df["equip_id"], "item_name": df["item_name"],
+        "value": df["value"], "ox": ox,
+        "checker": df["checker"].where(df["checker"] != "", user),
+        "timestamp": df["timestamp"].where(df["timestamp"] != "", _stamps(stamp, offset, len(df))),
+        "비고": df["비고"],
+    }, columns=COLS_CHECK_RESULT)
+    return _result(out, reasons, offset)
+
+
+def _stamps(stamp, offset, n):
+    base = pd.Timestamp(stamp) if stamp is not None else pd.Timestamp.now()
+    return pd.Series((base + pd.to_timedelta(np.arange(offset, offset + n), unit="us")).astype(str))
+
+
+def inventory_deltas(valid, deduct=True):
+    # 품목코드별 순증감 - 반환: [(품목코드, 제품명, 증감)] (0 제외)
+    if valid.empty: return []
+    sign = np.where(valid["구분"].isin(DEDUCT_TYPES) & deduct, -1, 1)
+    net = valid.assign(증감=valid["수량"] * sign).groupby("품목코드", sort=True).agg(제품명=("제품명", "first"), 증감=("증감", "sum"))
+    net = net[net["증감"] != 0]
+    return [(code, name, int(d)) for code, name, d in zip(net.index, net["제품명"], net["증감"])]
+
+
+def merge_deltas(total, deltas):
+    # 청크별 순증감 누적 {품목코드: [제품명, 증감]}
+    for code, name, d in deltas:
+        entry = total.setdefault(code, [name, 0])
+        entry[1] += d
+    return total
+
+
+def apply_deltas(inv, deltas):
+    # 재고 표(품목코드/제품명/현재고)에 순증감 반영 - 같은 품목코드가 여러 행이면 첫 행에 반영, 0 재고 행 제거
+    #  반환: (새 재고 표, 품목코드별 증감 DataFrame[제품명, 증감])
+    change = pd.DataFrame(deltas, columns=["품목코드", "제품명", "증감"]).groupby("품목코드", sort=False).agg(제품명=("제품명", "first"), 증감=("증감", "sum"))
+    df = inv.copy()
+    if not df.empty:
+        df["현재고"] = pd.to_numeric(df["현재고"], errors="coerce").fillna(0).astype(int)
+        first = df["품목코드"].isin(change.index) & ~df["품목코드"].duplicated()
+        df.loc[first, "현재고"] = df.loc[first, "현재고"] + df.loc[first, "품목코드"].map(change["증감"]).astype(int)
+        new = change[~change.index.isin(df["품목코드"])]
+    else: new = change
+    if not new.empty:
+        new_rows = pd.DataFrame({"품목코드": new.index, "제품명": new["제품명"].to_numpy(), "현재고": new["증감"].to_numpy()})
+        df = pd.concat([df, new_rows], ignore_index=True)
+    return df[df["현재고"] != 0], change
+
+
+def history_rows(change, reason, user, now=None):
+    # 재고 이력 시트(COLS_INV_HISTORY) 행 목록
+    now = now or pd.Timestamp.now()
+    return [[now.strftime("%Y-%m-%d"), code, "입고" if d > 0 else "출고", int(d), reason, user, str(now)] for code, d in zip(change.index, change["증감"]) if d != 0]
+
@@ -0,0 +1,464 @@
+import argparse
+import hmac
+import http.client
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import audit
+import importer
+import item_index
+import shared_store
+import snapshots
+from sheets import (
+    SHEET_RECORDS, SHEET_ITEMS, SHEET_INVENTORY, SHEET_INV_HISTORY, SHEET_CHECK_MASTER, SHEET_CHECK_RESULT, SHEET_AUDIT_LOG,
+    COLS_RECORDS, COLS_ITEMS, COLS_INVENTORY, COLS_INV_HISTORY, COLS_CHECK_MASTER, COLS_CHECK_RESULT, COLS_AUDIT_LOG,
+)
+
+# ------------------------------------------------------------------
+# 설비 카운터 / MES 실적 수집용 HTTP(JSON) 서비스 (Streamlit과 별도 프로세스)
+#  - POST /v1/production, /v1/checks: 이벤트 배치를 기준정보로 검증 후 대기열에 적재 (202 응답)
+#  - 대기열은 FLUSH_INTERVAL마다 시트별 append_rows 1회로 기록
+#  - 재고는 품목코드별 순증감을 모아 INVENTORY_INTERVAL마다 읽기-비교-변경분 기록 1회로 반영
+#    앱 저장(save_data)과 같이 기록 전 스냅샷, 바뀐 셀만 기록(audit.diff), audit_log에 변경 이력 추가
+#  - 저장소는 sheets 모듈(실제 구글 시트) 또는 MemoryBackend(로컬 테스트용)
+#  실행: python ingest.py --port 8600   (SMT_INGEST_TOKEN 지정 시 Bearer 토큰 필수)
+#  처리량 확인: python ingest.py --bench   (메모리 저장소 + 로컬 HTTP, 검증 거부 확인 후 초당 이벤트 수 출력)
+# ------------------------------------------------------------------
+FLUSH_INTERVAL = 5.0        # 시트 기록 주기 (초) - 구글 쓰기 할당량(분당 60회) 고려
+INVENTORY_INTERVAL = 15.0   # 재고 반영 주기 (초)
+MASTER_TTL = 60.0           # 기준정보 재조회 주기 (초)
+MAX_BATCH_ROWS = 5000       # 대기 행이 이보다 많으면 주기 전에 기록
+MAX_BODY = 5 * 1024 * 1024
+RETRY_MAX = 60.0            # 기록 실패 시 재시도 간격 상한 (초)
+TOKEN_ENV = "SMT_INGEST_TOKEN"
+
+TARGETS = {
+    # 종류: (시트, 컬럼)
+    "production": (SHEET_RECORDS, COLS_RECORDS),
+    "check": (SHEET_CHECK_RESULT, COLS_CHECK_RESULT),
+}
+ROUTES = {"/v1/production": "production", "/v1/checks": "check"}
+
+
+class SheetsBackend:
+    # 실제 구글 시트 (Streamlit 앱과 같은 sheets 모듈, 같은 공유 잠금 사용)
+    def __init__(self, locks=None, snapshot_store=None):
+        import sheets
+        self._sheets = sheets
+        self.locks = locks or shared_store.open_store() or shared_store.LocalLocks()
+        self.snapshots = snapshot_store or snapshots.open_snapshots()
+
+    def fetch(self, sheet_name, cols):
+        return self._sheets.fetch_sheet(sheet_name, cols)
+
+    def append(self, rows, sheet_name, cols):
+        return self._sheets.append_records(rows, sheet_name, cols)
+
+    def apply_changes(self, sheet_name, cells, appends, deletes, cols):
+        return self._sheets.apply_changes(sheet_name, cells, appends, deletes, cols)
+
+
+class MemoryBackend:
+    # 로컬 테스트 / 부하 측정용 가짜 저장소 - 호출 횟수를 calls에 기록 (snapshot_store 지정 시에만 기록 전 스냅샷)
+    def __init__(self, tables=None, latency=0.0, snapshot_store=None):
+        self.tables = {name: df.copy() for name, df in (tables or {}).items()}
+        self.latency = latency
+        self.snapshots = snapshot_store
+        self.calls = Counter()
+        self.locks = shared_store.LocalLocks()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dir(cls, path):
+        # <시트이름>.csv 파일들을 초기 데이터로 사용
+        tables = {}
+        for name in os.listdir(path):
+            if name.endswith(".csv"):
+                tables[name[:-4]] = pd.read_csv(os.path.join(path, name), dtype=str, keep_default_na=False)
+        return cls(tables)
+
+    def _call(self, op):
+        self.calls[op] += 1
+        if self.latency: time.sleep(self.latency)
+
+    def fetch(self, sheet_name, cols):
+        self._call("fetch")
+        with self._lock:
+            df = self.tables.get(sheet_name)
+            return df.copy() if df is not None else pd.DataFrame(columns=cols)
+
+    def append(self, rows, sheet_name, cols):
+        self._call("append")
+        with self._lock:
+            df = self.tables.get(sheet_name, pd.DataFrame(columns=cols))
+            self.tables[sheet_name] = pd.concat([df, pd.DataFrame([[str(c) for c in r] for r in rows], columns=cols)], ignore_index=True)
+        return True
+
+    def apply_changes(self, sheet_name, cells, appends, deletes, cols):
+        # sheets.apply_changes와 같은 순서: 셀 수정 -> 행 삭제 -> 행 추가 (위치는 데이터 행 기준 0부터)
+        self._call("apply_changes")
+        with self._lock:
+            df = self.tables.get(sheet_name, pd.DataFrame(columns=cols)).reset_index(drop=True)
+            df = df.reindex(columns=list(df.columns) + [c for c in cols if c not in df.columns], fill_value="")
+            for pos, col, v in cells: df.iat[pos, df.columns.get_loc(col)] = str(v)
+            df = df.drop(index=deletes)
+            if appends: df = pd.concat([df, pd.DataFrame(appends).reindex(columns=df.columns, fill_value="").astype(str)], ignore_index=True)
+            self.tables[sheet_name] = df.fillna("").reset_index(drop=True)
+        return True
+
+
+class Ingestor:
+    def __init__(self, backend, flush_interval=FLUSH_INTERVAL, inventory_interval=INVENTORY_INTERVAL, master_ttl=MASTER_TTL):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.inventory_interval = inventory_interval
+        self.master_ttl = master_ttl
+        self.stats = Counter()
+        self._pending = {kind: [] for kind in TARGETS}  # 검증된 행 (시트 컬럼 순서)
+        self._deduct = []                               # 생산 대기 행별 재고 차감 여부
+        self._net = {}                                  # 재고 순증감 {품목코드: [제품명, 증감]}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._masters = None
+        self._masters_at = 0.0
+        self._masters_lock = threading.Lock()
+        self._last_stamp = pd.Timestamp(0)
+        self._thread = None
+
+    # -------------------- 기준정보 --------------------
+    def masters(self):
+        # 반환: (품목 색인, 점검 기준정보) - MASTER_TTL 동안 재사용, 조회 실패 시 이전 값 유지
+        if self._masters is not None and time.monotonic() - self._masters_at < self.master_ttl: return self._masters
+        with self._masters_lock:
+            if self._masters is None or time.monotonic() - self._masters_at >= self.master_ttl:
+                try:
+                    items = item_index.ItemIndex(self.backend.fetch(SHEET_ITEMS, COLS_ITEMS))
+                    master = self.backend.fetch(SHEET_CHECK_MASTER, COLS_CHECK_MASTER)
+                    self._masters = (items, master)
+                except Exception:
+                    self.stats["master_errors"] += 1
+                    if self._masters is None: raise
+                self._masters_at = time.monotonic()
+        return self._masters
+
+    def _stamp(self, n):
+        # 요청 간에도 입력시간이 겹치지 않도록 단조 증가 (행 삭제 시 식별자로 쓰임)
+        with self._lock:
+            stamp = max(pd.Timestamp.now(), self._last_stamp + pd.Timedelta(microseconds=1))
+            self._last_stamp = stamp + pd.Timedelta(microseconds=max(n - 1, 0))
+        return stamp
+
+    # -------------------- 수신 --------------------
+    def submit(self, kind, events, user="ingest", deduct=True):
+        # 반환: {"accepted": 건수, "rejected": [{"index": 배치 내 위치, "reason": 사유}]}
+        if kind not in TARGETS: raise ValueError(kind)
+        if not isinstance(events, list) or not all(isinstance(e, dict) for e in events): raise ValueError("events는 객체 배열이어야 합니다.")
+        if not events: return {"accepted": 0, "rejected": []}
+        chunk = pd.DataFrame.from_records(events).fillna("").astype(str)
+        missing = importer.missing_columns(chunk, kind)
+        if missing:
+            self.stats["rejected"] += len(events)
+            reason = "필수 항목 누락: " + ", ".join(missing)
+            return {"accepted": 0, "rejected": [{"index": i, "reason": reason} for i in range(len(events))]}
+        items, master = self.masters()
+        stamp = self._stamp(len(events))
+        if kind == "production": valid, errors = importer.validate_production(chunk, items, user=user, stamp=stamp)
+        else: valid, errors = importer.validate_checks(chunk, master, user=user, stamp=stamp)
+        with self._lock:
+            self._pending[kind].extend(valid.values.tolist())
+            if kind == "production": self._deduct.extend([deduct] * len(valid))
+            backlog = sum(len(v) for v in self._pending.values())
+        self.stats[f"accepted_{kind}"] += len(valid)
+        self.stats["rejected"] += len(errors)
+        if backlog >= MAX_BATCH_ROWS: self._wake.set()
+        return {"accepted": len(valid), "rejected": [{"index": int(r) - 2, "reason": s} for r, s in zip(errors["행"], errors["사유"])]}
+
+    def backlog(self):
+        with self._lock:
+            return {kind: len(rows) for kind, rows in self._pending.items()} | {"inventory": len(self._net)}
+
+    # -------------------- 기록 --------------------
+    def flush(self, inventory=True):
+        # 대기 행을 시트별 append 1회로 기록 (실패 시 대기열 앞에 되돌림) - 반환: 실패 여부
+        failed = False
+        with self._flush_lock:
+            for kind, (sheet_name, cols) in TARGETS.items():
+                with self._lock:
+                    rows, self._pending[kind] = self._pending[kind], []
+                    if kind == "production": flags, self._deduct = self._deduct, []
+                if not rows: continue
+                ok = False
+                try: ok = self.backend.append(rows, sheet_name, cols)
+                except Exception: ok = False
+                if ok:
+                    self.stats[f"written_{kind}"] += len(rows)
+                    self.stats["batches"] += 1
+                    # 재고 순증감은 기록된 행만, 배치 전체를 한 번에 집계
+                    if kind == "production": self._add_net(pd.DataFrame(rows, columns=cols), flags)
+                else:
+                    with self._lock:
+                        self._pending[kind][:0] = rows
+                        if kind == "production": self._deduct[:0] = flags
+                    self.stats["write_errors"] += 1
+                    failed = True
+            if inventory and not failed: failed = not self._flush_inventory()
+        return failed
+
+    def _add_net(self, valid, flags):
+        deltas = importer.inventory_deltas(valid, np.array(flags, dtype=bool))
+        with self._lock:
+            importer.merge_deltas(self._net, deltas)
+
+    def _flush_inventory(self):
+        with self._lock:
+            net, self._net = self._net, {}
+        deltas = [(code, name, d) for code, (name, d) in net.items() if d]
+        if not deltas: return True
+        try:
+            with self.backend.locks.lock(SHEET_INVENTORY):
+                base = self.backend.fetch(SHEET_INVENTORY, COLS_INVENTORY)
+                df, change = importer.apply_deltas(base, deltas)
+                self._snapshot(base)
+                cols = COLS_INVENTORY + [c for c in df.columns if c not in COLS_INVENTORY]
+                now = str(pd.Timestamp.now())
+                plan = audit.diff(base, df, ["품목코드"], cols, "ingest", now)
+                if plan["events"] and not self.backend.apply_changes(SHEET_INVENTORY, plan["cells"], plan["appends"], plan["deletes"], cols):
+                    raise IOError(SHEET_INVENTORY)
+        except Exception:
+            with self._lock:
+                importer.merge_deltas(self._net, deltas)
+            self.stats["inventory_errors"] += 1
+            return False
+        self.backend.append(importer.history_rows(change, "실적수집(API)", "ingest"), SHEET_INV_HISTORY, COLS_INV_HISTORY)
+        if plan["events"]: self.backend.append(audit.log_rows(SHEET_INVENTORY, plan["events"], "ingest", now), SHEET_AUDIT_LOG, COLS_AUDIT_LOG)
+        self.stats["inventory_batches"] += 1
+        return True
+
+    def _snapshot(self, df):
+        # 재고 기록 전 방금 조회한 시트 보관 (실패해도 반영은 계속 - 로그 + 스냅샷 저장소에 마지막 오류)
+        store = self.backend.snapshots
+        if store is None: return
+        try: store.take({SHEET_INVENTORY: df}, "pre-write")
+        except Exception as e: store.failed(f"pre-write:{SHEET_INVENTORY}", e)
+
+    def _loop(self):
+        delay, next_inventory = self.flush_interval, time.monotonic() + self.inventory_interval
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            due = time.monotonic() >= next_inventory
+            if self.flush(inventory=due):
+                delay = min(delay * 2, RETRY_MAX)
+            else:
+                delay = self.flush_interval
+                if due: next_inventory = time.monotonic() + self.inventory_interval
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="ingest-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        # 남은 대기분까지 기록 후 종료
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None: self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+# ------------------------------------------------------------------
+# HTTP 처리
+# ------------------------------------------------------------------
+def make_handler(ingestor, token=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # 응답 머리글/본문을 한 번에 전송 (keep-alive 연결에서 Nagle/지연 ACK 대기 방지)
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self):
+            if not token: return True
+            got = self.headers.get("Authorization", "")
+            return hmac.compare_digest(got.encode(), f"Bearer {token}".encode())
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/v1/health": return self._reply(404, {"error": "not found"})
+            self._reply(200, {"status": "ok", "backlog": ingestor.backlog(), "stats": dict(ingestor.stats)})
+
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            if not self._authorized(): return self._reply(401, {"error": "unauthorized"})
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY: return self._reply(413, {"error": "payload too large"})
+            raw = self.rfile.read(length) if length else b""
+            if path == "/v1/flush":
+                return self._reply(200 if not ingestor.flush() else 503, {"backlog": ingestor.backlog()})
+            kind = ROUTES.get(path)
+            if kind is None: return self._reply(404, {"error": "not found"})
+            try:
+                body = json.loads(raw or b"null")
+                if isinstance(body, list): body = {"events": body}
+                if not isinstance(body, dict): raise ValueError("JSON 객체 또는 배열이어야 합니다.")
+                res = ingestor.submit(kind, body.get("events"), user=str(body.get("user") or "ingest"), deduct=body.get("deduct", True) is not False)
+            except ValueError as e:
+                return self._reply(400, {"error": str(e)})
+            except Exception as e:
+                return self._reply(503, {"error": f"기준정보 조회 실패: {e}"})
+            self._reply(202, res)
+
+    return Handler
+
+
+def serve(ingestor, host="127.0.0.1", port=8600, token=None):
+    server = ThreadingHTTPServer((host, port), make_handler(ingestor, token))
+    server.daemon_threads = True
+    return server
+
+
+# ------------------------------------------------------------------
+# 처리량 확인 (MemoryBackend + 로컬 HTTP 서버)
+#  - 미등록 품목코드 / 미등록 점검 항목이 거부되는지 확인
+#  - 클라이언트 N개가 keep-alive 연결로 배치를 동시에 전송 -> 초당 이벤트 수, 요청 지연, 기록 건수
+# ------------------------------------------------------------------
+def bench_backend(products=200, lines=4, equipment=3, items=4, latency=0.0):
+    # 기준정보/재고만 있는 메모리 저장소
+    codes = [f"P{i:04d}" for i in range(products)]
+    master = pd.DataFrame([[f"{l + 1}라인", f"E{l + 1}{e + 1}", f"설비{l + 1}-{e + 1}", f"항목{k + 1}", "상태 확인", "이상무", "OX", "", "", ""]
+                           for l in range(lines) for e in range(equipment) for k in range(items)], columns=COLS_CHECK_MASTER)
+    return MemoryBackend({
+        SHEET_ITEMS: pd.DataFrame({"품목코드": codes, "제품명": ["제품" + c[1:] for c in codes]}),
+        SHEET_INVENTORY: pd.DataFrame({"품목코드": codes, "제품명": ["제품" + c[1:] for c in codes], "현재고": "100000"}),
+        SHEET_CHECK_MASTER: master,
+    }, latency=latency)
+
+
+def _post(conn, path, body):
+    conn.request("POST", path, json.dumps(body, ensure_ascii=False).encode("utf-8"), {"Content-Type": "application/json"})
+    res = conn.getresponse()
+    return res.status, json.loads(res.read() or b"null")
+
+
+def _events(kind, n, backend, seed=0):
+    rng = np.random.default_rng(seed)
+    day = pd.Timestamp.now().strftime("%Y-%m-%d")
+    if kind == "production":
+        codes = backend.tables[SHEET_ITEMS]["품목코드"].to_numpy()
+        return [{"날짜": day, "구분": str(t), "품목코드": str(c), "수량": str(q)}
+                for t, c, q in zip(rng.choice(["PC", "CM1", "후공정"], n), rng.choice(codes, n), rng.integers(1, 50, n))]
+    master = backend.tables[SHEET_CHECK_MASTER]
+    rows = master.iloc[rng.integers(0, len(master), n)]
+    return [{"date": day, "line": r.line, "equip_id": r.equip_id, "item_name": r.item_name, "value": "OK", "ox": "OK"} for r in rows.itertuples()]
+
+
+def _chunks(production, checks, size):
+    # 생산/점검 배치를 번갈아 배치
+    prod = [production[i:i + size] for i in range(0, len(production), size)]
+    chk = [checks[i:i + size] for i in range(0, len(checks), size)]
+    out = []
+    for i in range(max(len(prod), len(chk))):
+        out.append(prod[i] if i < len(prod) else [])
+        out.append(chk[i] if i < len(chk) else [])
+    return out
+
+
+def bench(events=20000, batch=200, clients=8, latency=0.0):
+    # 반환: 결과 dict (검증 실패 시 AssertionError)
+    backend = bench_backend(latency=latency)
+    ingestor = Ingestor(backend, flush_interval=0.5, inventory_interval=1.0).start()
+    server = serve(ingestor, port=0)
+    threading.Thread(target=server.serve_forever, name="ingest-bench", daemon=True).start()
+    host, port = server.server_address
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        good = _events("production", 1, backend)[0]
+        status, res = _post(conn, "/v1/production", [dict(good, 품목코드="NOPE-0001"), good])
+        assert status == 202 and res["accepted"] == 1 and [r["index"] for r in res["rejected"]] == [0], res
+        assert "미등록 품목코드" in res["rejected"][0]["reason"], res
+        good = _events("check", 1, backend)[0]
+        status, res = _post(conn, "/v1/checks", [good, dict(good, item_name="없는 항목")])
+        assert status == 202 and res["accepted"] == 1 and [r["index"] for r in res["rejected"]] == [1], res
+        assert "미등록 점검 항목" in res["rejected"][0]["reason"], res
+        conn.close()
+
+        payloads = [("/v1/production" if i % 2 == 0 else "/v1/checks", ev)
+                    for i, ev in enumerate(_chunks(_events("production", events // 2, backend, 1), _events("check", events - events // 2, backend, 2), batch))]
+        latencies, accepted, errors = [], Counter(), Counter()
+        guard = threading.Lock()
+
+        def client(part):
+            c = http.client.HTTPConnection(host, port, timeout=30)
+            for path, ev in part:
+                t0 = time.perf_counter()
+                try: status, res = _post(c, path, ev)
+                except Exception as e: status, res = type(e).__name__, None
+                with guard:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    if status == 202: accepted[path] += res["accepted"]
+                    else: errors[str(status)] += 1
+            c.close()
+
+        threads = [threading.Thread(target=client, args=(payloads[i::clients],)) for i in range(clients)]
+        t0 = time.perf_counter()
+        for t in threads: t.start()
+        for t in threads: t.join()
+        elapsed = time.perf_counter() - t0
+    finally:
+        server.shutdown()
+        server.server_close()
+        ingestor.stop()
+    written = ingestor.stats["written_production"] + ingestor.stats["written_check"]
+    total = sum(accepted.values())
+    assert not errors, errors
+    assert total == events and written == total + 2, (total, written)
+    lat = np.array(latencies)
+    return {"events": events, "batch": batch, "clients": clients, "seconds": round(elapsed, 2), "events_per_s": round(events / elapsed),
+            "p50_ms": round(float(np.percentile(lat, 50)), 1), "p95_ms": round(float(np.percentile(lat, 95)), 1),
+            "written": written, "batches": ingestor.stats["batches"], "backend_calls": dict(backend.calls)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SMT 실적/점검 수집 서비스")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--fake", metavar="DIR", help="구글 시트 대신 <시트이름>.csv 폴더를 메모리 저장소로 사용")
+    parser.add_argument("--bench", action="store_true", help="메모리 저장소로 검증/처리량 확인 후 종료")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=8)
+    args = parser.parse_args()
+    if args.bench:
+        r = bench(args.events, args.batch, args.clients)
+        print("검증: 미등록 품목코드 / 미등록 점검 항목 거부 확인")
+        print(f"이벤트 {r['events']:,}건 · 배치 {r['batch']} · 클라이언트 {r['clients']} · {r['seconds']}초 · {r['events_per_s']:,} 이벤트/초")
+        print(f"요청 지연 p50 {r['p50_ms']}ms / p95 {r['p95_ms']}ms · 기록 {r['written']:,}행 ({r['batches']}회) · 저장소 호출 {r['backend_calls']}")
+        raise SystemExit(0)
+    backend = MemoryBackend.from_dir(args.fake) if args.fake else SheetsBackend()
+    ingestor = Ingestor(backend).start()
+    server = serve(ingestor, args.host, args.port, os.environ.get(TOKEN_ENV))
+    print(f"ingest listening on http://{args.host}:{args.port}")
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally:
+        server.server_close()
+        ingestor.stop()
@@ -0,0 +1,48 @@
+import bisect
+
+# ------------------------------------------------------------------
+# 품목 기준정보 조회 색인
+#  - 품목코드 -> 제품명 해시맵 (O(1) 조회)
+#  - 코드/제품명 정렬 배열 + 이진 탐색으로 접두어 자동완성
+#  - item_codes 시트 버전이 바뀔 때만 새로 생성
+# ------------------------------------------------------------------
+def normalize_code(code):
+    return str(code).strip().upper()
+
+
+class ItemIndex:
+    def __init__(self, df, version=None):
+        self.version = version
+        self.by_code = {}
+        if df is not None and not df.empty:
+            for code, name in zip(df["품목코드"], df["제품명"]):
+                code = normalize_code(code)
+                if code and code not in self.by_code: self.by_code[code] = str(name).strip()
+        self._codes = sorted(self.by_code)
+        self._names = sorted((name.lower(), code) for code, name in self.by_code.items() if name)
+
+    def __len__(self):
+        return len(self.by_code)
+
+    def lookup(self, code):
+        return self.by_code.get(normalize_code(code))
+
+    def complete(self, text, limit=10):
+        # 반환: [(품목코드, 제품명)] - 코드 접두어 일치 우선, 이어서 제품명 접두어 일치
+        text = str(text).strip()
+        if not text: return []
+        out, seen = [], set()
+        key = normalize_code(text)
+        i = bisect.bisect_left(self._codes, key)
+        while i < len(self._codes) and self._codes[i].startswith(key) and len(out) < limit:
+            code = self._codes[i]
+            out.append((code, self.by_code[code])); seen.add(code)
+            i += 1
+        key = text.lower()
+        i = bisect.bisect_left(self._names, (key, ""))
+        while i < len(self._names) and self._names[i][0].startswith(key) and len(out) < limit:
+            code = self._names[i][1]
+            if code not in seen:
+                out.append((code, self.by_code[code])); seen.add(code)
+            i += 1
+        return out
@@ -0,0 +1,452 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import auth
+import compaction
+import reports
+import shared_store
+import sheets
+import signature
+import sites
+import snapshots
+from sheets import (
+    SHEET_RECORDS, SHEET_ITEMS, SHEET_INVENTORY, SHEET_EQUIPMENT, SHEET_CHECK_MASTER, SHEET_CHECK_RESULT, SHEET_MAINTENANCE, SHEET_LINE_EQUIPMENT, SHEET_PLAN,
+    COLS_RECORDS, COLS_EQUIPMENT, COLS_CHECK_MASTER, COLS_CHECK_RESULT, COLS_MAINTENANCE, COLS_LINE_EQUIPMENT, COLS_PLAN,
+)
+
+# ------------------------------------------------------------------
+# 동시 접속 부하 테스트 (Streamlit AppTest로 app.py를 세션 N개에서 그대로 실행)
+#  - 구글 시트 대신 메모리 스프레드시트(FakeClient) 사용: 호출마다 지연(latency ± jitter), 확률 오류 / 분당 할당량 초과 시 429 오류
+#  - 세션 시나리오 (교대 시작 시점처럼 동시에 시작): 로그인(세션 토큰) -> 메뉴 순회 -> 일일점검 입력/저장 -> 생산 실적 저장 -> PDF 생성
+#  - 세션은 같은 프로세스의 스레드로 실행 (실제 서버처럼 cache_resource/데이터 허브 공유)
+#  - 결과: 처리량, 동작별 지연 백분위(p50/p95/p99), 실패 수, 백엔드 호출/오류 수
+#  실행: python loadtest.py --sessions 20 --latency 0.2 --error-rate 0.02 --write-quota 60
+# ------------------------------------------------------------------
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+MENUS = ["📊 대시보드", "🏭 생산관리", "🛠 설비보전관리", "✅ 일일점검관리", "🔍 통합검색"]
+MENU_PRODUCTION, MENU_CHECK = "🏭 생산관리", "✅ 일일점검관리"
+ACTIONS = ["login", "menu", "check_save", "production_save", "pdf_production", "pdf_check"]
+USERS = ["kim", "김윤석", "박종선"]  # app.USERS에 있는 ID (세션 토큰으로 로그인)
+IGNORED_ERRORS = {"🚨 금일 NG 발생 항목"}  # 오류가 아닌 제목용 st.error
+
+
+class QuotaExceeded(Exception):
+    # 구글 API 429 (RESOURCE_EXHAUSTED) 대용 - sheets 모듈은 일반 예외와 같이 처리
+    pass
+
+
+# -------------------- 가짜 구글 시트 --------------------
+def _num(v):
+    # UNFORMATTED_VALUE 흉내: 숫자로 읽히는 값은 숫자
+    try:
+        f = float(v)
+        return int(f) if f.is_integer() and "." not in v else f
+    except (TypeError, ValueError): return v
+
+
+class FakeClient:
+    # gspread Client 대용 - 스프레드시트는 이름별로 메모리에 생성, 모든 API 호출을 calls에 기록
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, read_quota=0, write_quota=0, seed=None):
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.quota = {"read": read_quota, "write": write_quota}  # 분당 요청 수 (0: 제한 없음)
+        self.calls = Counter()
+        self.errors = Counter()
+        self.books = {}
+        self.lock = threading.Lock()
+        self._window = {"read": deque(), "write": deque()}
+        self._rng = random.Random(seed)
+
+    def call(self, op, kind):
+        # 호출 기록 + 지연 + 오류 판정 (지연은 잠금 밖에서 대기)
+        with self.lock:
+            self.calls[op] += 1
+            now, q, limit = time.monotonic(), self._window[kind], self.quota[kind]
+            while q and now - q[0] >= 60: q.popleft()
+            fail = bool(limit and len(q) >= limit) or self._rng.random() < self.error_rate
+            if fail: self.errors[op] += 1
+            else: q.append(now)
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+        if delay: time.sleep(delay)
+        if fail: raise QuotaExceeded(f"429 RESOURCE_EXHAUSTED ({op})")
+
+    def open(self, name):
+        self.call("open", "read")
+        with self.lock:
+            return self.books.setdefault(name, FakeSpreadsheet(self, name))
+
+    def rows(self, sheet_name, book=sheets.GOOGLE_SHEET_NAME):
+        # 시트 데이터 행 수 (머리글 제외)
+        with self.lock:
+            ws = self.books.get(book, FakeSpreadsheet(self, book)).ws.get(sheet_name)
+            return max(len(ws.rows) - 1, 0) if ws else 0
+
+    def seed(self, frames, book=sheets.GOOGLE_SHEET_NAME):
+        # {시트: DataFrame} 초기 데이터 (호출 수에 포함하지 않음)
+        sh = self.books.setdefault(book, FakeSpreadsheet(self, book))
+        for name, df in frames.items():
+            sh.ws[name] = FakeWorksheet(sh, name, [list(map(str, df.columns))] + df.fillna("").astype(str).values.tolist())
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        self.ws = {}
+
+    def worksheet(self, name):
+        import gspread
+        self.client.call("worksheet", "read")
+        with self.client.lock:
+            if name not in self.ws: raise gspread.WorksheetNotFound(name)
+            return self.ws[name]
+
+    def worksheets(self):
+        self.client.call("worksheets", "read")
+        return list(self.ws.values())
+
+    def add_worksheet(self, title, rows, cols):
+        self.client.call("add_worksheet", "write")
+        with self.client.lock:
+            ws = self.ws[title] = FakeWorksheet(self, title, [], rows, cols)
+            return ws
+
+    def values_batch_get(self, ranges, params=None):
+        from gspread.utils import a1_to_rowcol
+        self.client.call("values_batch_get", "read")
+        out = []
+        with self.client.lock:
+            for r in ranges:
+                title, a1 = r.rsplit("!", 1)
+                rows = self.ws[title.strip("'")].rows
+                if a1 == "1:1": values = [list(rows[0])] if rows else []
+                else:
+                    a, b = a1.split(":")
+                    r0, c0 = a1_to_rowcol(a)
+                    c1 = a1_to_rowcol(b + "1")[1]
+                    values = [[_num(v) for v in row[c0 - 1:c1]] for row in rows[r0 - 1:]]
+                    # 실제 API처럼 뒤쪽 빈 행/빈 셀은 잘라서 반환
+                    while values and not any(v != "" for v in values[-1]): values.pop()
+                    values = [v[:max([i + 1 for i, x in enumerate(v) if x != ""] or [0])] for v in values]
+                out.append({"range": r, "values": values})
+        return {"valueRanges": out}
+
+    def batch_update(self, body):
+        self.client.call("batch_update", "write")
+        with self.client.lock:
+            for req in body["requests"]:
+                if "updateSheetProperties" in req:
+                    grid = req["updateSheetProperties"]["properties"]
+                    self._by_id(grid["sheetId"]).resize_grid(grid["gridProperties"].get("rowCount"), grid["gridProperties"].get("columnCount"))
+                elif "updateCells" in req:
+                    u = req["updateCells"]
+                    value = lambda c: str(next(iter(c["userEnteredValue"].values()))) if c else ""
+                    self._by_id(u["range"]["sheetId"]).rows = [[value(c) for c in r["values"]] for r in u["rows"]]
+                elif "deleteDimension" in req:
+                    r = req["deleteDimension"]["range"]
+                    del self._by_id(r["sheetId"]).rows[r["startIndex"]:r["endIndex"]]
+
+    def _by_id(self, sheet_id):
+        return next(w for w in self.ws.values() if w.id == sheet_id)
+
+
+class FakeWorksheet:
+    _ids = iter(range(1, 1 << 30))
+
+    def __init__(self, book, title, rows, grid_rows=1000, grid_cols=26):
+        self.spreadsheet = book
+        self.title = title
+        self.rows = rows
+        self.id = next(FakeWorksheet._ids)
+        self._grid = (grid_rows, grid_cols)
+
+    @property
+    def row_count(self): return max(len(self.rows), self._grid[0])
+
+    @property
+    def col_count(self): return max(max((len(r) for r in self.rows), default=0), self._grid[1])
+
+    def _client(self, op, kind):
+        self.spreadsheet.client.call(op, kind)
+        return self.spreadsheet.client.lock
+
+    def resize_grid(self, rows=None, cols=None):
+        self._grid = (rows or self._grid[0], cols or self._grid[1])
+
+    def row_values(self, i):
+        with self._client("row_values", "read"):
+            return list(self.rows[i - 1]) if len(self.rows) >= i else []
+
+    def get_all_values(self, **kwargs):
+        with self._client("get_all_values", "read"):
+            return [list(r) for r in self.rows]
+
+    def append_row(self, values, **kwargs):
+        with self._client("append_row", "write"):
+            self.rows.append([str(v) for v in values])
+
+    def append_rows(self, rows, **kwargs):
+        with self._client("append_rows", "write"):
+            self.rows.extend([str(v) for v in r] for r in rows)
+
+    def clear(self):
+        with self._client("clear", "write"):
+            self.rows = []
+
+    def resize(self, rows=None, cols=None):
+        with self._client("resize", "write"):
+            self.resize_grid(rows, cols)
+
+    def update_cells(self, cells, **kwargs):
+        with self._client("update_cells", "write"):
+            for c in cells: self._set(c.row, c.col, c.value)
+
+    def batch_update(self, data, **kwargs):
+        from gspread.utils import a1_to_rowcol
+        with self._client("values_batch_update", "write"):
+            for d in data:
+                r, c = a1_to_rowcol(d["range"])
+                self._set(r, c, d["values"][0][0])
+
+    def _set(self, r, c, value):
+        while len(self.rows) < r: self.rows.append([])
+        row = self.rows[r - 1]
+        if len(row) < c: row.extend([""] * (c - len(row)))
+        row[c - 1] = "" if value is None else str(value)
+
+
+# -------------------- 초기 데이터 --------------------
+def sample_frames(lines=4, equipment=3, items=4, products=50, history=5000, days=60, seed=0):
+    # 기준정보 + 생산/정비/점검 이력 (점검 수치 항목은 0~100 기준)
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    line_names = [f"{i + 1}라인" for i in range(lines)]
+    codes = [f"P{i:04d}" for i in range(products)]
+    equips = [(line, f"E{i + 1}{j + 1}", f"설비{i + 1}-{j + 1}") for i, line in enumerate(line_names) for j in range(equipment)]
+    master = pd.DataFrame([[line, eid, name, f"항목{k + 1}", "상태 확인", "이상무" if k % 2 == 0 else "0~100",
+                            "OX" if k % 2 == 0 else "NUMBER", "" if k % 2 == 0 else "0", "" if k % 2 == 0 else "100", "" if k % 2 == 0 else "%"]
+                           for line, eid, name in equips for k in range(items)], columns=COLS_CHECK_MASTER)
+    stamp = [now - timedelta(days=int(d), minutes=int(m)) for d, m in zip(rng.integers(0, days, history), rng.integers(0, 1440, history))]
+    records = pd.DataFrame({"날짜": [t.strftime("%Y-%m-%d") for t in stamp], "구분": rng.choice(line_names, history),
+                            "품목코드": rng.choice(codes, history), "수량": rng.integers(10, 500, history),
+                            "입력시간": [str(t) for t in stamp], "작성자": rng.choice(USERS, history), "수정자": "", "수정시간": ""})
+    records["제품명"] = "제품" + records["품목코드"].str[1:]
+    maint_at = [now - timedelta(days=int(d)) for d in rng.integers(0, days, max(history // 50, 1))]
+    maint = pd.DataFrame({"날짜": [t.strftime("%Y-%m-%d") for t in maint_at], "설비ID": [equips[i % len(equips)][1] for i in range(len(maint_at))],
+                          "설비명": [equips[i % len(equips)][2] for i in range(len(maint_at))], "작업구분": "BM", "작업내용": "점검",
+                          "교체부품": "", "비용": 1000, "작업자": "kim", "비가동시간": rng.integers(5, 120, len(maint_at)),
+                          "입력시간": [str(t) for t in maint_at], "작성자": "kim", "수정자": "", "수정시간": ""})
+    return {
+        SHEET_ITEMS: pd.DataFrame({"품목코드": codes, "제품명": ["제품" + c[1:] for c in codes]}),
+        SHEET_INVENTORY: pd.DataFrame({"품목코드": codes, "제품명": ["제품" + c[1:] for c in codes], "현재고": 10000}),
+        SHEET_EQUIPMENT: pd.DataFrame([[eid, name, "실장"] for _, eid, name in equips], columns=COLS_EQUIPMENT),
+        SHEET_LINE_EQUIPMENT: pd.DataFrame([[line, eid, "120"] for line, eid, _ in equips], columns=COLS_LINE_EQUIPMENT),
+        SHEET_PLAN: pd.DataFrame([[(now - timedelta(days=d)).strftime("%Y-%m-%d"), line, "", str(history // days // lines * 250)]
+                                  for d in range(days) for line in line_names], columns=COLS_PLAN),
+        SHEET_CHECK_MASTER: master,
+        SHEET_CHECK_RESULT: pd.DataFrame(columns=COLS_CHECK_RESULT),
+        SHEET_RECORDS: records[COLS_RECORDS],
+        SHEET_MAINTENANCE: maint[COLS_MAINTENANCE],
+    }
+
+
+def isolate(root):
+    # 세션/스냅샷/서명/보고서/보관 파일은 임시 폴더로, 공유 저장소와 사이트 설정은 끔 (앱보다 먼저 호출)
+    for env, sub in ((auth.SESSION_DB_ENV, "sessions.db"), (snapshots.SNAPSHOT_DIR_ENV, "snapshots"), (signature.BLOB_DIR_ENV, "blobs"),
+                     (reports.REPORT_DIR_ENV, "reports"), (compaction.ARCHIVE_DIR_ENV, "archive")):
+        os.environ[env] = os.path.join(root, sub)
+    os.environ.pop(shared_store.STORE_ENV, None)
+    os.environ.pop(sites.SITES_ENV, None)
+
+
+def patch_apptest():
+    # AppTest를 여러 스레드에서 동시에 실행하기 위한 보정 (AppTest는 한 번에 앱 1개 실행을 가정)
+    #  - 스크립트 바이트코드를 세션 간 공유 (실제 서버와 같음, 실행마다 다시 컴파일하면 측정 왜곡 + 동시 컴파일 오류)
+    #  - 먼저 끝난 세션이 전역 런타임을 지워도 실행 중인 세션은 마지막 런타임을 계속 사용
+    try:
+        from streamlit.runtime.runtime import Runtime
+        from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+        from streamlit.testing.v1 import local_script_runner
+    except ImportError: return
+    cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: cache
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None: last["runtime"] = cls._instance
+        if "runtime" not in last: raise RuntimeError("Runtime hasn't been created!")
+        return last["runtime"]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in last)
+
+
+# -------------------- 세션 시나리오 --------------------
+class Session:
+    def __init__(self, no, token, line, code, client, timeout=120, think=0.0):
+        self.no, self.token, self.line, self.code = no, token, line, code
+        self.client = client
+        self.timeout = timeout
+        self.think = think
+        self.samples = defaultdict(list)  # 동작 -> [ms]
+        self.failures = Counter()
+        self.messages = Counter()
+        self.at = None
+        self._rng = random.Random(no)
+
+    def run(self, start, iterations=1):
+        start.wait()
+        self.step("login", self.login)
+        if not self.at: return
+        for _ in range(iterations):
+            for menu in MENUS: self.step("menu", lambda: self.menu(menu))
+            self.step("check_save", self.check_save)
+            self.step("production_save", self.production_save)
+            self.step("pdf_production", self.pdf_production)
+            self.step("pdf_check", self.pdf_check)
+
+    def step(self, action, fn):
+        if self.think: time.sleep(self._rng.uniform(0, self.think))
+        t0 = time.perf_counter()
+        try: ok = fn()
+        except Exception as e:
+            ok = False
+            self.messages[f"{action}: {type(e).__name__}: {str(e)[:120]}"] += 1
+        self.samples[action].append((time.perf_counter() - t0) * 1000)
+        if self.at is not None:
+            for msg in [str(x.value)[:120] for x in self.at.exception] + [e.value for e in self.at.error if e.value not in IGNORED_ERRORS]:
+                self.messages[f"{action}: {msg}"] += 1
+                ok = False
+        if not ok: self.failures[action] += 1
+
+    def login(self):
+        # 로그인 화면을 거치지 않고 세션 토큰(?session=)으로 이어서 로그인 - 첫 화면(대시보드) 표시까지
+        from streamlit.testing.v1 import AppTest
+        at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        at.query_params["session"] = self.token
+        at.run()
+        self.at = at
+        return "logged_in" in at.session_state and at.session_state["logged_in"]
+
+    def menu(self, name):
+        if self.at.sidebar.radio[0].value != name: self.at.sidebar.radio[0].set_value(name).run()
+        return True
+
+    def check_save(self):
+        # 담당 라인 선택 -> OX 항목 OK, 수치 항목 50 입력 -> 저장 (저장 후 결과 시트 행 증가로 성공 판정)
+        self.menu(MENU_CHECK)
+        at = self.at
+        if at.radio(key="line_selector").value != self.line: at.radio(key="line_selector").set_value(self.line).run()
+        prefix = f"val_{self.line}_"
+        for w in at.radio:
+            if w.key and w.key.startswith(prefix): w.set_value("OK")
+        for w in at.number_input:
+            if w.key and w.key.startswith(prefix): w.set_value(50.0)
+        before = self.client.rows(SHEET_CHECK_RESULT)
+        self._button(f"💾 {self.line} 점검 결과 저장").click().run()
+        return self.client.rows(SHEET_CHECK_RESULT) > before
+
+    def production_save(self):
+        self.menu(MENU_PRODUCTION)
+        before = self.client.rows(SHEET_RECORDS)
+        self.at.text_input(key="code_in").set_value(self.code).run()
+        self._button("실적 저장").click().run()
+        return self.client.rows(SHEET_RECORDS) > before
+
+    def pdf_production(self):
+        self.menu(MENU_PRODUCTION)
+        self._button("📄 PDF 다운로드").click().run()
+        return any(e.proto.label == "PDF 파일 받기" for e in self.at.get("download_button"))
+
+    def pdf_check(self):
+        self.menu(MENU_CHECK)
+        self._button("📄 해당 날짜 전체 점검 리포트 생성 (PDF)").click().run()
+        return any(e.proto.label == "PDF 다운로드" for e in self.at.get("download_button"))
+
+    def _button(self, label):
+        return next(b for b in self.at.button if b.label == label)
+
+
+# -------------------- 실행 / 결과 --------------------
+def summarize(sessions, client, elapsed):
+    rows = []
+    for action in ACTIONS:
+        ms = np.array([v for s in sessions for v in s.samples.get(action, [])])
+        if not len(ms): continue
+        rows.append({"동작": action, "횟수": len(ms), "실패": sum(s.failures[action] for s in sessions),
+                     "p50": np.percentile(ms, 50), "p95": np.percentile(ms, 95), "p99": np.percentile(ms, 99), "최대": ms.max()})
+    table = pd.DataFrame(rows)
+    total = int(table["횟수"].sum()) if not table.empty else 0
+    messages = Counter()
+    for s in sessions: messages.update(s.messages)
+    return {"sessions": len(sessions), "seconds": round(elapsed, 2), "actions": total,
+            "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": table.round(1).to_dict("records"),
+            "backend_calls": dict(client.calls.most_common()), "backend_errors": dict(client.errors.most_common()),
+            "messages": dict(messages.most_common(10))}
+
+
+def run(sessions=20, iterations=1, latency=0.1, jitter=0.05, error_rate=0.0, read_quota=0, write_quota=0, think=0.5,
+        lines=4, history=5000, timeout=120, seed=0, workdir=None):
+    root = workdir or tempfile.mkdtemp(prefix="smt-loadtest-")
+    isolate(root)
+    patch_apptest()
+    client = FakeClient(latency, jitter, error_rate, read_quota, write_quota, seed)
+    frames = sample_frames(lines=lines, history=history, seed=seed)
+    client.seed(frames)
+    sheets.use_client(client)
+
+    store = auth.open_sessions()
+    line_names = list(dict.fromkeys(frames[SHEET_CHECK_MASTER]["line"]))
+    codes = frames[SHEET_ITEMS]["품목코드"].tolist()
+    runners = [Session(i, store.create(USERS[i % len(USERS)]), line_names[i % len(line_names)], codes[i % len(codes)], client, timeout, think)
+               for i in range(sessions)]
+    start = threading.Barrier(sessions + 1)
+    threads = [threading.Thread(target=s.run, args=(start, iterations), name=f"loadtest-{s.no}", daemon=True) for s in runners]
+    for t in threads: t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    sheets.use_client(None)
+    return summarize(runners, client, elapsed)
+
+
+def print_report(rep):
+    print(f"세션 {rep['sessions']}개 · {rep['seconds']}초 · 동작 {rep['actions']}회 · 처리량 {rep['throughput']} 동작/초")
+    if rep["latency_ms"]: print(pd.DataFrame(rep["latency_ms"]).to_string(index=False))
+    print("백엔드 호출:", ", ".join(f"{k} {v}" for k, v in rep["backend_calls"].items()) or "-")
+    if rep["backend_errors"]: print("백엔드 오류(429):", ", ".join(f"{k} {v}" for k, v in rep["backend_errors"].items()))
+    for msg, n in rep["messages"].items(): print(f"  {n}회 · {msg}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SMT 동시 접속 부하 테스트 (가짜 구글 시트)")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 세션 수")
+    parser.add_argument("--iterations", type=int, default=1, help="세션별 시나리오 반복 횟수")
+    parser.add_argument("--latency", type=float, default=0.1, help="시트 API 호출당 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="지연 편차 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="호출당 429 오류 확률")
+    parser.add_argument("--read-quota", type=int, default=0, help="분당 읽기 요청 한도 (0: 제한 없음)")
+    parser.add_argument("--write-quota", type=int, default=0, help="분당 쓰기 요청 한도 (0: 제한 없음)")
+    parser.add_argument("--think", type=float, default=0.5, help="동작 사이 최대 대기 (초)")
+    parser.add_argument("--lines", type=int, default=4, help="점검 라인 수")
+    parser.add_argument("--history", type=int, default=5000, help="초기 생산 실적 행 수")
+    parser.add_argument("--timeout", type=float, default=120, help="스크립트 실행 1회 제한 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+    rep = run(args.sessions, args.iterations, args.latency, args.jitter, args.error_rate, args.read_quota, args.write_quota,
+              args.think, args.lines, args.history, args.timeout, args.seed)
+    print_report(rep)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(rep, f, ensure_ascii=False, indent=2, default=float)
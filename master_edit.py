@@ -0,0 +1,89 @@
+import math
+
+import pandas as pd
+
+# ------------------------------------------------------------------
+# 기준정보 편집 - 낙관적 동시성 제어
+#  - 편집 시작 시점의 버전(다이제스트)과 원본을 보관
+#  - 저장 시 키 기준 행 단위 변경분만 계산하여 셀 단위로 기록
+#  - 그 사이 다른 사용자가 시트를 바꿨으면 저장을 거부하고 비교표(merge view) 제공
+# ------------------------------------------------------------------
+def norm(v):
+    if v is None: return ""
+    if isinstance(v, float):
+        if math.isnan(v): return ""
+        if v.is_integer(): return str(int(v))
+    return str(v).strip()
+
+
+def _keyed(df, keys, cols):
+    # {키 튜플: (원본 인덱스, {컬럼: 정규화 값})} - 키가 비어 있는 행은 제외, 중복 키는 첫 행 기준
+    out = {}
+    if df is None or df.empty: return out
+    for idx, row in zip(df.index, df.reindex(columns=cols).to_dict("records")):
+        values = {c: norm(row.get(c)) for c in cols}
+        key = tuple(values[k] for k in keys)
+        if all(key) and key not in out: out[key] = (idx, values)
+    return out
+
+
+def compute_changes(base, edited, keys, cols):
+    # 반환: {"updates": {키: {컬럼: 새 값}}, "inserts": {키: {컬럼: 값}}, "deletes": [키]}
+    b = _keyed(base, keys, cols)
+    e = _keyed(edited, keys, cols)
+    updates, inserts = {}, {}
+    for key, (_, values) in e.items():
+        if key not in b:
+            inserts[key] = values
+            continue
+        diff = {c: v for c, v in values.items() if v != b[key][1][c]}
+        if diff: updates[key] = diff
+    deletes = [key for key in b if key not in e]
+    return {"updates": updates, "inserts": inserts, "deletes": deletes}
+
+
+def is_empty(changes):
+    return not (changes["updates"] or changes["inserts"] or changes["deletes"])
+
+
+def summarize(changes):
+    return f"수정 {len(changes['updates'])}건 · 추가 {len(changes['inserts'])}건 · 삭제 {len(changes['deletes'])}건"
+
+
+def merge_view(changes, base, current, keys, cols):
+    # 내 변경분 기준 비교표 - 다른 사용자가 같은 셀/행을 바꾼 경우 충돌로 표시
+    b = _keyed(base, keys, cols)
+    c = _keyed(current, keys, cols)
+    rows = []
+    label = lambda key: " / ".join(key)
+    for key, diff in changes["updates"].items():
+        for col, mine in diff.items():
+            base_v = b[key][1][col]
+            cur_v = c[key][1][col] if key in c else "(삭제됨)"
+            rows.append({"키": label(key), "구분": "수정", "컬럼": col, "편집 시작 값": base_v, "현재 값": cur_v, "내 값": mine, "충돌": cur_v != base_v})
+    for key, values in changes["inserts"].items():
+        rows.append({"키": label(key), "구분": "추가", "컬럼": "", "편집 시작 값": "", "현재 값": "(존재)" if key in c else "", "내 값": "", "충돌": key in c})
+    for key in changes["deletes"]:
+        changed = key in c and c[key][1] != b[key][1]
+        rows.append({"키": label(key), "구분": "삭제", "컬럼": "", "편집 시작 값": "", "현재 값": "(변경됨)" if changed else ("" if key in c else "(삭제됨)"), "내 값": "", "충돌": changed})
+    return pd.DataFrame(rows, columns=["키", "구분", "컬럼", "편집 시작 값", "현재 값", "내 값", "충돌"])
+
+
+def plan_writes(changes, current, keys, cols):
+    # 현재 시트 기준 기록 계획 - 반환: (셀 수정 [(행 위치, 컬럼, 값)], 추가 행 [dict], 삭제 행 위치 [int])
+    #  행 위치는 시트 데이터 영역의 0부터 시작하는 위치 (시트 행 번호 = 위치 + 2)
+    c = _keyed(current, keys, cols)
+    cells, appends, deletes = [], [], []
+    for key, diff in changes["updates"].items():
+        if key not in c: continue  # 다른 사용자가 삭제한 행은 건너뜀
+        pos = c[key][0]
+        cells.extend((pos, col, v) for col, v in diff.items())
+    for key, values in changes["inserts"].items():
+        if key in c:
+            pos, cur = c[key]
+            cells.extend((pos, col, v) for col, v in values.items() if v != cur[col])
+        else:
+            appends.append(values)
+    for key in changes["deletes"]:
+        if key in c: deletes.append(c[key][0])
+    return cells, appends, sorted(set(deletes))
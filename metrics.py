@@ -0,0 +1,40 @@
+import threading
+import time
+from collections import deque
+
+# ------------------------------------------------------------------
+# 프로세스 단위 성능 지표
+#  - 이름별 최근 측정값을 보관하고 건수/중앙값/p95/최대 요약 제공
+#  - Streamlit 재실행과 무관하게 프로세스가 살아 있는 동안 유지
+# ------------------------------------------------------------------
+MAX_SAMPLES = 500
+LOADED_AT = time.time()  # 모듈 최초 로드 시각 (프로세스 기동 근사)
+
+_lock = threading.Lock()
+_samples = {}
+_once = set()
+
+
+def observe(name, value):
+    with _lock:
+        _samples.setdefault(name, deque(maxlen=MAX_SAMPLES)).append(float(value))
+
+
+def once(name):
+    # 프로세스에서 처음 호출될 때만 True (콜드 스타트 구분용)
+    with _lock:
+        if name in _once: return False
+        _once.add(name)
+        return True
+
+
+def summary():
+    # 반환: [{지표, 건수, 최근, 중앙값, p95, 최대}]
+    with _lock:
+        items = [(name, list(vals)) for name, vals in _samples.items()]
+    rows = []
+    for name, vals in sorted(items):
+        s = sorted(vals)
+        rows.append({"지표": name, "건수": len(s), "최근": round(vals[-1], 1), "중앙값": round(s[len(s) // 2], 1),
+                     "p95": round(s[min(len(s) - 1, int(len(s) * 0.95))], 1), "최대": round(s[-1], 1)})
+    return rows
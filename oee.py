@@ -0,0 +1,237 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------
+# OEE / 비가동 분석 (생산 실적 x 설비 보전 비가동시간)
+#  - 라인(생산 구분) <-> 설비 매핑과 라인 목표 UPH는 line_equipment 시트에서 관리
+#  - 비가동은 구간 [종료 - 비가동시간, 종료]으로 보고, 라인 내 설비 비가동 구간을 합집합(중복 제외)한 뒤
+#    교대 구간과 겹치는 길이만큼 해당 (날짜, 교대, 라인)에 배분 - 모두 배열 연산
+#  - 가동률 = (계획 - 비가동) / 계획, 성능 = 생산수량 / (가동시간 x 목표 UPH), OEE = 가동률 x 성능 (품질은 100% 가정)
+#  - (날짜, 교대, 라인) 집계를 보관하고, 시트 뒤에 행만 추가되면 영향 받는 날짜만 다시 계산
+# ------------------------------------------------------------------
+SHIFTS = [("주간", 8, 20), ("야간", 20, 32)]  # (교대, 시작 시각, 종료 시각) - 생산일 0시 기준, 야간은 다음날 08시까지
+DAY_START = SHIFTS[0][1]
+UNMAPPED = "미지정"  # 라인 매핑이 없는 설비의 비가동
+KEYS = ["날짜", "교대", "구분"]
+COLS = KEYS + ["계획", "비가동", "생산수량", "목표UPH"]
+
+
+def _hashes(df):
+    return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy() if not df.empty else np.array([], dtype=np.uint64)
+
+
+def line_map(config):
+    # line_equipment 시트 -> ({설비ID: 라인}, {라인: 목표 UPH})
+    #  같은 라인 설비의 목표 UPH가 다르면 가장 낮은 값(병목) 사용
+    if config is None or config.empty: return {}, {}
+    c = config.fillna("").astype(str).apply(lambda s: s.str.strip())
+    c = c[(c["구분"] != "") & (c["설비ID"] != "")]
+    uph = pd.to_numeric(c["목표UPH"].str.replace(",", "", regex=False), errors="coerce")
+    rates = uph[uph > 0].groupby(c["구분"]).min()
+    return dict(zip(c["설비ID"], c["구분"])), {k: float(v) for k, v in rates.items()}
+
+
+def _shift_of(day, ts):
+    # 입력시간으로 교대 판정 - 생산일 주간 구간이면 주간, 생산일 20시~다음날 08시면 야간, 그 외(나중 입력 등)는 주간
+    hours = ((ts - day) / pd.Timedelta(hours=1)).to_numpy(dtype=float, na_value=np.nan)
+    night = (hours >= SHIFTS[1][1]) & (hours < SHIFTS[1][2])
+    return np.where(night, SHIFTS[1][0], SHIFTS[0][0])
+
+
+def prepare_output(df):
+    # 생산 실적 -> [날짜, 교대, 구분, 수량] (날짜 없는 행 제외)
+    if df is None or df.empty:
+        return pd.DataFrame({"날짜": pd.Series(dtype="datetime64[ns]"), "교대": pd.Series(dtype=object), "구분": pd.Series(dtype=object), "수량": pd.Series(dtype=float)})
+    day = pd.to_datetime(df["날짜"].astype(str).str.split(" ").str[0], errors="coerce")
+    ts = pd.to_datetime(df["입력시간"].astype(str), errors="coerce", format="mixed")
+    out = pd.DataFrame({
+        "날짜": day.to_numpy(), "교대": _shift_of(day, ts), "구분": df["구분"].fillna("").astype(str).str.strip().to_numpy(),
+        "수량": pd.to_numeric(df["수량"].astype(str).str.replace(",", "", regex=False), errors="coerce").fillna(0).to_numpy(),
+    })
+    return out.dropna(subset=["날짜"]).reset_index(drop=True)
+
+
+def downtime_intervals(df, equip_line):
+    # 정비 이력 -> 비가동 구간 [구분, 시작, 종료] (비가동시간 0 이하 제외)
+    #  종료 = 입력시간 (생산일 08시 ~ 다음날 08시 사이에 입력된 경우), 아니면 생산일 08시 + 비가동시간
+    cols = ["구분", "시작", "종료"]
+    empty = pd.DataFrame({"구분": pd.Series(dtype=object), "시작": pd.Series(dtype="datetime64[ns]"), "종료": pd.Series(dtype="datetime64[ns]")})
+    if df is None or df.empty: return empty
+    day = pd.to_datetime(df["날짜"].astype(str).str.split(" ").str[0], errors="coerce")
+    minutes = pd.to_numeric(df["비가동시간"].astype(str).str.replace(",", "", regex=False), errors="coerce")
+    ts = pd.to_datetime(df["입력시간"].astype(str), errors="coerce", format="mixed")
+    open_ = day + pd.Timedelta(hours=DAY_START)
+    inside = (ts >= open_) & (ts < open_ + pd.Timedelta(days=1))
+    dur = pd.to_timedelta(minutes, unit="min")
+    end = ts.where(inside, open_ + dur)
+    line = df["설비ID"].fillna("").astype(str).str.strip().map(equip_line).fillna(UNMAPPED)
+    out = pd.DataFrame({"구분": line.to_numpy(), "시작": (end - dur).to_numpy(), "종료": end.to_numpy()})
+    out = out[day.notna().to_numpy() & (minutes > 0).to_numpy()]
+    return out[cols].reset_index(drop=True) if not out.empty else empty
+
+
+def merge_intervals(iv):
+    # 라인별 겹치는 비가동 구간 합집합 (설비 여러 대가 동시에 멈춘 시간은 한 번만)
+    if iv.empty: return iv
+    iv = iv.sort_values(["구분", "시작"], kind="stable").reset_index(drop=True)
+    reach = iv.groupby("구분")["종료"].cummax()
+    prev = reach.groupby(iv["구분"]).shift()
+    block = (prev.isna() | (iv["시작"] > prev)).cumsum()
+    return iv.groupby(block).agg(구분=("구분", "first"), 시작=("시작", "min"), 종료=("종료", "max")).reset_index(drop=True)
+
+
+def _span_days(iv):
+    # 구간이 걸친 생산일 범위 (첫날, 일수)
+    shift = pd.Timedelta(hours=DAY_START)
+    first = (iv["시작"] - shift).dt.normalize()
+    last = (iv["종료"] - shift - pd.Timedelta(microseconds=1)).dt.normalize()
+    return first, ((last - first).dt.days + 1).clip(lower=1)
+
+
+def allocate(blocks):
+    # 합집합 구간 -> (날짜, 교대, 구분)별 비가동(분) - 구간 x 교대 창 겹침 길이
+    if blocks.empty: return pd.DataFrame(columns=KEYS + ["비가동"])
+    first, days = _span_days(blocks)
+    rep = blocks.loc[blocks.index.repeat(days)]
+    day = first.loc[rep.index] + pd.to_timedelta(rep.groupby(level=0).cumcount().to_numpy(), unit="D")
+    s, e = rep["시작"].to_numpy(), rep["종료"].to_numpy()
+    parts = []
+    for name, start_h, end_h in SHIFTS:
+        ws = (day + pd.Timedelta(hours=start_h)).to_numpy()
+        we = (day + pd.Timedelta(hours=end_h)).to_numpy()
+        overlap = (np.minimum(e, we) - np.maximum(s, ws)) / np.timedelta64(1, "m")
+        parts.append(pd.DataFrame({"날짜": day.to_numpy(), "교대": name, "구분": rep["구분"].to_numpy(), "비가동": np.clip(overlap, 0, None)}))
+    out = pd.concat(parts, ignore_index=True)
+    out = out[out["비가동"] > 0]
+    return out.groupby(KEYS, as_index=False)["비가동"].sum()
+
+
+def shift_table(output, intervals, rates):
+    # (날짜, 교대, 구분) 집계 - 생산 또는 비가동이 있는 교대만 계획 시간에 포함
+    made = output.groupby(KEYS, as_index=False)["수량"].sum().rename(columns={"수량": "생산수량"}) if not output.empty else pd.DataFrame(columns=KEYS + ["생산수량"])
+    down = allocate(merge_intervals(intervals))
+    t = made.merge(down, on=KEYS, how="outer")
+    if t.empty: return pd.DataFrame(columns=COLS)
+    length = {name: (end_h - start_h) * 60 for name, start_h, end_h in SHIFTS}
+    t["계획"] = t["교대"].map(length).astype(float)
+    t["비가동"] = t["비가동"].astype(float).fillna(0).clip(upper=t["계획"])
+    t["생산수량"] = t["생산수량"].astype(float).fillna(0)
+    t["목표UPH"] = t["구분"].map(rates).astype(float)
+    t["날짜"] = pd.to_datetime(t["날짜"])
+    return t[COLS]
+
+
+def rates_frame(t, by):
+    # 집계 -> 가동률 / 성능 / OEE (기간 합계 기준 비율, 목표 UPH 없는 라인은 성능/OEE 빈값)
+    cols = by + ["계획", "비가동", "가동", "생산수량", "목표수량", "가동률", "성능", "OEE"]
+    if t.empty: return pd.DataFrame(columns=cols)
+    # 성능은 목표 UPH가 있는 교대의 생산수량만 대상
+    t = t.assign(가동=t["계획"] - t["비가동"], 목표수량=(t["계획"] - t["비가동"]) / 60 * t["목표UPH"],
+                 대상수량=t["생산수량"].where(t["목표UPH"].notna()))
+    g = t.groupby(by, as_index=False).agg(계획=("계획", "sum"), 비가동=("비가동", "sum"), 가동=("가동", "sum"), 생산수량=("생산수량", "sum"),
+                                           대상수량=("대상수량", "sum"), 목표수량=("목표수량", lambda s: s.sum(min_count=1)))
+    return ratios(g, "대상수량")[cols]
+
+
+def ratios(g, made="생산수량"):
+    # 합계 열(계획, 가동, 생산수량, 목표수량) -> 가동률 / 성능 / OEE (%) - 기간 버킷팅 후에도 사용
+    g = g.copy()
+    g["가동률"] = (g["가동"] / g["계획"].where(g["계획"] > 0) * 100).round(1)
+    g["성능"] = (g[made] / g["목표수량"].where(g["목표수량"] > 0) * 100).round(1)
+    g["OEE"] = (g["가동률"] * g["성능"] / 100).round(1)
+    g["목표수량"] = g["목표수량"].round(0)
+    return g
+
+
+class OeeEngine:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._prod_hashes = np.array([], dtype=np.uint64)
+        self._maint_hashes = np.array([], dtype=np.uint64)
+        self._config = None
+        self.version = None
+        self.equip_line, self.rates = {}, {}
+        self.output = prepare_output(None)
+        self.intervals = downtime_intervals(None, {})
+        self.table = pd.DataFrame(columns=COLS)
+
+    def sync(self, production, maintenance, config, version=None):
+        # 반환: 다시 계산한 날짜 수 (-1: 전체 재계산) - version은 세 시트 버전 묶음
+        with self._lock:
+            if version is not None and version == self.version: return 0
+            cfg = pd.util.hash_pandas_object(config.astype(str), index=False).sum() if config is not None and not config.empty else 0
+            ph, mh = _hashes(production), _hashes(maintenance)
+            p_ok = self._extends(ph, self._prod_hashes)
+            m_ok = self._extends(mh, self._maint_hashes)
+            if cfg != self._config or not (p_ok and m_ok) or self.version is None:
+                self.equip_line, self.rates = line_map(config)
+                self.output = prepare_output(production)
+                self.intervals = downtime_intervals(maintenance, self.equip_line)
+                self.table = shift_table(self.output, self.intervals, self.rates)
+                touched = -1
+            else:
+                touched = self._append(production.iloc[len(self._prod_hashes):], maintenance.iloc[len(self._maint_hashes):])
+            self._prod_hashes, self._maint_hashes, self._config, self.version = ph, mh, cfg, version
+            return touched
+
+    @staticmethod
+    def _extends(new, old):
+        return len(new) >= len(old) and np.array_equal(new[:len(old)], old)
+
+    def _append(self, prod_new, maint_new):
+        out_new = prepare_output(prod_new)
+        iv_new = downtime_intervals(maint_new, self.equip_line)
+        days = set(out_new["날짜"].unique())
+        if not iv_new.empty:
+            first, n = _span_days(iv_new)
+            for d, k in zip(first, n): days.update(d + pd.Timedelta(days=i) for i in range(k))
+        if not days: return 0
+        self.output = pd.concat([self.output, out_new], ignore_index=True) if not self.output.empty else out_new
+        self.intervals = pd.concat([self.intervals, iv_new], ignore_index=True) if not self.intervals.empty else iv_new
+        # 영향 받는 날짜에 걸친 구간만 다시 합집합 -> 해당 날짜 행만 교체
+        days = pd.DatetimeIndex(sorted(days))
+        first, n = _span_days(self.intervals) if not self.intervals.empty else (pd.Series(dtype="datetime64[ns]"), pd.Series(dtype=int))
+        last = first + pd.to_timedelta(n - 1, unit="D")
+        hit = (first <= days.max()) & (last >= days.min())
+        part = shift_table(self.output[self.output["날짜"].isin(days)], self.intervals[hit], self.rates)
+        part = part[part["날짜"].isin(days)]
+        keep = self.table[~self.table["날짜"].isin(days)]
+        self.table = pd.concat([keep, part], ignore_index=True) if not keep.empty else part.reset_index(drop=True)
+        return len(days)
+
+    # -------------------- 조회 --------------------
+    def _range(self, start, end, line=None):
+        with self._lock:
+            t = self.table
+        mask = pd.Series(True, index=t.index)
+        if start is not None: mask &= t["날짜"] >= pd.Timestamp(start)
+        if end is not None: mask &= t["날짜"] <= pd.Timestamp(end)
+        if line: mask &= t["구분"] == line
+        return t[mask]
+
+    def summary(self, start=None, end=None, line=None):
+        # 전체 합계는 매핑된 라인만 (미지정 설비 비가동은 by_line에서 따로 표시)
+        t = self._range(start, end, line) if line else self.shifts(start, end)
+        r = rates_frame(t.assign(_all=0), ["_all"])
+        if r.empty: return {"plan": 0.0, "down": 0.0, "output": 0.0, "availability": None, "performance": None, "oee": None}
+        row = r.iloc[0]
+        val = lambda v: None if pd.isna(v) else float(v)
+        return {"plan": float(row["계획"]), "down": float(row["비가동"]), "output": float(row["생산수량"]),
+                "availability": val(row["가동률"]), "performance": val(row["성능"]), "oee": val(row["OEE"])}
+
+    def shifts(self, start=None, end=None):
+        # 매핑된 라인의 교대 행 (여러 사이트를 합쳐 rates_frame으로 다시 집계할 때 사용)
+        t = self._range(start, end)
+        return t[t["구분"] != UNMAPPED]
+
+    def by_line(self, start=None, end=None):
+        return rates_frame(self._range(start, end), ["구분"]).sort_values("구분").reset_index(drop=True)
+
+    def by_shift(self, start=None, end=None, line=None):
+        return rates_frame(self._range(start, end, line), ["구분", "교대"]).sort_values(["구분", "교대"]).reset_index(drop=True)
+
+    def trend(self, start=None, end=None, line=None):
+        # 일자 x 라인 (날짜순)
+        return rates_frame(self._range(start, end, line), ["날짜", "구분"]).sort_values(["날짜", "구분"]).reset_index(drop=True)
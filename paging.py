@@ -0,0 +1,80 @@
+import io
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------
+# 서버 사이드 필터/정렬/페이지 처리
+#  - 필터 결과는 행 위치(positions)만 보관하고, 화면에는 한 페이지만 전달
+#  - 내보내기는 청크 단위로 CSV/XLSX 생성
+# ------------------------------------------------------------------
+PAGE_SIZES = [20, 50, 100, 200]
+EXPORT_CHUNK = 5000
+
+
+def query_positions(df, date_col=None, start=None, end=None, equals=None, text_cols=None, text=None, sort_col=None, ascending=False):
+    # 조건에 맞는 행의 위치 배열 (정렬 반영)
+    if df.empty: return np.array([], dtype=int)
+    mask = np.ones(len(df), dtype=bool)
+    if date_col and (start is not None or end is not None):
+        dates = pd.to_datetime(df[date_col], errors="coerce")
+        if start is not None: mask &= (dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None: mask &= (dates < pd.Timestamp(end) + pd.Timedelta(days=1)).to_numpy()
+    for col, values in (equals or {}).items():
+        if values: mask &= df[col].astype(str).isin([str(v) for v in values]).to_numpy()
+    if text and text_cols:
+        hit = np.zeros(len(df), dtype=bool)
+        for col in text_cols:
+            hit |= df[col].astype(str).str.contains(text.strip(), case=False, regex=False).to_numpy()
+        mask &= hit
+    positions = np.flatnonzero(mask)
+    if sort_col and len(positions) > 1:
+        positions = positions[_sort_order(df[sort_col].iloc[positions], ascending)]
+    return positions
+
+
+def _sort_order(s, ascending):
+    # 숫자 컬럼(비용, 수량 등)은 숫자 기준, 그 외는 문자열 기준 정렬
+    num = pd.to_numeric(s, errors="coerce")
+    filled = s.astype(str).str.strip() != ""
+    key = num if filled.any() and num[filled].notna().all() else s.astype(str)
+    return key.reset_index(drop=True).sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def page_slice(total, page, page_size):
+    # 반환: (시작, 끝, 전체 페이지 수, 보정된 페이지)
+    pages = max(1, -(-total // page_size))
+    page = min(max(1, int(page)), pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total), pages, page
+
+
+def iter_chunks(df, positions=None, chunk_size=EXPORT_CHUNK):
+    if positions is None: positions = np.arange(len(df))
+    for i in range(0, len(positions), chunk_size):
+        yield df.iloc[positions[i:i + chunk_size]]
+
+
+def export_csv(df, positions=None, chunk_size=EXPORT_CHUNK):
+    # 엑셀 한글 깨짐 방지를 위해 BOM 포함
+    buf = io.StringIO()
+    buf.write("﻿")
+    header = True
+    for chunk in iter_chunks(df, positions, chunk_size):
+        chunk.to_csv(buf, index=False, header=header)
+        header = False
+    if header: df.head(0).to_csv(buf, index=False)
+    return buf.getvalue().encode("utf-8")
+
+
+def export_xlsx(df, positions=None, sheet_name="data", chunk_size=EXPORT_CHUNK):
+    # openpyxl write-only 모드로 청크 단위 기록
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name[:31])
+    ws.append([str(c) for c in df.columns])
+    for chunk in iter_chunks(df, positions, chunk_size):
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append(["" if v is None or (isinstance(v, float) and np.isnan(v)) else v for v in row])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
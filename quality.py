@@ -0,0 +1,201 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------
+# 점검 품질 분석 (NG 추이 / 설비별 NG율 / 수치 항목 SPC)
+#  - 점검 결과 시트를 타입 변환한 이력(날짜, 항목 키, 수치값, NG 여부)으로 보관
+#  - 일자 x 라인 x 설비 단위 점검수/NG수를 미리 집계해 두고 기간 조회는 집계만 필터
+#  - 시트 뒤에 행만 추가된 경우 새 행이 속한 날짜만 다시 집계 (기존 행 변경 시 전체 재구성)
+# ------------------------------------------------------------------
+KEYS = ["line", "equip_id", "item_name"]
+DAILY_KEYS = ["날짜", "line", "equip_id"]
+
+# 관리도 계수 (부분군 크기 n)
+SPC_A2 = {2: 1.880, 3: 1.023, 4: 0.729, 5: 0.577, 6: 0.483, 7: 0.419, 8: 0.373, 9: 0.337, 10: 0.308}
+SPC_D2 = {2: 1.128, 3: 1.693, 4: 2.059, 5: 2.326, 6: 2.534, 7: 2.704, 8: 2.847, 9: 2.970, 10: 3.078}
+SPC_D3 = {2: 0.0, 3: 0.0, 4: 0.0, 5: 0.0, 6: 0.0, 7: 0.076, 8: 0.136, 9: 0.184, 10: 0.223}
+SPC_D4 = {2: 3.267, 3: 2.574, 4: 2.282, 5: 2.114, 6: 2.004, 7: 1.924, 8: 1.864, 9: 1.816, 10: 1.777}
+
+
+def prepare_checks(df, start=0):
+    # 시트 문자열 -> 분석용 타입 변환 (인덱스는 시트 내 행 위치, 날짜 없는 행 제외)
+    idx = pd.RangeIndex(start, start + len(df))
+    if df.empty:
+        return pd.DataFrame({
+            "날짜": pd.Series(dtype="datetime64[ns]"), "line": pd.Series(dtype=str), "equip_id": pd.Series(dtype=str),
+            "item_name": pd.Series(dtype=str), "value": pd.Series(dtype=float), "ng": pd.Series(dtype=bool),
+            "ts": pd.Series(dtype="datetime64[ns]"),
+        })
+    col = lambda c: (df[c] if c in df.columns else pd.Series("", index=df.index)).fillna("").astype(str).str.strip().to_numpy()
+    out = pd.DataFrame({
+        "날짜": pd.to_datetime(pd.Series(col("date")).str.split(" ").str[0], errors="coerce").to_numpy(),
+        "line": col("line"), "equip_id": col("equip_id"), "item_name": col("item_name"),
+        "value": pd.to_numeric(pd.Series(col("value")).str.replace(",", "", regex=False), errors="coerce").to_numpy(),
+        "ng": pd.Series(col("ox")).str.upper().eq("NG").to_numpy(),
+        "ts": pd.to_datetime(pd.Series(col("timestamp")), errors="coerce", format="mixed").to_numpy(),
+    }, index=idx)
+    return out.dropna(subset=["날짜"])
+
+
+def latest_per_day(typed):
+    # 같은 날 같은 항목을 여러 번 저장한 경우 최신 1건만 (대시보드 금일 현황과 동일 기준)
+    #  입력시간이 없으면 시트 순서 기준
+    order = typed.assign(_pos=typed.index).sort_values(["ts", "_pos"], na_position="first", kind="stable")
+    return order.drop_duplicates(["날짜"] + KEYS, keep="last").drop(columns="_pos")
+
+
+def daily_counts(latest):
+    cols = DAILY_KEYS + ["점검수", "NG수"]
+    if latest.empty: return pd.DataFrame(columns=cols)
+    return latest.groupby(DAILY_KEYS, as_index=False, sort=False).agg(점검수=("ng", "size"), NG수=("ng", "sum"))[cols]
+
+
+def numeric_items(master):
+    # 수치 입력 항목 (점검 입력 화면과 같은 기준: NUMBER 유형 또는 온/습도 라인) + 규격 하한/상한
+    cols = KEYS + ["equip_name", "unit", "lsl", "usl"]
+    if master is None or master.empty: return pd.DataFrame(columns=cols)
+    m = master.fillna("").astype(str)
+    mask = m["check_type"].eq("NUMBER") | m["line"].str.contains("온,습도|온습도", regex=True)
+    m = m[mask].drop_duplicates(KEYS)
+    spec = lambda c: pd.to_numeric(m[c].str.replace(",", "", regex=False), errors="coerce")
+    return m.assign(lsl=spec("min_val"), usl=spec("max_val")).reindex(columns=cols).reset_index(drop=True)
+
+
+class QualityHistory:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._hashes = np.array([], dtype=np.uint64)
+        self.version = None
+        self.typed = prepare_checks(pd.DataFrame())
+        self.latest = latest_per_day(self.typed)
+        self.daily = daily_counts(self.latest)
+
+    def sync(self, df, version=None):
+        # 반환: 이번 호출에서 새로 반영한 행 수 (같은 데이터 버전이면 해시 비교도 생략)
+        with self._lock:
+            if version is not None and version == self.version: return 0
+            hashes = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy() if not df.empty else np.array([], dtype=np.uint64)
+            n = len(self._hashes)
+            if n and len(hashes) >= n and np.array_equal(hashes[:n], self._hashes):
+                added = self._append(df.iloc[n:], n)
+            else:
+                self.typed = prepare_checks(df)
+                self.latest = latest_per_day(self.typed)
+                self.daily = daily_counts(self.latest)
+                added = len(df)
+            self._hashes, self.version = hashes, version
+            return added
+
+    def _append(self, new, start):
+        if new.empty: return 0
+        rows = prepare_checks(new, start)
+        self.typed = pd.concat([self.typed, rows]) if not self.typed.empty else rows
+        # 새 행이 속한 날짜만 최신값/일 집계 재계산
+        days = rows["날짜"].unique()
+        keep = ~self.latest["날짜"].isin(days)
+        part = latest_per_day(self.typed[self.typed["날짜"].isin(days)])
+        self.latest = pd.concat([self.latest[keep], part]) if keep.any() else part
+        keep = ~self.daily["날짜"].isin(days)
+        part = daily_counts(part)
+        self.daily = pd.concat([self.daily[keep], part], ignore_index=True) if keep.any() else part
+        return len(new)
+
+    # -------------------- 조회 --------------------
+    def _daily(self, start, end):
+        d = self.daily
+        mask = pd.Series(True, index=d.index)
+        if start is not None: mask &= d["날짜"] >= pd.Timestamp(start)
+        if end is not None: mask &= d["날짜"] <= pd.Timestamp(end)
+        return d[mask]
+
+    def ng_summary(self, start=None, end=None):
+        d = self._daily(start, end)
+        checks, ng = int(d["점검수"].sum()), int(d["NG수"].sum())
+        return {"checks": checks, "ng": ng, "rate": ng / checks * 100 if checks else 0.0, "days": int(d["날짜"].nunique())}
+
+    def ng_trend(self, start=None, end=None, by="line"):
+        # 일자 x 그룹(line / equip_id) 점검수, NG수
+        d = self._daily(start, end)
+        cols = ["날짜", by, "점검수", "NG수"]
+        if d.empty: return pd.DataFrame(columns=cols)
+        return d.groupby(["날짜", by], as_index=False)[["점검수", "NG수"]].sum()[cols]
+
+    def ng_by_equipment(self, start=None, end=None):
+        # 설비별 점검수 / NG수 / NG율(%) - NG율 높은 순
+        d = self._daily(start, end)
+        cols = ["line", "equip_id", "점검수", "NG수", "NG율"]
+        if d.empty: return pd.DataFrame(columns=cols)
+        g = d.groupby(["line", "equip_id"], as_index=False)[["점검수", "NG수"]].sum()
+        g["NG율"] = (g["NG수"] / g["점검수"].where(g["점검수"] > 0) * 100).round(2).fillna(0)
+        return g.sort_values(["NG율", "NG수"], ascending=False)[cols].reset_index(drop=True)
+
+    def series(self, line, equip_id, item_name, start=None, end=None):
+        # 수치 항목 측정값 (일자별 최신값, 날짜순) - 반환: DataFrame[날짜, value, ng]
+        with self._lock:
+            lt = self.latest
+        mask = (lt["line"] == str(line)) & (lt["equip_id"] == str(equip_id)) & (lt["item_name"] == str(item_name)) & lt["value"].notna()
+        if start is not None: mask &= lt["날짜"] >= pd.Timestamp(start)
+        if end is not None: mask &= lt["날짜"] <= pd.Timestamp(end)
+        return lt.loc[mask, ["날짜", "value", "ng"]].sort_values("날짜", kind="stable").reset_index(drop=True)
+
+
+# ------------------------------------------------------------------
+# SPC 관리도 / 공정능력
+# ------------------------------------------------------------------
+def individuals(values):
+    # 개별값-이동범위(I-MR) 관리도 - 반환: 관리한계 dict (데이터 2개 미만이면 None)
+    x = np.asarray(values, dtype=float)
+    if len(x) < 2: return None
+    mr = np.abs(np.diff(x))
+    mr_bar = float(mr.mean())
+    sigma = mr_bar / SPC_D2[2]
+    center = float(x.mean())
+    return {"center": center, "ucl": center + 3 * sigma, "lcl": center - 3 * sigma, "sigma": sigma,
+            "r_center": mr_bar, "r_ucl": SPC_D4[2] * mr_bar, "r_lcl": 0.0, "points": x, "ranges": np.r_[np.nan, mr]}
+
+
+def xbar_r(values, n=5):
+    # X-bar / R 관리도 - 연속 n개씩 부분군 (나머지는 제외), 부분군 2개 미만이면 None
+    n = int(n)
+    if n not in SPC_A2: raise ValueError("부분군 크기는 2~10")
+    x = np.asarray(values, dtype=float)
+    k = len(x) // n
+    if k < 2: return None
+    groups = x[:k * n].reshape(k, n)
+    means, ranges = groups.mean(axis=1), np.ptp(groups, axis=1)
+    center, r_bar = float(means.mean()), float(ranges.mean())
+    return {"center": center, "ucl": center + SPC_A2[n] * r_bar, "lcl": center - SPC_A2[n] * r_bar, "sigma": r_bar / SPC_D2[n],
+            "r_center": r_bar, "r_ucl": SPC_D4[n] * r_bar, "r_lcl": SPC_D3[n] * r_bar, "points": means, "ranges": ranges}
+
+
+def capability(values, sigma, lsl=None, usl=None):
+    # 반환: {"cp", "cpk", "ppk"} - 규격 한쪽만 있으면 단측(Cp 없음), 규격/산포 없으면 None
+    x = np.asarray(values, dtype=float)
+    out = {"cp": None, "cpk": None, "ppk": None}
+    if not len(x): return out
+    mean, overall = float(x.mean()), float(x.std(ddof=1)) if len(x) > 1 else 0.0
+
+    def index(s):
+        sides = []
+        if usl is not None: sides.append((usl - mean) / (3 * s))
+        if lsl is not None: sides.append((mean - lsl) / (3 * s))
+        return min(sides) if sides else None
+
+    if sigma and sigma > 0:
+        out["cpk"] = index(sigma)
+        if usl is not None and lsl is not None: out["cp"] = (usl - lsl) / (6 * sigma)
+    if overall > 0: out["ppk"] = index(overall)
+    return out
+
+
+def control_frame(dates, chart, n=1):
+    # 차트용 - 반환: DataFrame[순번, 날짜, 값, 범위, 이탈]
+    pts = chart["points"]
+    if n > 1:
+        d = pd.Series(pd.to_datetime(dates)).to_numpy()[n - 1:len(pts) * n:n]  # 부분군 마지막 날짜
+    else:
+        d = pd.Series(pd.to_datetime(dates)).to_numpy()[:len(pts)]
+    out = (pts > chart["ucl"]) | (pts < chart["lcl"]) | (chart["ranges"] > chart["r_ucl"])
+    return pd.DataFrame({"순번": np.arange(1, len(pts) + 1), "날짜": d, "값": pts, "범위": chart["ranges"], "이탈": out})
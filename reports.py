@@ -0,0 +1,196 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import paging
+
+# ------------------------------------------------------------------
+# 엑셀 보고서 (월간 생산 / 재고 입출고 / 정비 비용)
+#  - 보고서 = 시트 목록 [(시트 이름, DataFrame)] - 피벗/일 합계 등 집계표 + 기간 내 원본 목록
+#  - openpyxl write-only 모드로 임시 파일에 청크 단위 기록 -> 기간이 길어도 메모리 사용량 일정
+#  - 생성은 백그라운드 작업 스레드에서 수행, 결과 파일은 (보고서, 기간, 데이터 버전)별로 보관해 재사용
+# ------------------------------------------------------------------
+REPORT_DIR_ENV = "SMT_REPORT_DIR"
+REPORT_DIR_DEFAULT = "reports"
+KEEP_FILES = 50  # 보관할 최근 보고서 파일 수
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _rows_in(raw, start, end, col="날짜"):
+    # 기간 내 원본 행 (날짜순) - 날짜 없는 행 제외
+    if raw.empty: return raw
+    day = pd.to_datetime(raw[col].astype(str).str.split(" ").str[0], errors="coerce")
+    mask = (day >= pd.Timestamp(start)) & (day <= pd.Timestamp(end))
+    return raw[mask.to_numpy()].iloc[np.argsort(day[mask].to_numpy(), kind="stable")]
+
+
+def _pivot(df, index, columns, values, total="합계"):
+    # 합계 행/열 포함 피벗 (값 없는 칸은 0)
+    if df.empty: return pd.DataFrame(columns=list(np.atleast_1d(index)) + [total])
+    p = df.pivot_table(index=index, columns=columns, values=values, aggfunc="sum", fill_value=0, margins=True, margins_name=total)
+    p.columns = [str(c) for c in p.columns]
+    return p.copy().reset_index()
+
+
+def _day(df, col="날짜"):
+    return df.assign(**{col: df[col].dt.strftime("%Y-%m-%d")})
+
+
+# -------------------- 보고서 정의 --------------------
+def production_sheets(frames, start, end):
+    raw = _rows_in(frames["production"], start, end)
+    df = analytics.prepare_production(raw).assign(제품명=raw["제품명"].fillna("").astype(str).to_numpy() if len(raw) else [])
+    by_cat = df.groupby("구분", as_index=False).agg(건수=("수량", "size"), 수량=("수량", "sum")).sort_values("수량", ascending=False)
+    daily = df.groupby("날짜", as_index=False).agg(건수=("수량", "size"), 수량=("수량", "sum"))
+    return [
+        ("구분별 요약", by_cat),
+        ("일자x구분", _pivot(_day(df), "날짜", "구분", "수량")),
+        ("품목x구분", _pivot(df, ["품목코드", "제품명"], "구분", "수량")),
+        ("일별 합계", _day(daily)),
+        ("실적 목록", raw),
+    ]
+
+
+def inventory_sheets(frames, start, end):
+    raw = _rows_in(frames["inv_history"], start, end)
+    df = raw.assign(날짜=pd.to_datetime(raw["날짜"].astype(str).str.split(" ").str[0], errors="coerce"),
+                    수량=pd.to_numeric(raw["수량"], errors="coerce").fillna(0))
+    names = frames["inventory"].drop_duplicates("품목코드").set_index("품목코드")["제품명"] if not frames["inventory"].empty else pd.Series(dtype=str)
+    items = _pivot(df.assign(제품명=df["품목코드"].map(names).fillna("")), ["품목코드", "제품명"], "구분", "수량")
+    if not items.empty: items = items.rename(columns={"합계": "순증감"})
+    return [
+        ("품목별 입출고", items),
+        ("일자x구분", _pivot(_day(df), "날짜", "구분", "수량")),
+        ("사유별", df.groupby(["비고", "구분"], as_index=False).agg(건수=("수량", "size"), 수량=("수량", "sum"))),
+        ("현재고", frames["inventory"]),
+        ("입출고 이력", raw),
+    ]
+
+
+def maintenance_sheets(frames, start, end):
+    raw = _rows_in(frames["maintenance"], start, end)
+    df = analytics.prepare_maintenance(raw)
+    down = df[df["비가동시간"] > 0]
+    return [
+        ("설비별 비용", analytics.reliability(df, start, end)),
+        ("유형별", analytics.type_counts(df)),
+        ("설비x일 비가동", _pivot(_day(down), ["설비ID", "설비명"], "날짜", "비가동시간")),
+        ("일별 합계", _day(df.groupby("날짜", as_index=False).agg(건수=("비용", "size"), 비용=("비용", "sum"), 비가동시간=("비가동시간", "sum")))),
+        ("정비 이력", raw),
+    ]
+
+
+# 보고서: 이름 -> (표시 이름, 필요한 시트 키, 시트 구성 함수)
+REPORTS = {
+    "production": ("월간 생산 실적", ["production"], production_sheets),
+    "inventory": ("재고 입출고", ["inv_history", "inventory"], inventory_sheets),
+    "maintenance": ("정비 비용 / 비가동", ["maintenance"], maintenance_sheets),
+}
+
+
+def write_xlsx(path, sheets, chunk_size=paging.EXPORT_CHUNK):
+    # write-only 통합문서에 시트별 청크 기록 후 임시 파일 교체
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    wb = Workbook(write_only=True)
+    bold = Font(bold=True)
+    for title, df in sheets:
+        ws = wb.create_sheet(title=title[:31])
+        ws.freeze_panes = "A2"
+        for i, c in enumerate(df.columns):
+            ws.column_dimensions[_col_letter(i)].width = max(10, min(40, len(str(c)) * 2 + 2))
+        header = []
+        for c in df.columns:
+            cell = WriteOnlyCell(ws, value=str(c)); cell.font = bold
+            header.append(cell)
+        ws.append(header)
+        for chunk in paging.iter_chunks(df, None, chunk_size):
+            for row in chunk.itertuples(index=False, name=None):
+                ws.append([_value(v) for v in row])
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    wb.save(tmp)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _col_letter(i):
+    from openpyxl.utils import get_column_letter
+    return get_column_letter(i + 1)
+
+
+def _value(v):
+    # 빈 값은 셀을 만들지 않음 (write-only 모드는 None 셀을 건너뜀)
+    if v is None or (isinstance(v, str) and v == ""): return None
+    if isinstance(v, (float, np.floating)): return None if np.isnan(v) else float(v)
+    if isinstance(v, np.integer): return int(v)
+    if isinstance(v, pd.Timestamp): return v.to_pydatetime()
+    return v
+
+
+def report_key(name, start, end, version):
+    return hashlib.md5(f"{name}|{start}|{end}|{version}".encode()).hexdigest()[:16]
+
+
+class Exporter:
+    # 보고서 생성 작업 큐 (작업 스레드 1개) - 같은 키의 요청은 한 번만 생성
+    def __init__(self, root=None):
+        self.root = root or os.environ.get(REPORT_DIR_ENV) or REPORT_DIR_DEFAULT
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.jobs = {}  # 키 -> {"status": queued/running/done/error, "path", "bytes", "seconds", "error"}
+        self._thread = threading.Thread(target=self._loop, name="report-export", daemon=True)
+        self._thread.start()
+
+    def path(self, key):
+        return os.path.join(self.root, key + ".xlsx")
+
+    def request(self, name, start, end, frames, version):
+        # frames: {시트 키: DataFrame} (요청 시점 스냅샷) - 반환: (키, 작업 상태)
+        key = report_key(name, start, end, version)
+        with self._lock:
+            job = self.jobs.get(key)
+            if job and job["status"] != "error": return key, job
+            if os.path.exists(self.path(key)):
+                job = self.jobs[key] = {"status": "done", "path": self.path(key), "bytes": os.path.getsize(self.path(key)), "seconds": 0.0, "error": None}
+                return key, job
+            job = self.jobs[key] = {"status": "queued", "path": None, "bytes": 0, "seconds": 0.0, "error": None}
+        self._queue.put((key, name, start, end, frames))
+        return key, job
+
+    def status(self, key):
+        return self.jobs.get(key)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _loop(self):
+        while True:
+            key, name, start, end, frames = self._queue.get()
+            job = self.jobs[key]
+            job["status"] = "running"
+            t0 = time.perf_counter()
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                sheets = REPORTS[name][2](frames, start, end)
+                size = write_xlsx(self.path(key), sheets)
+                job.update(bytes=size, seconds=round(time.perf_counter() - t0, 2), path=self.path(key), status="done")
+                self._prune()
+            except Exception as e:
+                job.update(seconds=round(time.perf_counter() - t0, 2), error=str(e), status="error")
+
+    def _prune(self):
+        # 오래된 보고서 파일 정리 (최근 KEEP_FILES개 유지)
+        files = sorted((os.path.join(self.root, f) for f in os.listdir(self.root) if f.endswith(".xlsx")), key=os.path.getmtime)
+        for path in files[:-KEEP_FILES]:
+            try: os.remove(path)
+            except OSError: continue
+            key = os.path.basename(path)[:-5]
+            with self._lock:
+                if key in self.jobs and self.jobs[key]["status"] == "done": del self.jobs[key]
@@ -0,0 +1,166 @@
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------------
+# 이력 통합 검색용 역색인 (프로세스 메모리)
+#  - 자유 텍스트: 영문/숫자는 단어, 한글은 2-gram 단위로 색인
+#  - 구조 필드: "필드:값" 형태로 정확 일치 필터 (예: 작업구분:BM 설비ID:M1)
+#  - 시트가 뒤에 행만 추가된 경우 새 행만 색인, 기존 행이 바뀌면 해당 소스만 재색인
+# ------------------------------------------------------------------
+TOKEN_RE = re.compile(r"[0-9a-z가-힣]+")
+HANGUL_RE = re.compile(r"[가-힣]")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    terms = []
+    for tok in TOKEN_RE.findall(str(text).lower()):
+        if HANGUL_RE.search(tok) and len(tok) >= 2:
+            terms.extend(tok[i:i + 2] for i in range(len(tok) - 1))
+        else:
+            terms.append(tok)
+    return terms
+
+
+def parse_query(query):
+    # "작업구분:BM 노즐 교체" -> ({"작업구분": "bm"}, ["노즐", "교체"])
+    filters, words = {}, []
+    for part in str(query).split():
+        if ":" in part:
+            field, value = part.split(":", 1)
+            if field and value:
+                filters[field] = value.lower()
+                continue
+        words.append(part)
+    return filters, words
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}                     # doc_id -> (source, 위치, 날짜, 표시용 필드, 길이)
+        self._postings = defaultdict(dict)  # term -> {doc_id: tf}
+        self._fields = defaultdict(lambda: defaultdict(set))  # field -> 값 -> {doc_id}
+        self._vocab = []                    # 접두어 검색용 정렬된 용어 목록
+        self._sources = {}                  # source -> {"hashes": 행 해시, "ids": [doc_id]}
+        self._next_id = 0
+        self._total_len = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    # -------------------- 색인 --------------------
+    def sync(self, source, df, text_cols, field_cols, date_col=None, show_cols=None, version=None):
+        # 반환: 이번 호출에서 새로 색인한 행 수 (같은 데이터 버전이면 해시 비교도 생략)
+        with self._lock:
+            state = self._sources.get(source)
+            if version is not None and state is not None and state.get("version") == version: return 0
+            hashes = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy() if not df.empty else np.array([], dtype=np.uint64)
+            start = 0
+            if state is not None:
+                n = len(state["hashes"])
+                if len(hashes) >= n and np.array_equal(hashes[:n], state["hashes"]):
+                    start = n
+                else:
+                    self._drop_source(source)
+                    state = None
+            if state is None:
+                state = self._sources[source] = {"hashes": hashes[:0], "ids": []}
+            new = df.iloc[start:]
+            dates = pd.to_datetime(new[date_col].astype(str).str.split(" ").str[0], errors="coerce") if date_col else pd.Series(pd.NaT, index=new.index)
+            for pos, row, date in zip(range(start, len(df)), new.to_dict("records"), dates):
+                state["ids"].append(self._add_doc(source, pos, row, date, text_cols, field_cols, show_cols))
+            state["hashes"] = hashes
+            state["version"] = version
+            return len(new)
+
+    def _add_doc(self, source, pos, row, date, text_cols, field_cols, show_cols):
+        doc_id = self._next_id
+        self._next_id += 1
+        terms = []
+        for c in text_cols:
+            terms.extend(tokenize(row.get(c, "")))
+        for c in field_cols:
+            value = str(row.get(c, "")).strip()
+            terms.extend(tokenize(value))
+            if value: self._fields[c][value.lower()].add(doc_id)
+        tf = defaultdict(int)
+        for t in terms: tf[t] += 1
+        for t, n in tf.items():
+            if t not in self._postings: bisect.insort(self._vocab, t)
+            self._postings[t][doc_id] = n
+        shown = {c: row.get(c, "") for c in (show_cols or list(text_cols) + list(field_cols))}
+        self._docs[doc_id] = (source, pos, date, shown, len(terms))
+        self._total_len += len(terms)
+        return doc_id
+
+    def _drop_source(self, source):
+        state = self._sources.pop(source, None)
+        if not state: return
+        ids = set(state["ids"])
+        for t in list(self._postings):
+            plist = self._postings[t]
+            for d in ids & plist.keys(): del plist[d]
+            if not plist:
+                del self._postings[t]
+                i = bisect.bisect_left(self._vocab, t)
+                if i < len(self._vocab) and self._vocab[i] == t: del self._vocab[i]
+        for values in self._fields.values():
+            for v in list(values):
+                values[v] -= ids
+                if not values[v]: del values[v]
+        for d in ids:
+            self._total_len -= self._docs.pop(d)[4]
+
+    # -------------------- 검색 --------------------
+    def _expand(self, term):
+        # 정확 일치 + 접두어 일치 용어
+        i = bisect.bisect_left(self._vocab, term)
+        out = []
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def search(self, query, sources=None, start=None, end=None, limit=50):
+        # 반환: [(점수, source, 위치, 날짜, 표시용 필드)] - 모든 검색어를 포함하는 문서만 점수순
+        with self._lock:
+            filters, words = parse_query(query)
+            candidates = None
+            for field, value in filters.items():
+                ids = set(self._fields.get(field, {}).get(value, ()))
+                candidates = ids if candidates is None else candidates & ids
+            n_docs = max(len(self._docs), 1)
+            avg_len = self._total_len / n_docs if self._total_len else 1
+            scores = defaultdict(float)
+            for word in words:
+                for term in tokenize(word):
+                    matched = defaultdict(float)
+                    for t in self._expand(term):
+                        plist = self._postings[t]
+                        idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+                        for d, tf in plist.items():
+                            dl = self._docs[d][4]
+                            matched[d] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / avg_len))
+                    ids = set(matched)
+                    candidates = ids if candidates is None else candidates & ids
+                    for d in candidates: scores[d] += matched[d]
+            if candidates is None: return []
+            results = []
+            start = pd.Timestamp(start) if start is not None else None
+            end = pd.Timestamp(end) if end is not None else None
+            for d in candidates:
+                source, pos, date, shown, _ = self._docs[d]
+                if sources and source not in sources: continue
+                if start is not None and not (pd.notna(date) and date >= start): continue
+                if end is not None and not (pd.notna(date) and date <= end): continue
+                results.append((round(scores.get(d, 0.0), 3), source, pos, date, shown))
+            results.sort(key=lambda r: (-r[0], -(r[3].value if pd.notna(r[3]) else 0)))
+            return results[:limit]
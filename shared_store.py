@@ -0,0 +1,219 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+
+# ------------------------------------------------------------------
+# 다중 프로세스 배포용 공유 캐시 / 쓰기 잠금
+#  - SMT_SHARED_STORE 환경변수에 SQLite 파일 경로를 지정하면 활성화
+#  - 스냅샷: 한 프로세스만 구글을 조회(임대 방식)하고 나머지는 공유 캐시에서 읽음
+#  - 잠금: 시트 단위 임대 잠금 - 보유 중에는 주기적으로 연장, 프로세스가 죽으면 만료 시간 후 자동 해제
+#  - 미지정 시 프로세스 내부 잠금(LocalLocks)만 사용
+# ------------------------------------------------------------------
+STORE_ENV = "SMT_SHARED_STORE"
+LOCK_TTL = 30.0        # 잠금 임대 시간 (초) - 보유 중에는 LOCK_RENEW 주기로 연장
+LOCK_RENEW = LOCK_TTL / 3  # 잠금 임대 연장 주기 (초)
+LOCK_TIMEOUT = 20.0    # 잠금 대기 최대 시간 (초)
+LOCK_POLL = 0.05
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class _Reentrant:
+    # 같은 스레드가 이미 잡은 잠금은 다시 잡지 않음 (update_inventory -> save_data)
+    def __init__(self):
+        self._held = threading.local()
+
+    def _depth(self, name):
+        return getattr(self._held, "d", {}).get(name, 0)
+
+    def _set_depth(self, name, n):
+        if not hasattr(self._held, "d"): self._held.d = {}
+        self._held.d[name] = n
+
+
+class LocalLocks(_Reentrant):
+    def __init__(self):
+        super().__init__()
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def lock(self, name, timeout=LOCK_TIMEOUT):
+        depth = self._depth(name)
+        if depth:
+            self._set_depth(name, depth + 1)
+            try: yield
+            finally: self._set_depth(name, depth)
+            return
+        with self._guard:
+            lk = self._locks.setdefault(name, threading.Lock())
+        if not lk.acquire(timeout=timeout): raise LockTimeout(name)
+        self._set_depth(name, 1)
+        try: yield
+        finally:
+            self._set_depth(name, 0)
+            lk.release()
+
+
+class SharedStore(_Reentrant):
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        with self._conn() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS snapshots (sheet TEXT PRIMARY KEY, version INTEGER, digest TEXT, fetched_at REAL, payload BLOB)")
+            con.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+
+    def _conn(self):
+        # 스레드별 연결 (sqlite3 연결은 스레드 간 공유 불가)
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+            con.execute("PRAGMA busy_timeout=%d" % int(LOCK_TIMEOUT * 1000))
+        return con
+
+    # -------------------- 임대 (잠금/폴링 담당) --------------------
+    def try_lease(self, name, ttl=LOCK_TTL, owner=None):
+        owner = owner or self.owner
+        now = time.time()
+        con = self._conn()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute("SELECT owner, expires FROM leases WHERE name=?", (name,)).fetchone()
+            if row is None or row[0] == owner or row[1] < now:
+                con.execute("INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)", (name, owner, now + ttl))
+                con.execute("COMMIT")
+                return True
+            con.execute("COMMIT")
+            return False
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    def renew_lease(self, name, ttl=LOCK_TTL, owner=None):
+        # 보유 중인 임대만 연장 - 반환: False면 이미 만료되어 다른 소유자에게 넘어감
+        cur = self._conn().execute("UPDATE leases SET expires=? WHERE name=? AND owner=?", (time.time() + ttl, name, owner or self.owner))
+        return cur.rowcount > 0
+
+    def release_lease(self, name, owner=None):
+        self._conn().execute("DELETE FROM leases WHERE name=? AND owner=?", (name, owner or self.owner))
+
+    def _heartbeat(self, key, owner, stop):
+        # 잠금 보유 중 임대 연장 (저장 중 429 재시도 등으로 LOCK_TTL을 넘겨도 다른 프로세스가 끼어들지 않음)
+        try:
+            while not stop.wait(LOCK_RENEW):
+                try:
+                    if not self.renew_lease(key, LOCK_TTL, owner): return
+                except sqlite3.Error: continue
+        finally:
+            con = getattr(self._local, "con", None)
+            if con is not None: con.close()
+
+    @contextmanager
+    def lock(self, name, timeout=LOCK_TIMEOUT):
+        # 프로세스 간 시트 쓰기 잠금 (스레드마다 고유 소유자)
+        depth = self._depth(name)
+        if depth:
+            self._set_depth(name, depth + 1)
+            try: yield
+            finally: self._set_depth(name, depth)
+            return
+        owner = f"{self.owner}-{threading.get_ident()}"
+        key = f"write:{name}"
+        deadline = time.monotonic() + timeout
+        while not self.try_lease(key, LOCK_TTL, owner):
+            if time.monotonic() > deadline: raise LockTimeout(name)
+            time.sleep(LOCK_POLL)
+        self._set_depth(name, 1)
+        stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(key, owner, stop), name=f"lease-{name}", daemon=True).start()
+        try: yield
+        finally:
+            stop.set()
+            self._set_depth(name, 0)
+            self.release_lease(key, owner)
+
+    # -------------------- 스냅샷 --------------------
+    def publish(self, sheet, digest, df):
+        # 내용이 바뀐 경우에만 버전 증가 - 반환: 공유 버전 번호
+        con = self._conn()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute("SELECT version, digest FROM snapshots WHERE sheet=?", (sheet,)).fetchone()
+            if row is not None and row[1] == digest:
+                con.execute("UPDATE snapshots SET fetched_at=? WHERE sheet=?", (time.time(), sheet))
+                version = row[0]
+            else:
+                version = (row[0] + 1) if row else 1
+                payload = zlib.compress(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL), 3)
+                con.execute("INSERT OR REPLACE INTO snapshots (sheet, version, digest, fetched_at, payload) VALUES (?, ?, ?, ?, ?)",
+                            (sheet, version, digest, time.time(), payload))
+            con.execute("COMMIT")
+            return version
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    def head(self, sheet):
+        # 반환: (버전, 다이제스트, 조회 시각) 또는 None
+        return self._conn().execute("SELECT version, digest, fetched_at FROM snapshots WHERE sheet=?", (sheet,)).fetchone()
+
+    def load(self, sheet):
+        row = self._conn().execute("SELECT version, digest, fetched_at, payload FROM snapshots WHERE sheet=?", (sheet,)).fetchone()
+        if row is None: return None
+        return row[0], row[1], row[2], pickle.loads(zlib.decompress(row[3]))
+
+
+def open_store(path=None):
+    # 환경변수가 없으면 None (단일 프로세스 모드)
+    path = path or os.environ.get(STORE_ENV)
+    return SharedStore(path) if path else None
+
+
+class Scoped:
+    # 사이트(샤드)별 이름 공간 - 잠금/임대/공유 스냅샷 이름 앞에 시트가 있는 스프레드시트 이름을 붙임
+    #  book_of(시트) -> 스프레드시트 이름 (None이면 접두어 없음 = 기본 사이트와 같은 이름)
+    #  같은 스프레드시트의 같은 시트는 어느 샤드에서 접근해도 같은 이름 (연도 샤드와 사이트가 기준정보 잠금을 공유)
+    def __init__(self, base, book_of):
+        self.base = base
+        self.book_of = book_of
+
+    def _name(self, name):
+        head, sep, sheet = name.rpartition(":")  # 임대 이름 "poll:시트"
+        book = self.book_of(sheet)
+        return f"{head}{sep}{book}/{sheet}" if book else name
+
+    def lock(self, name, timeout=LOCK_TIMEOUT):
+        return self.base.lock(self._name(name), timeout)
+
+    def try_lease(self, name, ttl=LOCK_TTL, owner=None):
+        return self.base.try_lease(self._name(name), ttl, owner)
+
+    def release_lease(self, name, owner=None):
+        return self.base.release_lease(self._name(name), owner)
+
+    def publish(self, sheet, digest, df):
+        return self.base.publish(self._name(sheet), digest, df)
+
+    def head(self, sheet):
+        return self.base.head(self._name(sheet))
+
+    def load(self, sheet):
+        return self.base.load(self._name(sheet))
+
+
+def scoped(base, book_of=None):
+    # book_of 없으면 (기본 사이트) 원래 저장소 그대로
+    if base is None or book_of is None: return base
+    return Scoped(base, book_of)
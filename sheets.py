@@ -0,0 +1,394 @@
+import math
+import threading
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import sites
+
+
+# ------------------------------------------------------------------
+# 구글 시트 저장소 계층 (Streamlit 화면과 무관하게 사용 가능)
+#  - 캐시/스냅샷 관리는 data_hub에서 담당, 이 모듈은 조회/기록만 수행
+#  - 구글 연동 라이브러리(gspread/google-auth)는 처음 연결할 때 로드 (앱 기동 시간 단축)
+#  - site: 사이트 샤드 ("사이트" 또는 "사이트@연도", 생략 시 기본 사이트) - sites 모듈 참고
+#    연도 분리 시트에 행을 추가할 때는 행의 날짜 연도 스프레드시트에 기록 (연말에 입력한 12/31 실적이 새해 스프레드시트로 가지 않음)
+# ------------------------------------------------------------------
+GOOGLE_SHEET_NAME = "SMT_Database"
+
+# 시트 이름 정의
+SHEET_RECORDS = "production_data"
+SHEET_ITEMS = "item_codes"
+SHEET_INVENTORY = "inventory_data"
+SHEET_INV_HISTORY = "inventory_history"
+SHEET_MAINTENANCE = "maintenance_data"
+SHEET_EQUIPMENT = "equipment_list"
+SHEET_CHECK_MASTER = "daily_check_master"
+SHEET_CHECK_RESULT = "daily_check_result"
+SHEET_CHECK_SIGNATURE = "daily_check_signature"
+SHEET_SIGNATURE_BLOBS = "signature_blobs"
+SHEET_AUDIT_LOG = "audit_log"
+SHEET_LINE_EQUIPMENT = "line_equipment"
+SHEET_PLAN = "production_plan"
+
+# 컬럼 정의
+COLS_RECORDS = ["날짜", "구분", "품목코드", "제품명", "수량", "입력시간", "작성자", "수정자", "수정시간"]
+COLS_ITEMS = ["품목코드", "제품명"]
+COLS_INVENTORY = ["품목코드", "제품명", "현재고"]
+COLS_INV_HISTORY = ["날짜", "품목코드", "구분", "수량", "비고", "작성자", "입력시간"]
+COLS_MAINTENANCE = ["날짜", "설비ID", "설비명", "작업구분", "작업내용", "교체부품", "비용", "작업자", "비가동시간", "입력시간", "작성자", "수정자", "수정시간"]
+COLS_EQUIPMENT = ["id", "name", "func"]
+COLS_CHECK_MASTER = ["line", "equip_id", "equip_name", "item_name", "check_content", "standard", "check_type", "min_val", "max_val", "unit"]
+COLS_CHECK_RESULT = ["date", "line", "equip_id", "item_name", "value", "ox", "checker", "timestamp", "비고"]
+COLS_CHECK_SIGNATURE = ["date", "line", "signer", "signature_data", "timestamp"]
+COLS_SIGNATURE_BLOBS = ["ref", "data", "timestamp"]  # 서명 PNG (base64) 백업
+COLS_AUDIT_LOG = ["시각", "시트", "키", "작업", "변경내용", "사용자"]
+COLS_LINE_EQUIPMENT = ["구분", "설비ID", "목표UPH"]  # 라인(생산 구분) - 설비 매핑 / 라인 목표 UPH (OEE)
+COLS_PLAN = ["날짜", "구분", "품목코드", "계획수량"]  # 일별 생산 계획 (품목코드 비우면 라인 전체 목표)
+
+# 시트별 기본 컬럼 (데이터 허브 등록/시트 자동 생성용)
+SHEET_COLUMNS = {
+    SHEET_RECORDS: COLS_RECORDS,
+    SHEET_ITEMS: COLS_ITEMS,
+    SHEET_INVENTORY: COLS_INVENTORY,
+    SHEET_INV_HISTORY: COLS_INV_HISTORY,
+    SHEET_MAINTENANCE: COLS_MAINTENANCE,
+    SHEET_EQUIPMENT: COLS_EQUIPMENT,
+    SHEET_CHECK_MASTER: COLS_CHECK_MASTER,
+    SHEET_CHECK_RESULT: COLS_CHECK_RESULT,
+    SHEET_CHECK_SIGNATURE: COLS_CHECK_SIGNATURE,
+    SHEET_SIGNATURE_BLOBS: COLS_SIGNATURE_BLOBS,
+    SHEET_AUDIT_LOG: COLS_AUDIT_LOG,
+    SHEET_LINE_EQUIPMENT: COLS_LINE_EQUIPMENT,
+    SHEET_PLAN: COLS_PLAN,
+}
+
+# 연도별 스프레드시트로 나눌 수 있는 이력성 시트 (기준정보/재고는 사이트 기본 스프레드시트)
+YEARLY_SHEETS = {SHEET_RECORDS, SHEET_INV_HISTORY, SHEET_MAINTENANCE, SHEET_CHECK_RESULT, SHEET_CHECK_SIGNATURE, SHEET_AUDIT_LOG}
+# 연도 분리 기준 날짜 컬럼
+YEAR_COLS = {SHEET_RECORDS: "날짜", SHEET_INV_HISTORY: "날짜", SHEET_MAINTENANCE: "날짜",
+             SHEET_CHECK_RESULT: "date", SHEET_CHECK_SIGNATURE: "date", SHEET_AUDIT_LOG: "시각"}
+ROLLOVER_DAYS = 7  # 연초 이 기간에는 올해 샤드의 집계 조회에 작년 스프레드시트도 포함 (전일/최근 며칠 집계 유지)
+
+_handles = {}  # (스프레드시트, 시트) -> 워크시트 핸들
+_books = {}    # 스프레드시트 이름 -> 스프레드시트 핸들
+_handles_lock = threading.Lock()
+
+
+def shard_of(site=None):
+    return site or sites.default_site(GOOGLE_SHEET_NAME)
+
+
+def spreadsheet_name(sheet_name, site=None, year=None):
+    # year: 기록할 행의 연도 (지정 시 샤드의 연도보다 우선) - 미지정 시 샤드 연도, 없으면 올해
+    shard = shard_of(site)
+    if year: shard = sites.shard_key(sites.split(shard)[0], year)
+    return sites.spreadsheet(shard, sheet_name, YEARLY_SHEETS, GOOGLE_SHEET_NAME, datetime.now().year)
+
+
+def record_year(sheet_name, value):
+    # 행의 날짜 값(YEAR_COLS) -> 연도 문자열 (연도 분리 시트가 아니거나 날짜를 알 수 없으면 None = 샤드 기준)
+    if sheet_name not in YEAR_COLS: return None
+    text = str(value).strip()[:4]
+    return text if len(text) == 4 and text.isdigit() else None
+
+
+def previous_shards(sheet_name, site=None, start=None, today=None):
+    # 올해 샤드(연도 미지정)에서 연도 분리 시트를 읽을 때 함께 읽을 지난 연도 샤드 목록 (오래된 순, 올해와 다른 스프레드시트만)
+    #  start(조회 시작일) 지정 시 시작 연도 ~ 작년, 미지정 시 연초 ROLLOVER_DAYS일 동안 작년
+    site, year = sites.split(shard_of(site))
+    if year or sheet_name not in YEARLY_SHEETS: return []
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    if start is not None:
+        start = pd.to_datetime(str(start).split(" ")[0], errors="coerce")
+        if pd.isna(start) or start.year >= today.year: return []
+        years = range(start.year, today.year)
+    elif today.dayofyear > ROLLOVER_DAYS: return []
+    else: years = [today.year - 1]
+    seen, out = {spreadsheet_name(sheet_name, site)}, []
+    for y in years:
+        shard = sites.shard_key(site, str(y))
+        book = spreadsheet_name(sheet_name, shard)
+        if book not in seen:
+            seen.add(book)
+            out.append(shard)
+    return out
+
+
+def preload():
+    # 구글 연동 라이브러리 미리 로드 (백그라운드 예열용)
+    import gspread, gspread_dataframe
+    from google.oauth2.service_account import Credentials
+
+
+@st.cache_resource
+def get_gs_connection():
+    try:
+        import gspread
+        from google.oauth2.service_account import Credentials
+        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+        if "gcp_service_account" not in st.secrets: return None
+        creds_dict = dict(st.secrets["gcp_service_account"])
+        credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+        return gspread.authorize(credentials)
+    except: return None
+
+
+_client_override = None
+
+
+def use_client(client):
+    # 구글 연결 대신 사용할 클라이언트 (open(스프레드시트 이름)을 가진 객체, None이면 구글 연결) - 부하 테스트용
+    global _client_override
+    _client_override = client
+    forget_worksheet()
+
+
+def get_worksheet(sheet_name, create_cols=None, site=None, year=None):
+    # 워크시트 핸들은 프로세스 단위로 재사용 (매 호출마다 스프레드시트를 다시 열지 않음)
+    book = spreadsheet_name(sheet_name, site, year)
+    with _handles_lock:
+        ws = _handles.get((book, sheet_name))
+        sh = _books.get(book)
+    if ws is not None: return ws
+    client = _client_override or get_gs_connection()
+    if not client: return None
+    try:
+        if sh is None: sh = client.open(book)
+    except:
+        return None
+    import gspread
+    try:
+        ws = sh.worksheet(sheet_name)
+    except gspread.WorksheetNotFound:
+        if not create_cols: return None
+        ws = sh.add_worksheet(title=sheet_name, rows=100, cols=20)
+        ws.append_row(create_cols)
+    with _handles_lock:
+        _handles[(book, sheet_name)] = ws
+        _books[book] = sh
+    return ws
+
+
+def forget_worksheet(sheet_name=None, site=None, year=None):
+    # 오류 발생 시 핸들을 버리고 다음 호출에서 다시 연결
+    with _handles_lock:
+        if sheet_name is None: _handles.clear(); _headers.clear(); _books.clear()
+        else:
+            key = (spreadsheet_name(sheet_name, site, year), sheet_name)
+            _handles.pop(key, None); _headers.pop(key, None)
+
+
+def empty_frame(cols=None):
+    return pd.DataFrame(columns=cols) if cols else pd.DataFrame()
+
+
+_headers = {}  # (스프레드시트, 시트)별 머리글 캐시 (조회 시 함께 받아 변경 여부 확인)
+
+
+def fetch_sheet(sheet_name, cols=None, columns=None, site=None):
+    # 시트 조회 (캐시 없음) - 연결 불가 시 빈 프레임, 조회 오류는 예외로 전달
+    #  columns 지정 시 해당 열 구간만 A1 범위로 조회, 미지정 시 머리글이 있는 열 전체
+    #  빈 격자(add_worksheet 기본 100행 x 20열)는 받지 않고, 빈 행은 행 위치(인덱스)를 유지한 채 제외
+    ws = get_worksheet(sheet_name, create_cols=cols, site=site)
+    if not ws: return empty_frame(columns or cols)
+    key = (spreadsheet_name(sheet_name, site), sheet_name)
+    try:
+        header = _headers.get(key)
+        values = _read_columns(ws, header, columns) if header else None
+        if values is None:
+            header = _headers[key] = _read_header(ws)
+            values = _read_columns(ws, header, columns)
+    except Exception:
+        forget_worksheet(sheet_name, site)
+        raise
+    if values is None or not any(len(v) for v in values.values()): return empty_frame(columns or cols)
+
+    n = max(len(v) for v in values.values())
+    df = pd.DataFrame({c: _column(v + [""] * (n - len(v))) for c, v in values.items()}).infer_objects()
+    blank = (df == "").all(axis=1)
+    df = df[~blank.to_numpy()]
+    if df.empty: return empty_frame(columns or cols)
+    keep = set(columns or cols or [])
+    df = df[[c for c in df.columns if c in keep or not (df[c] == "").all()]]
+
+    for c in (columns or cols or []):
+        if c not in df.columns: df[c] = ""
+    return df[columns] if columns else df
+
+
+def _column(values):
+    # 숫자와 문자가 섞인 열은 문자열 열로 통일 (get_as_dataframe의 열 단위 형 추론과 동일)
+    kinds = {type(v) for v in values if v != ""}
+    if kinds & {int, float} and kinds - {int, float, bool}:
+        return [v if isinstance(v, str) else (str(int(v)) if isinstance(v, float) and v.is_integer() else str(v)) for v in values]
+    return values
+
+
+def _value_params():
+    # get_as_dataframe(evaluate_formulas=True)와 같은 값 형식
+    return {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "FORMATTED_STRING"}
+
+
+def _read_header(ws):
+    from gspread.utils import absolute_range_name
+    res = ws.spreadsheet.values_batch_get([absolute_range_name(ws.title, "1:1")], params=_value_params())
+    row = (res.get("valueRanges", [{}])[0].get("values") or [[]])[0]
+    return [str(h).strip() for h in row]
+
+
+def _read_columns(ws, header, columns=None):
+    # 머리글 + 필요한 열 구간을 batch_get 1회로 조회 - 반환: {컬럼: [값]} (머리글이 바뀌었으면 None)
+    from gspread.utils import absolute_range_name, rowcol_to_a1
+    wanted = [i for i, h in enumerate(header) if h and (columns is None or h in columns)]
+    wanted = [i for i in wanted if header.index(header[i]) == i]  # 중복 머리글은 첫 열만
+    runs = _runs([i + 1 for i in wanted])
+    letter = lambda n: rowcol_to_a1(1, n)[:-1]
+    ranges = ["1:1"] + [f"{letter(a)}2:{letter(b)}" for a, b in runs]
+    res = ws.spreadsheet.values_batch_get([absolute_range_name(ws.title, r) for r in ranges], params=_value_params())
+    parts = res.get("valueRanges", [])
+    got = [str(h).strip() for h in ((parts[0].get("values") or [[]])[0] if parts else [])]
+    if got != header: return None
+    out = {}
+    for (a, b), part in zip(runs, parts[1:]):
+        rows = part.get("values", [])
+        for k in range(a, b + 1):
+            out[header[k - 1]] = [r[k - a] if len(r) > k - a else "" for r in rows]
+    return out
+
+
+def write_sheet(df, sheet_name, site=None):
+    try:
+        ws = get_worksheet(sheet_name, site=site)
+        if ws:
+            from gspread_dataframe import set_with_dataframe
+            df = df.fillna("")
+            ws.clear()
+            set_with_dataframe(ws, df)
+            return True
+        return False
+    except:
+        forget_worksheet(sheet_name, site)
+        return False
+
+
+def replace_sheet(df, sheet_name, site=None):
+    # 시트 전체를 batch_update 1회로 교체 (clear 후 재작성과 달리 중간에 빈 시트 상태가 없음)
+    #  숫자로 읽히는 값은 숫자, 나머지는 문자열 그대로 기록 / 기존 범위의 남는 셀은 비움
+    try:
+        ws = get_worksheet(sheet_name, site=site)
+        if not ws: return False
+        df = df.fillna("")
+        rows = [list(map(str, df.columns))] + df.astype(str).values.tolist()
+        grid = {"rowCount": max(ws.row_count, len(rows)), "columnCount": max(ws.col_count, len(df.columns), 1)}
+        ws.spreadsheet.batch_update({"requests": [
+            {"updateSheetProperties": {"properties": {"sheetId": ws.id, "gridProperties": grid}, "fields": "gridProperties.rowCount,gridProperties.columnCount"}},
+            {"updateCells": {"range": {"sheetId": ws.id}, "rows": [{"values": [_cell(v) for v in r]} for r in rows], "fields": "userEnteredValue"}},
+        ]})
+        forget_worksheet(sheet_name, site)  # 격자 크기/머리글 캐시 갱신
+        return True
+    except:
+        forget_worksheet(sheet_name, site)
+        return False
+
+
+def _cell(value):
+    if value == "": return {}
+    if value.startswith("="): return {"userEnteredValue": {"formulaValue": value}}
+    try: num = float(value)
+    except ValueError: num = None
+    # "007", "1e3" 같은 코드성 문자열은 그대로 (되읽었을 때 같은 문자열이 되는 경우만 숫자)
+    if num is not None and math.isfinite(num):
+        if num.is_integer() and str(int(num)) == value: return {"userEnteredValue": {"numberValue": int(num)}}
+        if str(num) == value: return {"userEnteredValue": {"numberValue": num}}
+    return {"userEnteredValue": {"stringValue": value}}
+
+
+def append_record(data_dict, sheet_name, site=None):
+    year = record_year(sheet_name, data_dict.get(YEAR_COLS.get(sheet_name), ""))
+    try:
+        ws = get_worksheet(sheet_name, site=site, year=year)
+        if ws:
+            try: headers = ws.row_values(1)
+            except: headers = list(data_dict.keys())
+            ws.append_row([str(data_dict.get(h, "")) if not pd.isna(data_dict.get(h, "")) else "" for h in headers])
+            return True
+        return False
+    except:
+        forget_worksheet(sheet_name, site, year)
+        return False
+
+
+def append_records(rows, sheet_name, cols, site=None):
+    # 연도 분리 시트는 행의 날짜 연도별로 나눠 기록 (연도마다 append_rows 1회)
+    at = cols.index(YEAR_COLS[sheet_name]) if YEAR_COLS.get(sheet_name) in cols else None
+    groups = {}
+    for row in rows:
+        groups.setdefault(record_year(sheet_name, row[at]) if at is not None and len(row) > at else None, []).append(row)
+    ok = True
+    for year, part in groups.items():
+        try:
+            ws = get_worksheet(sheet_name, create_cols=cols, site=site, year=year)
+            if ws:
+                safe_rows = [[str(cell) if cell is not None else "" for cell in row] for row in part]
+                ws.append_rows(safe_rows)
+            else: ok = False
+        except:
+            forget_worksheet(sheet_name, site, year)
+            ok = False
+    return ok
+
+
+def apply_changes(sheet_name, cells, appends, deletes, cols, site=None):
+    # 시트 전체 재작성 대신 변경분만 기록
+    #  cells: [(행 위치, 컬럼, 값)] -> batch_update 1회
+    #  deletes: [행 위치] -> 아래쪽 연속 구간부터 batch_update 1회로 삭제
+    #  appends: [dict] -> append_rows 1회
+    #  행 위치는 데이터 영역 기준 0부터 (시트 행 번호 = 위치 + 2)
+    try:
+        ws = get_worksheet(sheet_name, create_cols=cols, site=site)
+        if not ws: return False
+        from gspread.utils import rowcol_to_a1
+        header = ws.row_values(1)
+        missing = [c for c in cols if c not in header]
+        if missing:
+            header = header + missing
+            ws.update(values=[header], range_name="A1")
+        if cells:
+            ws.batch_update([{"range": rowcol_to_a1(pos + 2, header.index(col) + 1), "values": [[v]]} for pos, col, v in cells],
+                            value_input_option="USER_ENTERED")
+        if deletes: ws.spreadsheet.batch_update({"requests": _delete_requests(ws, deletes)})
+        if appends:
+            ws.append_rows([[r.get(h, "") for h in header] for r in appends], value_input_option="USER_ENTERED")
+        return True
+    except:
+        forget_worksheet(sheet_name, site)
+        return False
+
+
+def delete_positions(sheet_name, positions, site=None):
+    # 데이터 행 위치 목록을 batch_update 1회로 삭제 (아래쪽 구간부터, 격자 크기도 함께 줄어듦)
+    #  끝에 추가되는 행(append)의 위치에는 영향 없음
+    try:
+        ws = get_worksheet(sheet_name, site=site)
+        if not ws: return False
+        if positions: ws.spreadsheet.batch_update({"requests": _delete_requests(ws, positions)})
+        return True
+    except:
+        forget_worksheet(sheet_name, site)
+        return False
+
+
+def _delete_requests(ws, positions):
+    return [{"deleteDimension": {"range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": a + 1, "endIndex": b + 2}}}
+            for a, b in reversed(_runs(sorted(positions)))]
+
+
+def _runs(positions):
+    # [3, 4, 5, 9] -> [(3, 5), (9, 9)]
+    runs = []
+    for p in positions:
+        if runs and p == runs[-1][1] + 1: runs[-1] = (runs[-1][0], p)
+        else: runs.append((p, p))
+    return runs
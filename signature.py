@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+# ------------------------------------------------------------------
+# 전자 서명 저장
+#  - 캔버스 RGBA 배열을 잉크 영역만 잘라 1비트 PNG로 변환 (보통 1~3KB)
+#  - 로컬 블롭 저장소에 내용 해시로 저장하고 시트에는 참조("sig:<해시>")만 기록
+#  - 다른 서버/재배포에서도 볼 수 있도록 블롭 시트 업로드는 백그라운드 스레드에서 수행
+# ------------------------------------------------------------------
+BLOB_DIR_ENV = "SMT_BLOB_DIR"
+BLOB_DIR_DEFAULT = "blobs"
+REF_PREFIX = "sig:"
+INK_ALPHA = 64      # 이 값보다 불투명하고
+INK_LEVEL = 160     # 이 밝기보다 어두운 픽셀을 잉크로 판정
+PAD = 4
+UPLOAD_RETRIES = 5
+
+
+def encode_png(image_data):
+    # 반환: 1비트 PNG bytes (잉크가 없으면 None)
+    if image_data is None: return None
+    img = np.asarray(image_data)
+    if img.ndim != 3 or img.shape[2] < 3: return None
+    gray = img[:, :, :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    ink = gray < INK_LEVEL
+    if img.shape[2] == 4: ink &= img[:, :, 3] > INK_ALPHA
+    rows, cols = np.flatnonzero(ink.any(axis=1)), np.flatnonzero(ink.any(axis=0))
+    if not len(rows): return None
+    top, bottom = max(rows[0] - PAD, 0), min(rows[-1] + PAD + 1, ink.shape[0])
+    left, right = max(cols[0] - PAD, 0), min(cols[-1] + PAD + 1, ink.shape[1])
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.fromarray(~ink[top:bottom, left:right]).convert("1").save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+def is_ref(value):
+    return str(value).startswith(REF_PREFIX)
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, ref):
+        key = str(ref)[len(REF_PREFIX):]
+        if not key.isalnum(): raise ValueError(ref)
+        return os.path.join(self.root, key[:2], key + ".png")
+
+    def put(self, data):
+        # 내용 해시 기반 - 같은 서명은 한 번만 저장, 반환: 참조 문자열
+        ref = REF_PREFIX + hashlib.sha256(data).hexdigest()[:32]
+        path = self.path(ref)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f: f.write(data)
+            os.replace(tmp, path)
+        return ref
+
+    def has(self, ref):
+        try: return os.path.exists(self.path(ref))
+        except ValueError: return False
+
+    def get(self, ref):
+        try:
+            with open(self.path(ref), "rb") as f: return f.read()
+        except (OSError, ValueError): return None
+
+
+def open_blobs(root=None):
+    return BlobStore(root or os.environ.get(BLOB_DIR_ENV) or BLOB_DIR_DEFAULT)
+
+
+_checked = {}
+
+
+def image_path(store, ref):
+    # PDF 삽입용 - 디코딩 확인된 PNG 파일 경로 (확인 결과는 캐시, 없거나 손상 시 None)
+    path = _checked.get(ref)
+    if path: return path
+    if not store.has(ref): return None
+    try:
+        from PIL import Image
+        with Image.open(store.path(ref)) as im: im.verify()
+    except Exception: return None
+    path = _checked[ref] = store.path(ref)
+    return path
+
+
+class Uploader:
+    # 블롭 시트 업로드를 요청 처리와 분리 - upload(ref, base64) 실패 시 간격을 늘려 재시도
+    def __init__(self, store, upload):
+        self._store = store
+        self._upload = upload
+        self._queue = queue.Queue()
+        self.stats = {"uploaded": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._loop, name="signature-upload", daemon=True)
+        self._thread.start()
+
+    def submit(self, ref):
+        self._queue.put((ref, 0))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _loop(self):
+        while True:
+            ref, attempt = self._queue.get()
+            data = self._store.get(ref)
+            ok = data is not None
+            if ok:
+                try: ok = self._upload(ref, base64.b64encode(data).decode())
+                except Exception: ok = False
+            if ok:
+                self.stats["uploaded"] += 1
+            elif data is not None and attempt + 1 < UPLOAD_RETRIES:
+                time.sleep(min(2 ** attempt, 30))
+                self._queue.put((ref, attempt + 1))
+            else:
+                self.stats["failed"] += 1
@@ -0,0 +1,82 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------------------------------------------------------
+# 사이트(공장)별 스프레드시트 분리
+#  - 사이트마다 별도 스프레드시트, 이력성 시트는 연도별 스프레드시트로 추가 분리 가능
+#  - 샤드 = "사이트" 또는 "사이트@연도" (연도 생략 시 올해) - 데이터 허브/잠금/연결 핸들은 샤드 단위로 분리
+#    행 추가는 행의 날짜 연도 스프레드시트로, 올해 샤드의 집계 조회는 연초에 작년 스프레드시트도 포함 (sheets.previous_shards)
+#  - 설정: SMT_SITES 환경변수(JSON 문자열 또는 JSON 파일 경로) 또는 secrets의 [sites]
+#      {"main": {"label": "1공장", "spreadsheet": "SMT_Database"},
+#       "plant2": {"label": "2공장", "spreadsheet": "SMT_Plant2", "years": {"2026": "SMT_Plant2_2026"}}}
+#  - 설정이 없으면 기존 단일 스프레드시트(기본 사이트)로 동작
+# ------------------------------------------------------------------
+SITES_ENV = "SMT_SITES"
+DEFAULT_SITE = "main"
+FAN_OUT_WORKERS = 8
+
+_sites = None
+
+
+def _from_secrets():
+    try:
+        import streamlit as st
+        return {k: dict(v) for k, v in st.secrets["sites"].items()} if "sites" in st.secrets else None
+    except Exception: return None
+
+
+def load(default_spreadsheet, raw=None):
+    # 반환: {사이트: {"label", "spreadsheet", "years": {연도: 스프레드시트}}} (첫 번째 사이트가 기본)
+    global _sites
+    if raw is None:
+        text = os.environ.get(SITES_ENV, "").strip()
+        if text and os.path.exists(text):
+            with open(text, encoding="utf-8") as f: text = f.read()
+        raw = json.loads(text) if text else _from_secrets()
+    if not raw: raw = {DEFAULT_SITE: {"spreadsheet": default_spreadsheet}}
+    _sites = {str(k): {"label": str(v.get("label") or k), "spreadsheet": v.get("spreadsheet") or default_spreadsheet,
+                       "years": {str(y): s for y, s in (v.get("years") or {}).items()}} for k, v in raw.items()}
+    return _sites
+
+
+def all_sites(default_spreadsheet):
+    return _sites if _sites is not None else load(default_spreadsheet)
+
+
+def default_site(default_spreadsheet):
+    return next(iter(all_sites(default_spreadsheet)))
+
+
+def split(shard):
+    # "plant2@2026" -> ("plant2", "2026"), "plant2" -> ("plant2", None)
+    site, _, year = str(shard).partition("@")
+    return site, year or None
+
+
+def shard_key(site, year=None):
+    return f"{site}@{year}" if year else site
+
+
+def spreadsheet(shard, sheet_name, yearly, default_spreadsheet, this_year):
+    # 샤드 + 시트 -> 스프레드시트 이름 (이력성 시트만 연도 분리, 기준정보/재고는 사이트 기본 스프레드시트)
+    sites = all_sites(default_spreadsheet)
+    site, year = split(shard)
+    cfg = sites.get(site)
+    if cfg is None: raise KeyError(f"알 수 없는 사이트: {site}")
+    if sheet_name in yearly and cfg["years"]:
+        return cfg["years"].get(year or str(this_year), cfg["spreadsheet"])
+    return cfg["spreadsheet"]
+
+
+def fan_out(fn, shards, workers=FAN_OUT_WORKERS):
+    # 샤드별 fn(shard)을 병렬 실행 - 반환: {샤드: (결과, 오류)} (한 사이트 실패가 전체를 막지 않음)
+    shards = list(shards)
+    if not shards: return {}
+
+    def run(shard):
+        try: return fn(shard), None
+        except Exception as e: return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(shards)), thread_name_prefix="site-fan-out") as pool:
+        return dict(zip(shards, pool.map(run, shards)))
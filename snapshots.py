@@ -0,0 +1,208 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+import data_hub
+import shared_store
+from sheets import SHEET_COLUMNS
+
+# ------------------------------------------------------------------
+# 시트 스냅샷 / 복원
+#  - 시트 내용을 문자열 열 그대로 Parquet(zstd)으로 저장, 파일 이름은 내용 해시 (같은 내용은 한 번만 저장)
+#  - 스냅샷 1회 = 매니페스트 1개 {시트: 해시} - 직전 스냅샷과 같은 시트는 파일을 다시 만들지 않음
+#  - 정기 스냅샷(전체 시트) + save_data 직전 스냅샷(해당 시트)
+#  - 복원은 선택 시점 이전의 마지막 스냅샷을 batch_update 1회로 기록 (중간에 빈 시트 상태 없음)
+#  - Parquet 기록에는 pyarrow 필요 - 스냅샷 실패는 저장을 막지 않고 로그 + 마지막 오류(SnapshotStore.error)로 남김
+#  실행: python snapshots.py take | list [시트] | restore <시트> <시각>
+# ------------------------------------------------------------------
+SNAPSHOT_DIR_ENV = "SMT_SNAPSHOT_DIR"
+SNAPSHOT_DIR_DEFAULT = "snapshots"
+SNAPSHOT_INTERVAL = 3600     # 정기 스냅샷 주기 (초)
+RETAIN_DAYS = 30             # 이보다 오래된 매니페스트/미참조 파일은 정리
+
+log = logging.getLogger("smt.snapshots")
+
+
+def _digest(df):
+    return hashlib.md5(f"{data_hub.frame_digest(df)}|{'|'.join(map(str, df.columns))}".encode()).hexdigest()
+
+
+def _text(df):
+    # 시트 값은 숫자/문자 혼합 -> 표시 문자열로 통일해 저장 (복원 시 숫자는 숫자로 기록)
+    return df.fillna("").astype(str).reset_index(drop=True)
+
+
+class SnapshotStore:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._latest = None  # 시트별 마지막 스냅샷 항목 (최초 조회 시 매니페스트에서 구성)
+        self.error = None    # 마지막 실패 (시각, 작업, 오류) - 성공하면 None
+
+    def failed(self, what, e):
+        # 스냅샷 실패 기록 (호출 측은 저장/주기 작업을 계속 진행)
+        log.error("snapshot failed (%s, %s): %s", self.root, what, e, exc_info=e)
+        self.error = (str(pd.Timestamp.now())[:19], what, f"{type(e).__name__}: {e}")
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _put(self, df):
+        # 반환: (내용 해시, 행 수) - 같은 내용의 파일이 이미 있으면 다시 만들지 않음
+        df = _text(df)
+        key = _digest(df)
+        path = self._path("objects", key + ".parquet")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            df.to_parquet(tmp, compression="zstd", index=False)
+            os.replace(tmp, path)
+        return key, len(df)
+
+    def take(self, frames, reason="periodic", at=None):
+        # frames: {시트: DataFrame} - 반환: 새로 저장된 매니페스트 경로 (직전과 모두 같으면 None)
+        at = pd.Timestamp(at or pd.Timestamp.now())
+        entries = {}
+        for name, df in frames.items():
+            key, rows = self._put(df)
+            entries[name] = {"digest": key, "rows": rows}
+        with self._lock:
+            latest = self.latest()
+            if all(latest.get(n, {}).get("digest") == e["digest"] for n, e in entries.items()): return None
+            latest.update(entries)
+            os.makedirs(self._path("manifests"), exist_ok=True)
+            path = self._path("manifests", f"{at:%Y%m%d-%H%M%S-%f}.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"at": str(at), "reason": reason, "sheets": entries}, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+            self.error = None
+        return path
+
+    def manifests(self):
+        # 시각 순 [{"at", "reason", "sheets"}]
+        folder = self._path("manifests")
+        if not os.path.isdir(folder): return []
+        out = []
+        for name in sorted(f for f in os.listdir(folder) if f.endswith(".json")):
+            try:
+                with open(os.path.join(folder, name), encoding="utf-8") as f: out.append(json.load(f))
+            except (OSError, ValueError): continue
+        return out
+
+    def latest(self):
+        # 시트별 마지막 스냅샷 항목
+        if self._latest is None:
+            state = {}
+            for m in self.manifests(): state.update(m["sheets"])
+            self._latest = state
+        return self._latest
+
+    def history(self, sheet_name):
+        # 반환: 내용이 바뀐 시점 목록 [{"at", "reason", "digest", "rows"}] (최신순)
+        out, prev = [], None
+        for m in self.manifests():
+            e = m["sheets"].get(sheet_name)
+            if e and e["digest"] != prev:
+                out.append({"at": m["at"], "reason": m["reason"], "digest": e["digest"], "rows": e["rows"]})
+                prev = e["digest"]
+        return out[::-1]
+
+    def load(self, digest):
+        return pd.read_parquet(self._path("objects", digest + ".parquet"))
+
+    def as_of(self, sheet_name, at):
+        # 선택 시각 이전(포함) 마지막 스냅샷 - 반환: (시각, DataFrame) 또는 None
+        hit = None
+        for m in self.manifests():
+            if pd.Timestamp(m["at"]) > pd.Timestamp(at): break
+            if sheet_name in m["sheets"]: hit = (m["at"], m["sheets"][sheet_name]["digest"])
+        return (hit[0], self.load(hit[1])) if hit else None
+
+    def prune(self, retain_days=RETAIN_DAYS):
+        # 오래된 매니페스트 삭제 후 어느 매니페스트도 참조하지 않는 파일 삭제 (시트별 마지막 스냅샷은 유지)
+        limit = pd.Timestamp.now() - pd.Timedelta(days=retain_days)
+        folder = self._path("manifests")
+        names = sorted(f for f in os.listdir(folder) if f.endswith(".json")) if os.path.isdir(folder) else []
+        keep_last = set()
+        with self._lock:
+            for name in reversed(names):
+                with open(os.path.join(folder, name), encoding="utf-8") as f: m = json.load(f)
+                sheets_new = set(m["sheets"]) - keep_last
+                keep_last |= set(m["sheets"])
+                if pd.Timestamp(m["at"]) < limit and not sheets_new: os.remove(os.path.join(folder, name))
+            used = {e["digest"] for m in self.manifests() for e in m["sheets"].values()}
+            removed = 0
+            objects = self._path("objects")
+            for name in (os.listdir(objects) if os.path.isdir(objects) else []):
+                if name.endswith(".parquet") and name[:-8] not in used:
+                    os.remove(os.path.join(objects, name))
+                    removed += 1
+        return removed
+
+
+def open_snapshots(root=None):
+    return SnapshotStore(root or os.environ.get(SNAPSHOT_DIR_ENV) or SNAPSHOT_DIR_DEFAULT)
+
+
+def take_all(store, fetch, sheet_columns=SHEET_COLUMNS, reason="periodic"):
+    # 전체 시트 스냅샷 - fetch(시트, 컬럼) 실패한 시트는 건너뜀
+    frames = {}
+    for name, cols in sheet_columns.items():
+        try: frames[name] = fetch(name, cols)
+        except Exception as e: log.warning("snapshot fetch skipped (%s): %s", name, e)
+    return store.take(frames, reason)
+
+
+class Scheduler:
+    # 앱 프로세스 내 정기 스냅샷 (fetch는 데이터 허브 조회 - 사용 중인 시트는 구글 추가 조회 없음)
+    def __init__(self, store, fetch, interval=SNAPSHOT_INTERVAL):
+        self.store = store
+        self._fetch = fetch
+        self.interval = interval
+        self.last = None
+        self._thread = threading.Thread(target=self._loop, name="sheet-snapshots", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                take_all(self.store, self._fetch)
+                self.store.prune()
+                self.last = time.time()
+            except Exception as e: self.store.failed("periodic", e)
+
+
+if __name__ == "__main__":
+    import sheets
+    parser = argparse.ArgumentParser(description="시트 스냅샷 / 복원")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("take")
+    p_list = sub.add_parser("list")
+    p_list.add_argument("sheet", nargs="?")
+    p_restore = sub.add_parser("restore")
+    p_restore.add_argument("sheet")
+    p_restore.add_argument("at", help="이 시각 이전의 마지막 스냅샷 (예: 2026-10-19 09:00)")
+    args = parser.parse_args()
+    store = open_snapshots()
+    if args.cmd == "take":
+        path = take_all(store, sheets.fetch_sheet)
+        print(path or "변경 없음")
+        store.prune()
+    elif args.cmd == "list":
+        for name in ([args.sheet] if args.sheet else list(SHEET_COLUMNS)):
+            for h in store.history(name): print(f"{name}\t{h['at']}\t{h['reason']}\t{h['rows']}행")
+    else:
+        hit = store.as_of(args.sheet, args.at)
+        if hit is None: raise SystemExit("해당 시각 이전 스냅샷이 없습니다.")
+        locks = shared_store.open_store() or shared_store.LocalLocks()
+        with locks.lock(args.sheet):
+            store.take({args.sheet: sheets.fetch_sheet(args.sheet, SHEET_COLUMNS.get(args.sheet))}, reason="pre-restore")
+            ok = sheets.replace_sheet(hit[1], args.sheet)
+        print(f"{args.sheet} <- {hit[0]} ({len(hit[1])}행): {'완료' if ok else '실패'}")